@@ -53,6 +53,10 @@ def create_app():
     from .core.utils.modes_util import ModesUtil
     app.state.modes_util = ModesUtil(conf.DATA_FOLDER)
 
+    from .sse.manager import sse_manager
+    sse_manager.configure(conf.SSE_CLIENT_QUEUE_SIZE, conf.SSE_SLOW_CLIENT_POLICY, conf.SSE_RESUME_HISTORY)
+    sse_manager.is_military = app.state.modes_util.is_military
+
     # Add middleware
     app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])
 
@@ -105,6 +109,10 @@ def create_app():
     @app.on_event("shutdown")
     async def shutdown():
         logger.info("Application shutdown initiated")
+        if hasattr(app.state, 'live_bus'):
+            app.state.live_bus.stop()
+        if hasattr(app.state, 'updater'):
+            app.state.updater.shutdown()
         await close_auth_database()
 
     return app
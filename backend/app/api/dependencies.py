@@ -1,5 +1,5 @@
 from typing import Annotated, Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, WebSocket, status
 from pymongo.database import Database
 
 from ..data.repositories.aircraft_repository import AircraftRepository
@@ -9,7 +9,8 @@ from ..core.services.airline_service import AirlineService
 from ..config import Config, app_state
 from ..meta import MetaInformation
 from ..auth.models import User
-from ..auth.config import create_fastapi_users
+from ..auth.config import cookie_transport, create_fastapi_users, get_jwt_strategy
+from ..auth.manager import UserManager, get_user_manager
 
 def get_mongodb() -> Database:
     """Get MongoDB database connection"""
@@ -70,6 +71,25 @@ CurrentUserDep = Annotated[User, Depends(_current_active_user)]
 OptionalUserDep = Annotated[Optional[User], Depends(_current_optional_user)]
 
 
+async def _current_websocket_user(
+    websocket: WebSocket,
+    user_manager: UserManager = Depends(get_user_manager)
+) -> Optional[User]:
+    """
+    Authenticate a WebSocket from the access token cookie. The fastapi-users
+    dependencies only accept HTTP requests. Returns None if not authenticated.
+    """
+    token = websocket.cookies.get(cookie_transport.cookie_name)
+    if not token:
+        return None
+    user = await get_jwt_strategy(_config.JWT_SECRET).read_token(token, user_manager)
+    return user if user is not None and user.is_active else None
+
+
+# Type annotation for WebSocket user dependency, the endpoint must reject None
+WebSocketUserDep = Annotated[Optional[User], Depends(_current_websocket_user)]
+
+
 def require_admin_user(current_user: CurrentUserDep) -> User:
     """
     Dependency that requires the current user to have admin role.
@@ -23,11 +23,47 @@ from ...auth.config import get_jwt_strategy, cookie_transport
 from ...config import Config
 from ...data.repositories.aircraft_processing_repository import AircraftProcessingRepository
 from ...data.repositories.crawler_log_repository import CrawlerLogRepository
+from ...sse.manager import sse_manager
+
+
+class PositionDedupStats(BaseModel):
+    """Position dedup cache counters."""
+    hits: int
+    misses: int
+    evictions: int
+    tracked_flights: int
+    max_flights: int
+    history_size: int
 
 
 class DashboardStats(BaseModel):
     """Dashboard statistics response model."""
     flight_count: int
+    position_dedup: Optional[PositionDedupStats] = None
+
+
+class SSEClientStats(BaseModel):
+    """Queue state of a single SSE client."""
+    id: str
+    type: str
+    flight_id: Optional[str] = None
+    connected_seconds: float
+    policy: str
+    queue_depth: int
+    queue_size: int
+    lag_seconds: float
+    frames_sent: int
+    frames_dropped: int
+    deltas_coalesced: int
+    resyncs: int
+
+
+class SSEStats(BaseModel):
+    """SSE connection statistics."""
+    client_count: int
+    slow_client_policy: str
+    slow_client_disconnects: int
+    clients: list[SSEClientStats]
 
 
 class CircuitBreakerStats(BaseModel):
@@ -41,12 +77,35 @@ class CircuitBreakerStats(BaseModel):
     seconds_until_retry: float
 
 
+class RateLimiterStats(BaseModel):
+    """Adaptive request rate limit for a single source."""
+    rate_per_sec: float
+    max_rate_per_sec: float
+    tokens: float
+    avg_latency_ms: float
+    total_granted: int
+    total_timeouts: int
+    decrease_count: int
+
+
 class SourceStatusInline(BaseModel):
     """Status of a single crawler source (inline in stats)."""
     name: str
     enabled: bool
 
 
+class ClassificationStats(BaseModel):
+    """Live aircraft waiting for and passed through metadata classification."""
+    size: int
+    total_added: int
+    total_dropped: int
+    runs: int
+    aircraft_classified: int
+    last_batch_size: int
+    last_duration_ms: float
+    max_duration_ms: float
+
+
 class CrawlerStats(BaseModel):
     """Crawler processing queue statistics."""
     enabled: bool
@@ -56,7 +115,9 @@ class CrawlerStats(BaseModel):
     service_error_failures: int
     max_attempts_reached: int
     circuit_breakers: dict[str, CircuitBreakerStats]
+    rate_limiters: dict[str, RateLimiterStats] = {}
     sources: list[SourceStatusInline] = []
+    classification: Optional[ClassificationStats] = None
 
 
 class CrawlerActivityItem(BaseModel):
@@ -214,16 +275,42 @@ async def get_current_user_info(current_user: CurrentUserDep) -> UserInfo:
 
 @router.get('/admin/stats', response_model=DashboardStats, tags=["admin"])
 async def get_dashboard_stats(
+    request: Request,
     current_user: AdminUserDep,
     mongodb: Database = Depends(get_mongodb)
 ) -> DashboardStats:
     """
     Get dashboard statistics.
 
-    Requires admin role. Returns the total number of flights in the database.
+    Requires admin role. Returns the total number of flights in the database
+    and the position dedup counters of the live updater.
     """
     flight_count = mongodb.flights.count_documents({})
-    return DashboardStats(flight_count=flight_count)
+
+    position_dedup = None
+    if hasattr(request.app.state, 'updater') and request.app.state.updater:
+        dedup_stats = request.app.state.updater.get_position_dedup_stats()
+        if dedup_stats is not None:
+            position_dedup = PositionDedupStats(**dedup_stats)
+
+    return DashboardStats(flight_count=flight_count, position_dedup=position_dedup)
+
+
+@router.get('/admin/sse/stats', response_model=SSEStats, tags=["admin"])
+async def get_sse_stats(current_user: AdminUserDep) -> SSEStats:
+    """
+    Get SSE client statistics.
+
+    Requires admin role. Returns queue depth, lag and dropped frames per
+    connected client, most lagging clients first.
+    """
+    clients = sorted(sse_manager.get_client_stats(), key=lambda c: c["lag_seconds"], reverse=True)
+    return SSEStats(
+        client_count=len(clients),
+        slow_client_policy=sse_manager.slow_client_policy,
+        slow_client_disconnects=sse_manager.slow_client_disconnects,
+        clients=[SSEClientStats(**c) for c in clients]
+    )
 
 
 @router.get('/admin/aircraft/{icao24}', response_model=AircraftEditResponse, tags=["admin"])
@@ -326,7 +413,7 @@ async def get_crawler_stats(
     """
     Get crawler processing queue statistics.
 
-    Returns queue size, failure rates, and circuit breaker status for each source.
+    Returns queue size, failure rates, circuit breaker and rate limit status for each source.
     Used by the admin dashboard for monitoring crawler health.
     """
     crawler_enabled = config.UNKNOWN_AIRCRAFT_CRAWLING
@@ -341,6 +428,7 @@ async def get_crawler_stats(
 
     # Get circuit breaker stats and sources from the crawler if available
     circuit_breaker_stats = {}
+    rate_limiter_stats = {}
     sources = []
     if hasattr(request.app.state, 'crawler') and request.app.state.crawler:
         raw_cb_stats = request.app.state.crawler.get_circuit_breaker_stats()
@@ -354,10 +442,18 @@ async def get_crawler_stats(
                 current_backoff_seconds=stats["current_backoff_seconds"],
                 seconds_until_retry=stats["seconds_until_retry"]
             )
+        raw_rl_stats = request.app.state.crawler.get_rate_limit_stats()
+        rate_limiter_stats = {name: RateLimiterStats(**stats) for name, stats in raw_rl_stats.items()}
         # Get source enabled states
         raw_sources = request.app.state.crawler.get_sources_status()
         sources = [SourceStatusInline(**s) for s in raw_sources]
 
+    classification = None
+    if hasattr(request.app.state, 'updater') and request.app.state.updater:
+        classification_stats = request.app.state.updater.get_classification_stats()
+        if classification_stats is not None:
+            classification = ClassificationStats(**classification_stats)
+
     return CrawlerStats(
         enabled=crawler_enabled,
         queue_total=queue_stats["total_count"],
@@ -366,7 +462,9 @@ async def get_crawler_stats(
         service_error_failures=queue_stats["service_error_failures"],
         max_attempts_reached=queue_stats["max_attempts_reached"],
         circuit_breakers=circuit_breaker_stats,
-        sources=sources
+        rate_limiters=rate_limiter_stats,
+        sources=sources,
+        classification=classification
     )
 
 
@@ -1,6 +1,6 @@
-from fastapi import Request, Query, HTTPException, Depends
+from fastapi import Request, Query, HTTPException, Depends, WebSocket, WebSocketDisconnect, status
 from fastapi.responses import StreamingResponse
-from typing import List, Dict, Optional, Any, AsyncGenerator
+from typing import List, Dict, Optional, Any, AsyncGenerator, Set, Tuple
 from pydantic import BaseModel
 from pymongo.database import Database
 from bson import ObjectId
@@ -12,19 +12,29 @@ import uuid
 from .. import router
 from ..mappers import toFlightDto
 from ..models import FlightDto, PaginatedFlightsResponse, to_datestring
-from ...sse.manager import sse_manager, SSEClient
-from ...sse.notifier import SSENotifier
-from ..dependencies import MetaInfoDep, get_mongodb, MongoDBRepositoryDep, CurrentUserDep, AirlineServiceDep
+from ...sse.manager import sse_manager, SSEClient, RESYNC, CLOSED, positions_equal
+from ...sse.encoding import encode_event, encode_event_id
+from ...sse.bus import BusSubscriber
+from ...sse.compact import CompactSession, pack_positions, positions_frame
+from ...core.utils.spatial_index import BoundingBox
+from ..dependencies import MetaInfoDep, get_mongodb, MongoDBRepositoryDep, CurrentUserDep, AirlineServiceDep, \
+    WebSocketUserDep
 from ...scheduling import UPDATER_JOB_NAME
+from ...core.services.flight_updater_coordinator import STAGE_STARTING, STAGE_READY
 
 # Initialize logging
 logger = logging.getLogger(__name__)
 
-# Create SSE notifier
-sse_notifier = SSENotifier()
-
 # Constants
 MAX_FLIGHTS_LIMIT = 300
+MAX_FOLLOWED_FLIGHTS = 20  # Flights a single live socket can follow
+
+# Live stream encodings, see app/sse/compact.py for the compact format
+ENCODING_JSON = "json"
+ENCODING_COMPACT = "compact"
+
+# Encoded initial frames of the last live snapshot per encoding, shared by all connecting clients
+_initial_frames_cache = {}
 
 # Define response models
 
@@ -56,12 +66,36 @@ def alive():
 
 @router.get('/ready')
 def ready(request: Request):
+    live_bus = getattr(request.app.state, 'live_bus', None)
+    if isinstance(live_bus, BusSubscriber):
+        # API worker: ready once the ingest process streams to it
+        if live_bus.connected:
+            return "Yes"
+        raise HTTPException(status_code=500, detail="Service not ready")
+
+    updater = getattr(request.app.state, 'updater', None)
+    if updater is None or updater.startup_stage != STAGE_READY:
+        stage = updater.startup_stage if updater is not None else STAGE_STARTING
+        raise HTTPException(status_code=500, detail=f"Service not ready: {stage}")
+
     updater_job = request.app.state.apscheduler.get_job(UPDATER_JOB_NAME)
     if updater_job and not updater_job.pending:
         return "Yes"
     else:
         raise HTTPException(status_code=500, detail="Service not ready")
 
+@router.get('/startup')
+def startup_status(request: Request):
+    """Startup stage (starting, db_connected, cache_warmed, ready or failed) and warm start progress"""
+    live_bus = getattr(request.app.state, 'live_bus', None)
+    if isinstance(live_bus, BusSubscriber):
+        return {"stage": STAGE_READY if live_bus.connected else STAGE_STARTING}
+
+    updater = getattr(request.app.state, 'updater', None)
+    if updater is None:
+        return {"stage": STAGE_STARTING}
+    return updater.get_startup_status()
+
 
 @router.get('/flights', response_model=PaginatedFlightsResponse,
     summary="Get past flights",
@@ -183,91 +217,83 @@ async def get_flight(
         raise HTTPException(status_code=400, detail=f"Invalid flight ID format: {str(e)}")
 
 
+class ViewportRequest(BaseModel):
+    south: float
+    west: float
+    north: float
+    east: float
+
+
 @router.get('/live/stream')
-async def sse_all_positions(request: Request, current_user: CurrentUserDep):
-    """SSE endpoint for real-time flight data (positions, categories, callsigns)"""
+async def sse_all_positions(
+    request: Request,
+    current_user: CurrentUserDep,
+    bbox: Optional[str] = Query(None, description="Only stream flights inside 'south,west,north,east'"),
+    encoding: str = Query(ENCODING_JSON, description="Position frame encoding: 'json' or 'compact'")
+):
+    """
+    SSE endpoint for real-time flight data (positions, categories, callsigns).
+
+    The first event is 'session' with the client id, which can be used to
+    change the viewport without reconnecting. With encoding=compact position
+    frames carry packed quantized records instead of JSON objects. Clients
+    reconnecting with a recent Last-Event-ID only receive what they missed
+    instead of a full snapshot.
+    """
     client_id = str(uuid.uuid4())
     app = request.app
-    
-    async def event_stream() -> AsyncGenerator[str, None]:
+
+    try:
+        viewport = BoundingBox.parse(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid bbox: {str(e)}")
+    if encoding not in (ENCODING_JSON, ENCODING_COMPACT):
+        raise HTTPException(status_code=400, detail=f"Invalid encoding: {encoding}")
+    compact = CompactSession() if encoding == ENCODING_COMPACT else None
+    last_event_id = request.headers.get("last-event-id")
+
+    async def event_stream() -> AsyncGenerator[bytes, None]:
         # Create SSE client
-        queue = asyncio.Queue()
+        queue = sse_manager.create_queue(compact=compact)
         client = SSEClient(
             id=client_id,
             request=request,
             queue=queue,
-            type="positions"
+            type="positions",
+            bbox=viewport,
+            compact=compact
         )
         
-        # Add client to manager
+        # Add client to manager, updates are fanned out to all clients once per cycle
         sse_manager.add_client(client)
         
-        # Create a broadcast function for position updates
-        async def broadcast_positions(positions_dict):
-            """Function to broadcast positions to SSE clients"""
-            logger.debug(f"SSE callback triggered with {len(positions_dict)} positions")
-            await sse_manager.broadcast_positions(positions_dict)
-        
-        # Register the callback with the flight updater
-        registered_callback = app.state.updater.register_sse_callback(broadcast_positions)
-        
         try:
-            # Send initial positions immediately after connection
-            from ...core.models.position_report import PositionReport
-
-            cached_flights = app.state.updater.get_cached_flights()
-            initial_positions = {str(k): _format_position(v) for k, v in cached_flights.items()}
-
-            # Collect initial categories
-            initial_categories = {}
-            for flight_id, pos in cached_flights.items():
-                if pos.category is not None:
-                    category_num = PositionReport.CATEGORY_MAP.get(pos.category)
-                    if category_num is not None:
-                        initial_categories[str(flight_id)] = category_num
-
-            # Collect initial callsigns
-            initial_callsigns = {}
-            for flight_id, pos in cached_flights.items():
-                if pos.callsign is not None:
-                    initial_callsigns[str(flight_id)] = pos.callsign
-
-            # Send initial data
-            initial_message = {
-                "type": "initial",
-                "count": len(initial_positions),
-                "positions": initial_positions
-            }
-
-            yield f"event: positions\ndata: {json.dumps(initial_message)}\n\n"
-
-            # Send initial categories if any exist
-            if initial_categories:
-                categories_message = {
-                    "categories": initial_categories
-                }
-                yield f"event: categories\ndata: {json.dumps(categories_message)}\n\n"
-
-            # Send initial callsigns if any exist
-            if initial_callsigns:
-                callsigns_message = {
-                    "callsigns": initial_callsigns
-                }
-                yield f"event: callsigns\ndata: {json.dumps(callsigns_message)}\n\n"
+            yield encode_event("session", {"client_id": client_id})
+
+            # Send what a reconnecting client missed, or initial positions, categories and callsigns
+            frames = sse_manager.resume_frames(client, last_event_id)
+            if frames is None:
+                frames = _snapshot_frames(app, client)
+            for frame in frames:
+                yield frame
             
-            # Process messages from queue
+            # Process pre-encoded frames from queue
             while True:
                 try:
                     # Wait for messages with timeout to handle disconnections
-                    message = await asyncio.wait_for(queue.get(), timeout=30.0)
-                    event_type = message.get("event", "message")
-                    data = message.get("data", {})
-                    
-                    yield f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+                    frame = await asyncio.wait_for(queue.get(), timeout=30.0)
+                    if frame is CLOSED:
+                        break
+                    if frame is RESYNC:
+                        # Fell behind or changed viewport, pending deltas were replaced by the latest state
+                        for initial_frame in _snapshot_frames(app, client):
+                            yield initial_frame
+                        continue
+                    yield frame
                 except asyncio.TimeoutError:
                     # Send heartbeat to keep connection alive
                     timestamp = asyncio.get_event_loop().time()
-                    yield f"event: heartbeat\ndata: {{\"timestamp\": {timestamp}}}\n\n"
+                    yield encode_event("heartbeat", {"timestamp": timestamp})
                 except Exception as e:
                     logger.error(f"Error in SSE stream for client {client_id}: {str(e)}")
                     break
@@ -277,11 +303,6 @@ async def sse_all_positions(request: Request, current_user: CurrentUserDep):
         finally:
             # Clean up
             sse_manager.remove_client(client_id)
-            try:
-                app.state.updater.unregister_sse_callback(registered_callback)
-                logger.info("SSE broadcast callback unregistered")
-            except Exception as e:
-                logger.error(f"Error unregistering SSE callback: {str(e)}")
     
     return StreamingResponse(
         event_stream(),
@@ -295,6 +316,249 @@ async def sse_all_positions(request: Request, current_user: CurrentUserDep):
     )
 
 
+@router.put('/live/stream/{client_id}/viewport')
+async def update_viewport(client_id: str, current_user: CurrentUserDep, viewport: Optional[ViewportRequest] = None):
+    """Change the viewport of a live stream, an empty body streams all flights again.
+    Only streams held by this worker are found, multi-worker deployments use /live/ws or sticky routing"""
+    try:
+        bbox = BoundingBox.of(viewport.south, viewport.west, viewport.north, viewport.east) if viewport else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid viewport: {str(e)}")
+
+    if not sse_manager.set_viewport(client_id, bbox):
+        raise HTTPException(status_code=404, detail="Live stream not found")
+    return {"client_id": client_id}
+
+
+class _LiveSocketSession:
+    """
+    Subscriptions of one live WebSocket. Its position client and one flight
+    client per followed flight share the connection's queue, so the hub's
+    frames arrive in order on a single connection.
+    """
+
+    def __init__(self, websocket: WebSocket, compact: bool):
+        self.id = str(uuid.uuid4())
+        self._websocket = websocket
+        self._app = websocket.app
+        self._compact = CompactSession() if compact else None
+        self.queue = sse_manager.create_queue(compact=self._compact)
+        self._positions: Optional[SSEClient] = None
+        self._followed: Dict[str, SSEClient] = {}
+
+    def _new_client(self, client_id: str, client_type: str, **kwargs) -> SSEClient:
+        return SSEClient(id=client_id, request=self._websocket, queue=self.queue, type=client_type, **kwargs)
+
+    async def subscribe(self, message: Dict[str, Any]):
+        """Apply a subscribe message, settings left out of it are kept. Raises ValueError for invalid ones."""
+        positions = bool(message.get("positions", self._positions is not None))
+        bbox = self._positions.bbox if self._positions else None
+        military_only = self._positions.military_only if self._positions else False
+        if "bbox" in message:
+            bbox = BoundingBox.of(*message["bbox"]) if message["bbox"] else None
+        if "military" in message:
+            military_only = bool(message["military"])
+        follow = None
+        if "follow" in message:
+            follow = {str(flight_id) for flight_id in message["follow"] or []}
+            if len(follow) > MAX_FOLLOWED_FLIGHTS:
+                raise ValueError(f"At most {MAX_FOLLOWED_FLIGHTS} flights can be followed")
+            if not all(ObjectId.is_valid(flight_id) for flight_id in follow):
+                raise ValueError("Invalid flight id")
+
+        self._subscribe_positions(positions, bbox, military_only)
+        if follow is not None:
+            await self._follow(follow)
+
+    def _subscribe_positions(self, positions: bool, bbox: Optional[BoundingBox], military_only: bool):
+        if not positions:
+            if self._positions is not None:
+                sse_manager.remove_client(self._positions.id, close_queue=False)
+                self._positions = None
+            return
+
+        if self._positions is None:
+            self._positions = self._new_client(self.id, "positions", bbox=bbox, military_only=military_only,
+                                               compact=self._compact)
+            sse_manager.add_client(self._positions)
+        elif (self._positions.bbox, self._positions.military_only) == (bbox, military_only):
+            return
+        else:
+            self._positions.bbox = bbox
+            self._positions.military_only = military_only
+        # The sender replaces whatever is pending with a snapshot of the new view
+        self.queue.request_resync()
+
+    async def _follow(self, flight_ids: Set[str]):
+        for flight_id in set(self._followed) - flight_ids:
+            sse_manager.remove_client(self._followed.pop(flight_id).id, close_queue=False)
+
+        for flight_id in flight_ids - set(self._followed):
+            initial_frame, last_position = await _flight_history_frame(self._app, flight_id)
+            client = self._new_client(f"{self.id}/{flight_id}", "flight", flight_id=flight_id,
+                                      last_position=last_position)
+            # Live updates are queued after the history
+            sse_manager.add_client(client)
+            self._followed[flight_id] = client
+            self.queue.put_nowait(initial_frame)
+
+    def _resync_frames(self) -> List[bytes]:
+        """Snapshot of the position view and the latest position of every followed flight"""
+        frames = _snapshot_frames(self._app, self._positions) if self._positions is not None else []
+        cached_flights = self._app.state.updater.get_cached_flights()
+        for flight_id, client in self._followed.items():
+            current_position = cached_flights.get(flight_id)
+            if current_position is not None:
+                client.last_position = _format_position(current_position)
+                frames.append(encode_event("flight_position", {
+                    "type": "update",
+                    "flight_id": flight_id,
+                    **client.last_position
+                }))
+        return frames
+
+    async def send_frames(self):
+        """Write queued frames as binary messages until the queue is closed"""
+        try:
+            while True:
+                frame = await self.queue.get()
+                if frame is CLOSED:
+                    break
+                for message in (self._resync_frames() if frame is RESYNC else (frame,)):
+                    await self._websocket.send_bytes(message)
+            # Dropped as a slow client, it reconnects and gets a snapshot
+            await self._websocket.close()
+        except Exception as e:
+            logger.debug(f"Live socket {self.id} stopped sending: {str(e)}")
+
+    def close(self):
+        if self._positions is not None:
+            sse_manager.remove_client(self._positions.id)
+        for client in self._followed.values():
+            sse_manager.remove_client(client.id)
+        self.queue.close()
+
+
+@router.websocket('/live/ws')
+async def live_socket(websocket: WebSocket, current_user: WebSocketUserDep, encoding: str = ENCODING_JSON):
+    """
+    WebSocket carrying live positions and followed flights on one connection.
+
+    Server messages are binary and contain the events of /live/stream and
+    /flights/{id}/positions/stream in SSE wire format, encoded once by the hub
+    for both transports; the first one is 'session'. The client changes what
+    it receives by sending text messages such as
+    {"type": "subscribe", "positions": true, "bbox": [south, west, north, east],
+    "military": false, "follow": [flight ids]}, settings left out are kept.
+    Nothing is sent before the first subscribe message. Messages are compressed
+    when the client supports permessage-deflate.
+    """
+    if current_user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    if encoding not in (ENCODING_JSON, ENCODING_COMPACT):
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA)
+        return
+
+    await websocket.accept()
+    session = _LiveSocketSession(websocket, encoding == ENCODING_COMPACT)
+    await websocket.send_bytes(encode_event("session", {"client_id": session.id}))
+    sender = asyncio.create_task(session.send_frames())
+
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+                if not isinstance(message, dict) or message.get("type") != "subscribe":
+                    raise ValueError("Expected a subscribe message")
+                await session.subscribe(message)
+            except (ValueError, TypeError, KeyError) as e:
+                session.queue.put_nowait(encode_event("error", {"detail": str(e)}))
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        sender.cancel()
+        session.close()
+
+
+def _snapshot_frames(app, client: SSEClient) -> List[bytes]:
+    """Initial frames for a position client, matching its viewport, filter and encoding"""
+    encoding = ENCODING_COMPACT if client.compact is not None else ENCODING_JSON
+    if client.bbox is None and not client.military_only:
+        cached_flights = app.state.updater.get_cached_flights()
+        frames = _initial_frames(cached_flights, encoding)
+    else:
+        if client.bbox is None:
+            cached_flights = app.state.updater.get_cached_flights()
+        else:
+            cached_flights = app.state.updater.get_cached_flights_in(client.bbox)
+        if client.military_only:
+            cached_flights = {flight_id: pos for flight_id, pos in cached_flights.items()
+                              if sse_manager.is_military_icao(pos.icao24)}
+        frames = _encode_initial_frames(cached_flights, encoding)
+    if client.compact is not None:
+        # The snapshot announces all of its flights
+        client.compact.reset(cached_flights)
+    # Broadcasts are published after the snapshot is refreshed, so it contains everything up to this ID
+    return frames + [encode_event_id(sse_manager.last_event_id)]
+
+
+def _initial_frames(cached_flights, encoding: str = ENCODING_JSON) -> List[bytes]:
+    """
+    Initial frames for the full snapshot. The snapshot is replaced rather than
+    mutated, so frames are encoded once per snapshot and reused by every client
+    connecting until the next update.
+    """
+    cached_snapshot, cached_frames = _initial_frames_cache.get(encoding, (None, []))
+    if cached_snapshot is cached_flights:
+        return cached_frames
+
+    frames = _encode_initial_frames(cached_flights, encoding)
+    _initial_frames_cache[encoding] = (cached_flights, frames)
+    return frames
+
+
+def _encode_initial_frames(cached_flights, encoding: str = ENCODING_JSON) -> List[bytes]:
+    """Encode the initial positions, categories and callsigns frames for a set of flights"""
+    from ...core.models.position_report import PositionReport
+
+    initial_positions = {str(k): _format_position(v) for k, v in cached_flights.items()}
+
+    # Collect initial categories
+    initial_categories = {}
+    for flight_id, pos in cached_flights.items():
+        if pos.category is not None:
+            category_num = PositionReport.CATEGORY_MAP.get(pos.category)
+            if category_num is not None:
+                initial_categories[str(flight_id)] = category_num
+
+    # Collect initial callsigns
+    initial_callsigns = {}
+    for flight_id, pos in cached_flights.items():
+        if pos.callsign is not None:
+            initial_callsigns[str(flight_id)] = pos.callsign
+
+    if encoding == ENCODING_COMPACT:
+        # A fresh session has seen no flights, so every one of them is announced
+        payload, flights = pack_positions(initial_positions)
+        announcements = {str(index): [flight_id, icao] for index, flight_id, icao in flights}
+        frames = [positions_frame("initial", payload, len(flights), announcements)]
+    else:
+        frames = [encode_event("positions", {
+            "type": "initial",
+            "count": len(initial_positions),
+            "positions": initial_positions
+        })]
+
+    # Send initial categories and callsigns if any exist
+    if initial_categories:
+        frames.append(encode_event("categories", {"categories": initial_categories}))
+    if initial_callsigns:
+        frames.append(encode_event("callsigns", {"callsigns": initial_callsigns}))
+
+    return frames
+
+
 def _format_position(position_data, include_gs: bool = True) -> dict:
     """Helper to format a position dict with consistent structure"""
     from ...core.models.position_report import PositionReport
@@ -327,12 +591,32 @@ def _format_position(position_data, include_gs: bool = True) -> dict:
     return formatted
 
 
-def _positions_equal(pos1: dict, pos2: dict) -> bool:
-    """Check if two positions are equal"""
-    return (pos1["lat"] == pos2["lat"] and
-            pos1["lon"] == pos2["lon"] and
-            pos1["alt"] == pos2["alt"] and
-            pos1.get("gs") == pos2.get("gs"))
+async def _flight_history_frame(app, flight_id: str) -> Tuple[bytes, Optional[Dict[str, Any]]]:
+    """Initial flight_position frame with the stored track and current position, and that last position"""
+    # Fetch historical positions from database
+    positions = await _fetch_flight_positions(app.state.mongodb, flight_id)
+    all_positions = [_format_position(pos) for pos in positions]
+
+    # Add current in-memory position if available and different from last DB position
+    cached_flights = app.state.updater.get_cached_flights()
+    current_position = cached_flights.get(flight_id)
+
+    if current_position:
+        current_pos_data = _format_position(current_position)
+
+        if not all_positions or not positions_equal(all_positions[-1], current_pos_data):
+            all_positions.append(current_pos_data)
+
+        last_position = current_pos_data
+    else:
+        last_position = all_positions[-1] if all_positions else None
+
+    frame = encode_event("flight_position", {
+        'type': 'initial',
+        'count': len(all_positions),
+        'positions': {flight_id: all_positions} if all_positions else {}
+    })
+    return frame, last_position
 
 
 async def _fetch_flight_positions(mongodb, flight_id: str) -> list:
@@ -367,9 +651,10 @@ async def sse_flight_positions(request: Request, flight_id: str, current_user: C
         logger.error(f"Error checking flight {flight_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Server error")
     
-    async def event_stream() -> AsyncGenerator[str, None]:
+    async def event_stream() -> AsyncGenerator[bytes, None]:
         client_id = str(uuid.uuid4())
-        queue = asyncio.Queue()
+        # History is only sent once, so this stream cannot resync from a snapshot
+        queue = sse_manager.create_queue(resync_supported=False)
         client = SSEClient(
             id=client_id,
             request=request,
@@ -379,73 +664,29 @@ async def sse_flight_positions(request: Request, flight_id: str, current_user: C
         )
 
         sse_manager.add_client(client)
-        registered_callback = None
-        last_position = None
 
         try:
-            # Fetch historical positions from database
-            positions = await _fetch_flight_positions(mongodb, flight_id)
-            all_positions = [_format_position(pos) for pos in positions]
-
-            # Add current in-memory position if available and different from last DB position
-            cached_flights = app.state.updater.get_cached_flights()
-            current_position = cached_flights.get(flight_id)
-
-            if current_position:
-                current_pos_data = _format_position(current_position)
-
-                if not all_positions or not _positions_equal(all_positions[-1], current_pos_data):
-                    all_positions.append(current_pos_data)
+            initial_frame, last_position = await _flight_history_frame(app, flight_id)
 
-                last_position = current_pos_data
-            else:
-                last_position = all_positions[-1] if all_positions else None
+            # Live updates equal to the last sent position are skipped by the manager
+            if client.last_position is None:
+                client.last_position = last_position
 
             # Send initial message with all positions
-            initial_data = json.dumps({
-                'type': 'initial',
-                'count': len(all_positions),
-                'positions': {flight_id: all_positions} if all_positions else {}
-            })
-            yield f"event: flight_position\ndata: {initial_data}\n\n"
-            
-            # Callback for live position updates
-            async def send_flight_position_updates(positions_dict):
-                """Send position updates when flight position changes"""
-                nonlocal last_position
-
-                if flight_id not in positions_dict:
-                    return
-
-                new_position = positions_dict[flight_id]
-
-                if last_position is None:
-                    last_position = new_position
-                    await sse_manager.send_flight_position(flight_id, new_position)
-                    return
-
-                if not _positions_equal(last_position, new_position):
-                    last_position = new_position
-                    await sse_manager.send_flight_position(flight_id, new_position)
-            
-            # Register the callback with the flight updater
-            registered_callback = app.state.updater.register_sse_callback(send_flight_position_updates)
+            yield initial_frame
 
-            logger.info(f"SSE callback registered for flight {flight_id}")
-
-            # Process messages from queue
+            # Process pre-encoded frames from queue
             while True:
                 try:
                     # Wait for messages with timeout to handle disconnections
-                    message = await asyncio.wait_for(queue.get(), timeout=30.0)
-                    event_type = message.get("event", "message")
-                    data = message.get("data", {})
-
-                    yield f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+                    frame = await asyncio.wait_for(queue.get(), timeout=30.0)
+                    if frame is CLOSED:
+                        break
+                    yield frame
                 except asyncio.TimeoutError:
                     # Send heartbeat to keep connection alive
                     timestamp = asyncio.get_event_loop().time()
-                    yield f"event: heartbeat\ndata: {{\"timestamp\": {timestamp}}}\n\n"
+                    yield encode_event("heartbeat", {"timestamp": timestamp})
                 except Exception as e:
                     logger.error(f"Error in SSE flight stream for client {client_id}: {str(e)}")
                     break
@@ -455,12 +696,6 @@ async def sse_flight_positions(request: Request, flight_id: str, current_user: C
         finally:
             # Clean up
             sse_manager.remove_client(client_id)
-            if registered_callback:
-                try:
-                    app.state.updater.unregister_sse_callback(registered_callback)
-                    logger.info(f"SSE callback for flight {flight_id} unregistered")
-                except Exception as e:
-                    logger.error(f"Error unregistering SSE flight callback: {str(e)}")
     
     return StreamingResponse(
         event_stream(),
@@ -540,13 +775,18 @@ def get_all_positions(
     cached_flights = request.app.state.updater.get_cached_flights()
     positions = {}
 
-    for icao24, flight_data in cached_flights.items():
-        if filter == 'mil' and not request.app.state.modes_util.is_military(icao24):
+    military = None
+    if filter == 'mil':
+        military = request.app.state.modes_util.military_subset(
+            pos.icao24 for pos in cached_flights.values() if pos.icao24)
+
+    for flight_id, flight_data in cached_flights.items():
+        if military is not None and flight_data.icao24 not in military:
             continue
 
         if hasattr(flight_data, 'lat') and hasattr(flight_data, 'lon'):
             pos = _format_position(flight_data, include_gs=False)
-            positions[icao24] = [[pos["lat"], pos["lon"], pos["alt"]]]
+            positions[flight_id] = [[pos["lat"], pos["lon"], pos["alt"]]]
 
     return positions
 
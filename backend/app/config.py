@@ -66,6 +66,26 @@ class Config:
 
     # gRPC configuration (used when RADAR_SERVICE_TYPE = 'grpc')
     GRPC_SERVER_ADDRESS = 'localhost:50051'
+    GRPC_STREAMING = False  # Consume StreamUpdates deltas instead of polling GetAllPlanes
+    GRPC_STREAM_INTERVAL_MS = 500  # Per-aircraft update interval and ingest cycle period when streaming
+
+    # Position dedup configuration
+    POSITION_DEDUP_HISTORY = 8  # Recently stored positions remembered per flight
+    POSITION_DEDUP_MAX_ENTRIES = 200000  # Memory budget in retained positions across all flights
+    POSITION_WRITE_BUFFER_SIZE = 50000  # Positions buffered for the writer thread before backpressure
+
+    # SSE configuration
+    SSE_CLIENT_QUEUE_SIZE = 100  # Pending frames per SSE client
+    SSE_SLOW_CLIENT_POLICY = 'coalesce'  # drop_oldest, coalesce or disconnect when a client queue is full
+    SSE_RESUME_HISTORY = 60  # Recent broadcasts kept for clients reconnecting with Last-Event-ID
+
+    # Live bus for running ingest and API workers in separate processes (disabled if not set)
+    LIVE_BUS_MODE = None  # 'publisher' in the ingest process, 'subscriber' in API workers
+    LIVE_BUS_SOCKET = '/tmp/flightradar-live.sock'
+
+    # Live state checkpoint restored at boot, only the gap since is loaded from MongoDB
+    LIVE_STATE_CHECKPOINT_FILE = '/tmp/flightradar-live-state.bin'
+    LIVE_STATE_CHECKPOINT_INTERVAL_SEC = 30  # 0 disables checkpointing
 
     # Nighthawk proxy URL for aircraft metadata lookups (disabled if not set)
     NIGHTHAWK_PROXY_URL = None
@@ -79,6 +99,13 @@ class Config:
     CRAWLER_RUN_INTERVAL_SEC = 20  # Seconds between crawler runs
     CRAWLER_CIRCUIT_BREAKER_THRESHOLD = 5  # Consecutive failures before circuit opens
     CRAWLER_CIRCUIT_BREAKER_RESET_SEC = 300  # Seconds before circuit breaker resets (5 min)
+    CRAWLER_CONCURRENCY = 8  # Aircraft crawled in parallel
+    CRAWLER_SOURCE_CONCURRENCY = 2  # Parallel requests per metadata source
+    CRAWLER_HEDGE_SOURCES = 2  # Sources queried at once for an aircraft, 1 queries them one after another
+    CRAWLER_HEDGE_DELAY_MS = 500  # Wait for a source before also asking the next one, 0 asks them all at once
+    CRAWLER_SOURCE_RATE = 2.0  # Initial requests per second per metadata source, adapts to how the source copes
+    CRAWLER_SOURCE_MAX_RATE = 20.0  # Upper bound of the adaptive request rate per source
+    CRAWLER_SOURCE_LATENCY_TARGET_MS = 2000  # Slower answers lower the request rate of a source
 
     # JWT Authentication configuration
     JWT_SECRET = None  # Required - must be set via environment variable
@@ -124,6 +151,18 @@ class Config:
         ENV_MONGODB_URI = 'MONGODB_URI'
         ENV_MONGODB_DB_NAME = 'MONGODB_DB_NAME'
         ENV_GRPC_SERVER_ADDRESS = 'GRPC_SERVER_ADDRESS'
+        ENV_GRPC_STREAMING = 'GRPC_STREAMING'
+        ENV_GRPC_STREAM_INTERVAL_MS = 'GRPC_STREAM_INTERVAL_MS'
+        ENV_POSITION_DEDUP_HISTORY = 'POSITION_DEDUP_HISTORY'
+        ENV_POSITION_DEDUP_MAX_ENTRIES = 'POSITION_DEDUP_MAX_ENTRIES'
+        ENV_POSITION_WRITE_BUFFER_SIZE = 'POSITION_WRITE_BUFFER_SIZE'
+        ENV_SSE_CLIENT_QUEUE_SIZE = 'SSE_CLIENT_QUEUE_SIZE'
+        ENV_SSE_SLOW_CLIENT_POLICY = 'SSE_SLOW_CLIENT_POLICY'
+        ENV_SSE_RESUME_HISTORY = 'SSE_RESUME_HISTORY'
+        ENV_LIVE_BUS_MODE = 'LIVE_BUS_MODE'
+        ENV_LIVE_BUS_SOCKET = 'LIVE_BUS_SOCKET'
+        ENV_LIVE_STATE_CHECKPOINT_FILE = 'LIVE_STATE_CHECKPOINT_FILE'
+        ENV_LIVE_STATE_CHECKPOINT_INTERVAL_SEC = 'LIVE_STATE_CHECKPOINT_INTERVAL_SEC'
         ENV_JWT_SECRET = 'JWT_SECRET'
         ENV_JWT_ACCESS_TOKEN_EXPIRE_MINUTES = 'JWT_ACCESS_TOKEN_EXPIRE_MINUTES'
         ENV_CLIENT_SECRET = 'CLIENT_SECRET'
@@ -138,6 +177,13 @@ class Config:
         ENV_CRAWLER_RUN_INTERVAL_SEC = 'CRAWLER_RUN_INTERVAL_SEC'
         ENV_CRAWLER_CIRCUIT_BREAKER_THRESHOLD = 'CRAWLER_CIRCUIT_BREAKER_THRESHOLD'
         ENV_CRAWLER_CIRCUIT_BREAKER_RESET_SEC = 'CRAWLER_CIRCUIT_BREAKER_RESET_SEC'
+        ENV_CRAWLER_CONCURRENCY = 'CRAWLER_CONCURRENCY'
+        ENV_CRAWLER_SOURCE_CONCURRENCY = 'CRAWLER_SOURCE_CONCURRENCY'
+        ENV_CRAWLER_HEDGE_SOURCES = 'CRAWLER_HEDGE_SOURCES'
+        ENV_CRAWLER_HEDGE_DELAY_MS = 'CRAWLER_HEDGE_DELAY_MS'
+        ENV_CRAWLER_SOURCE_RATE = 'CRAWLER_SOURCE_RATE'
+        ENV_CRAWLER_SOURCE_MAX_RATE = 'CRAWLER_SOURCE_MAX_RATE'
+        ENV_CRAWLER_SOURCE_LATENCY_TARGET_MS = 'CRAWLER_SOURCE_LATENCY_TARGET_MS'
 
         if os.environ.get(ENV_DATA_FOLDER):
             self.DATA_FOLDER = os.environ.get(ENV_DATA_FOLDER)
@@ -166,6 +212,51 @@ class Config:
             self.MONGODB_DB_NAME = os.environ.get(ENV_MONGODB_DB_NAME)
         if os.environ.get(ENV_GRPC_SERVER_ADDRESS):
             self.GRPC_SERVER_ADDRESS = os.environ.get(ENV_GRPC_SERVER_ADDRESS)
+        if os.environ.get(ENV_GRPC_STREAMING):
+            self.GRPC_STREAMING = self.str2bool(os.environ.get(ENV_GRPC_STREAMING))
+        if os.environ.get(ENV_GRPC_STREAM_INTERVAL_MS):
+            try:
+                self.GRPC_STREAM_INTERVAL_MS = int(os.environ.get(ENV_GRPC_STREAM_INTERVAL_MS))
+            except ValueError:
+                pass
+        if os.environ.get(ENV_POSITION_DEDUP_HISTORY):
+            try:
+                self.POSITION_DEDUP_HISTORY = int(os.environ.get(ENV_POSITION_DEDUP_HISTORY))
+            except ValueError:
+                pass
+        if os.environ.get(ENV_POSITION_DEDUP_MAX_ENTRIES):
+            try:
+                self.POSITION_DEDUP_MAX_ENTRIES = int(os.environ.get(ENV_POSITION_DEDUP_MAX_ENTRIES))
+            except ValueError:
+                pass
+        if os.environ.get(ENV_POSITION_WRITE_BUFFER_SIZE):
+            try:
+                self.POSITION_WRITE_BUFFER_SIZE = int(os.environ.get(ENV_POSITION_WRITE_BUFFER_SIZE))
+            except ValueError:
+                pass
+        if os.environ.get(ENV_SSE_CLIENT_QUEUE_SIZE):
+            try:
+                self.SSE_CLIENT_QUEUE_SIZE = int(os.environ.get(ENV_SSE_CLIENT_QUEUE_SIZE))
+            except ValueError:
+                pass
+        if os.environ.get(ENV_SSE_SLOW_CLIENT_POLICY):
+            self.SSE_SLOW_CLIENT_POLICY = os.environ.get(ENV_SSE_SLOW_CLIENT_POLICY).strip().lower()
+        if os.environ.get(ENV_SSE_RESUME_HISTORY):
+            try:
+                self.SSE_RESUME_HISTORY = int(os.environ.get(ENV_SSE_RESUME_HISTORY))
+            except ValueError:
+                pass
+        if os.environ.get(ENV_LIVE_BUS_MODE):
+            self.LIVE_BUS_MODE = os.environ.get(ENV_LIVE_BUS_MODE).strip().lower()
+        if os.environ.get(ENV_LIVE_BUS_SOCKET):
+            self.LIVE_BUS_SOCKET = os.environ.get(ENV_LIVE_BUS_SOCKET)
+        if os.environ.get(ENV_LIVE_STATE_CHECKPOINT_FILE):
+            self.LIVE_STATE_CHECKPOINT_FILE = os.environ.get(ENV_LIVE_STATE_CHECKPOINT_FILE)
+        if os.environ.get(ENV_LIVE_STATE_CHECKPOINT_INTERVAL_SEC):
+            try:
+                self.LIVE_STATE_CHECKPOINT_INTERVAL_SEC = int(os.environ.get(ENV_LIVE_STATE_CHECKPOINT_INTERVAL_SEC))
+            except ValueError:
+                pass
         if os.environ.get(ENV_JWT_SECRET):
             self.JWT_SECRET = os.environ.get(ENV_JWT_SECRET)
         if os.environ.get(ENV_JWT_ACCESS_TOKEN_EXPIRE_MINUTES):
@@ -226,6 +317,41 @@ class Config:
                 self.CRAWLER_CIRCUIT_BREAKER_RESET_SEC = int(os.environ.get(ENV_CRAWLER_CIRCUIT_BREAKER_RESET_SEC))
             except ValueError:
                 pass
+        if os.environ.get(ENV_CRAWLER_CONCURRENCY):
+            try:
+                self.CRAWLER_CONCURRENCY = int(os.environ.get(ENV_CRAWLER_CONCURRENCY))
+            except ValueError:
+                pass
+        if os.environ.get(ENV_CRAWLER_SOURCE_CONCURRENCY):
+            try:
+                self.CRAWLER_SOURCE_CONCURRENCY = int(os.environ.get(ENV_CRAWLER_SOURCE_CONCURRENCY))
+            except ValueError:
+                pass
+        if os.environ.get(ENV_CRAWLER_HEDGE_SOURCES):
+            try:
+                self.CRAWLER_HEDGE_SOURCES = int(os.environ.get(ENV_CRAWLER_HEDGE_SOURCES))
+            except ValueError:
+                pass
+        if os.environ.get(ENV_CRAWLER_HEDGE_DELAY_MS):
+            try:
+                self.CRAWLER_HEDGE_DELAY_MS = int(os.environ.get(ENV_CRAWLER_HEDGE_DELAY_MS))
+            except ValueError:
+                pass
+        if os.environ.get(ENV_CRAWLER_SOURCE_RATE):
+            try:
+                self.CRAWLER_SOURCE_RATE = float(os.environ.get(ENV_CRAWLER_SOURCE_RATE))
+            except ValueError:
+                pass
+        if os.environ.get(ENV_CRAWLER_SOURCE_MAX_RATE):
+            try:
+                self.CRAWLER_SOURCE_MAX_RATE = float(os.environ.get(ENV_CRAWLER_SOURCE_MAX_RATE))
+            except ValueError:
+                pass
+        if os.environ.get(ENV_CRAWLER_SOURCE_LATENCY_TARGET_MS):
+            try:
+                self.CRAWLER_SOURCE_LATENCY_TARGET_MS = int(os.environ.get(ENV_CRAWLER_SOURCE_LATENCY_TARGET_MS))
+            except ValueError:
+                pass
 
         self.config_src = ConfigSource.ENV
 
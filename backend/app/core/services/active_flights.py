@@ -0,0 +1,119 @@
+import logging
+import time
+from typing import Dict, Iterable, Set
+
+from ..models.position_report import PositionReport
+from ..utils.spatial_index import BoundingBox, GridIndex
+from .live_state import LiveStateTable
+
+logger = logging.getLogger('ActiveFlightsView')
+
+
+class ActiveFlightsView:
+    """
+    Incrementally maintained view of all flights with a recent position.
+
+    The updater refreshes the view once per ingest cycle with the slots that
+    changed; every reader gets the same published snapshot dict, which is
+    replaced rather than mutated. Slots are kept in time buckets by last contact
+    so expiry only visits the buckets that fell out of the window, and flights
+    in a grid index so viewport queries only visit the cells they overlap.
+    """
+
+    def __init__(self, live_state: LiveStateTable, max_age_sec: float = 60, bucket_sec: float = 5):
+        self._live_state = live_state
+        self._max_age_sec = max_age_sec
+        self._bucket_sec = bucket_sec
+
+        self._snapshot: Dict[str, PositionReport] = {}
+        self._flight_of_slot: Dict[int, str] = {}
+        self._bucket_of_slot: Dict[int, int] = {}
+        self._buckets: Dict[int, Set[int]] = {}
+        self._oldest_bucket = None
+        self._grid = GridIndex()
+        self.removed_flight_ids: Set[str] = set()  # Flights that left the view in the last refresh
+
+    @property
+    def snapshot(self) -> Dict[str, PositionReport]:
+        """Published flight_id -> PositionReport map, must be treated as read-only"""
+        return self._snapshot
+
+    def in_bbox(self, bbox: BoundingBox) -> Dict[str, PositionReport]:
+        """Flights of the published snapshot inside a bounding box"""
+        snapshot = self._snapshot
+        return {flight_id: snapshot[flight_id] for flight_id in self._grid.query(bbox) if flight_id in snapshot}
+
+    def _bucket(self, timestamp: float) -> int:
+        return int(timestamp // self._bucket_sec)
+
+    def _place(self, slot: int, bucket: int):
+        current = self._bucket_of_slot.get(slot)
+        if current == bucket:
+            return
+        if current is not None:
+            self._buckets[current].discard(slot)
+        self._buckets.setdefault(bucket, set()).add(slot)
+        self._bucket_of_slot[slot] = bucket
+        if self._oldest_bucket is None or bucket < self._oldest_bucket:
+            self._oldest_bucket = bucket
+
+    def _remove(self, slot: int, snapshot: Dict[str, PositionReport]):
+        flight_id = self._flight_of_slot.pop(slot, None)
+        if flight_id is not None and snapshot.pop(flight_id, None) is not None:
+            self.removed_flight_ids.add(flight_id)
+            self._grid.remove(flight_id)
+        bucket = self._bucket_of_slot.pop(slot, None)
+        if bucket is not None:
+            self._buckets[bucket].discard(slot)
+
+    def refresh(self, changed_slots: Iterable[int], now: float = None):
+        """Apply the slots changed in this cycle and expire flights without recent contact"""
+        now = now if now is not None else time.time()
+        live_state = self._live_state
+        snapshot = None
+        self.removed_flight_ids = set()
+
+        for slot in changed_slots:
+            if snapshot is None:
+                snapshot = dict(self._snapshot)
+            flight_id = live_state.flight_id[slot]
+            if flight_id is None or not live_state.has_position[slot]:
+                self._remove(slot, snapshot)
+                continue
+
+            previous = self._flight_of_slot.get(slot)
+            if previous is not None and previous != flight_id:
+                snapshot.pop(previous, None)
+                self.removed_flight_ids.add(previous)
+                self._grid.remove(previous)
+            self._flight_of_slot[slot] = flight_id
+            position = snapshot[flight_id] = live_state.position_of(slot)
+            self._grid.update(flight_id, position.lat, position.lon)
+            self._place(slot, self._bucket(live_state.last_contact[slot]))
+
+        # Expire buckets that fell out of the window. Slots contacted since they
+        # were bucketed (e.g. a flight update without a new position) move forward.
+        cutoff = now - self._max_age_sec
+        cutoff_bucket = self._bucket(cutoff)
+        while self._oldest_bucket is not None and self._oldest_bucket <= cutoff_bucket:
+            bucket = self._oldest_bucket
+            for slot in list(self._buckets.get(bucket, ())):
+                flight_id = self._flight_of_slot.get(slot)
+                if (live_state.flight_id[slot] == flight_id and live_state.has_position[slot]
+                        and live_state.last_contact[slot] > cutoff):
+                    self._place(slot, self._bucket(live_state.last_contact[slot]))
+                    continue
+                if snapshot is None:
+                    snapshot = dict(self._snapshot)
+                self._remove(slot, snapshot)
+
+            if not self._buckets.get(bucket):
+                self._buckets.pop(bucket, None)
+                self._oldest_bucket = min(self._buckets) if self._buckets else None
+            else:
+                # Only slots still inside the window remain, which cannot happen for
+                # the oldest bucket unless it equals the cutoff bucket
+                break
+
+        if snapshot is not None:
+            self._snapshot = snapshot
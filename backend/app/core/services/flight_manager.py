@@ -1,24 +1,26 @@
 import logging
-from typing import List
+import time
+from typing import Callable, Dict, Iterable, List, Optional
 from datetime import datetime, timedelta, timezone
 
 from ..utils.modes_util import ModesUtil
-from ..utils.time_util import make_datetimes_comparable
+from ..utils.time_util import make_datetimes_comparable, to_epoch_seconds
 from ..utils.callsign_util import extract_airline_icao
 from ..models.position_report import PositionReport
 from ..constants import MINUTES_BEFORE_CONSIDERED_NEW_FLIGHT
+from .live_state import LiveStateTable
 
 logger = logging.getLogger('FlightManager')
 
 class FlightManager:
     BATCH_SIZE = 200
+    WARM_START_PROGRESS_INTERVAL = 5000  # Flights read between warm start progress reports
 
-    def __init__(self, config):
+    def __init__(self, config, live_state: LiveStateTable = None):
         self.mil_ranges = ModesUtil(config.DATA_FOLDER)
         self.mil_only = config.MILTARY_ONLY
-        self._flight_callsign_cache = {}
-        self.modeS_flightid_map = dict()
-        self.flight_last_contact = dict()
+        # Current flight, last contact and flight callsign per aircraft
+        self.live_state = live_state if live_state is not None else LiveStateTable()
         self._use_ttl_indexes = True
         self._retention_minutes = config.DB_RETENTION_MIN
         
@@ -27,55 +29,57 @@ class FlightManager:
             self._use_ttl_indexes = False
             logger.info("Document expiration disabled: no retention period specified")
 
-    def initialize(self, repository):
-        """Initializes cache from database with optimized loading"""
+    def initialize(self, repository, since: Optional[float] = None,
+                   progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, PositionReport]:
+        """
+        Warms the live state from the database in a single streamed query over recent
+        flights. With since (POSIX seconds), e.g. after restoring a checkpoint, only
+        flights contacted after it are loaded. Returns the last position of each
+        loaded flight for the position manager. progress is called with the number of
+        flights read and loaded so far.
+        """
         self.repository = repository
         recent_flight_timestamp = self._threshold_timestamp()
+        if since is not None:
+            recent_flight_timestamp = max(recent_flight_timestamp, datetime.fromtimestamp(since, timezone.utc))
         logger.info(f"Loading flights newer than {recent_flight_timestamp}")
 
-        page_size = 100
-        last_id = None
-        more_results = True
+        start = time.monotonic()
+        last_positions = {}
+        total_read = 0
         total_loaded = 0
 
-        while more_results:
-            results = self.repository.get_recent_flights_last_pos(
-                recent_flight_timestamp,
-                page_size=page_size,
-                last_id=last_id
-            )
-
-            if not results:
-                more_results = False
-                continue
+        for result in self.repository.iter_recent_flights_last_pos(recent_flight_timestamp):
+            flight = result["flight"]
+            position = result["position"]
+            flight_id = str(flight["_id"])
+            last_contact = to_epoch_seconds(flight["last_contact"])
+            total_read += 1
 
-            last_result = results[-1]
-            last_id = last_result["flight"]["_id"]
+            if total_read % self.WARM_START_PROGRESS_INTERVAL == 0:
+                logger.info(f"Warm start: read {total_read} flights in {time.monotonic() - start:.1f}s")
+                if progress:
+                    progress(total_read, total_loaded)
 
-            for result in results:
-                flight = result["flight"]
-                position = result["position"]
-                flight_id = str(flight["_id"])
+            # Keep the most recently contacted flight per aircraft
+            slot = self.live_state.slot_of(flight["modeS"])
+            if slot is not None and self.live_state.last_contact[slot] >= last_contact:
+                continue
 
-                self.modeS_flightid_map[flight["modeS"]] = flight_id
+            slot = self.live_state.assign_flight(flight["modeS"], flight_id, last_contact)
+            if flight.get("callsign"):
+                self.live_state.flight_callsign[slot] = flight["callsign"].strip().upper()
 
-                pos_report = PositionReport(
-                    flight["modeS"], position["lat"], position["lon"],
-                    position.get("alt"), position.get("track", 0.0), flight.get("callsign"))
-                
-                self.flight_last_contact[flight_id] = flight["last_contact"]
-                
-                if flight.get("callsign"):
-                    self._flight_callsign_cache[flight_id] = flight["callsign"].strip().upper() if flight["callsign"] else ""
-                
-                total_loaded += 1
+            last_positions[flight_id] = PositionReport(
+                flight["modeS"], position["lat"], position["lon"],
+                position.get("alt"), track=position.get("track"), callsign=flight.get("callsign"))
+            total_loaded += 1
 
-            if len(results) < page_size:
-                more_results = False
-            else:
-                logger.debug(f"Loaded {total_loaded} flights so far...")
-        
-        logger.info(f"Flight manager cache initialized with {total_loaded} recent flights")
+        if progress:
+            progress(total_read, total_loaded)
+        logger.info(f"Flight manager cache initialized with {total_loaded} recent flights "
+                    f"({total_read} read) in {time.monotonic() - start:.2f}s")
+        return last_positions
     
     def _threshold_timestamp(self):
         """
@@ -126,27 +130,29 @@ class FlightManager:
             
         return all_inserted, all_updated
     
+    def evict_stale_flights(self) -> List[str]:
+        """Release live state of aircraft whose flights can no longer be continued, returns their flight ids"""
+        return self.live_state.evict_stale(self._threshold_timestamp().timestamp())
+
+    def end_flights(self, icao24s: Iterable[str]) -> Dict[int, str]:
+        """Release live state of aircraft the radar reported as gone, returns released slot -> flight id"""
+        return self.live_state.remove(icao24s)
+
     def _should_create_new_flight(self, modeS, flight_id, threshold, flights_by_icao=None, new_callsign=None):
         """Determine if a new flight should be created based on last contact time and callsign"""
         
-        if not flight_id or flight_id not in self.flight_last_contact:
+        slot = self.live_state.slot_of(modeS)
+        if not flight_id or slot is None or self.live_state.flight_id[slot] != flight_id:
             return True
             
-        last_contact = self.flight_last_contact[flight_id]    
-        last_contact, threshold_comparable = make_datetimes_comparable(last_contact, threshold)
-        
-        if last_contact <= threshold_comparable:
+        if self.live_state.last_contact[slot] <= to_epoch_seconds(threshold):
             return True
             
         if flights_by_icao and new_callsign:
-            if new_callsign and modeS in self.modeS_flightid_map:
-                flight_id = self.modeS_flightid_map[modeS]
-                
-                db_callsign = None
+            if new_callsign:
+                db_callsign = self.live_state.flight_callsign[slot]
                 
-                if flight_id in self._flight_callsign_cache:
-                    db_callsign = self._flight_callsign_cache[flight_id]
-                elif modeS in flights_by_icao:
+                if db_callsign is None and modeS in flights_by_icao:
                         pos = flights_by_icao[modeS]
                         if hasattr(pos, 'callsign'):
                             db_callsign = pos.callsign.strip().upper() if pos.callsign else ""
@@ -176,11 +182,10 @@ class FlightManager:
             flight_obj = self.repository.get_or_create_flight(**flight_data)
             flight_id = str(flight_obj["_id"])
             
-            self.modeS_flightid_map[modeS] = flight_id
-            self.flight_last_contact[flight_id] = now
+            slot = self.live_state.assign_flight(modeS, flight_id, now.timestamp())
             
             if callsign:
-                self._flight_callsign_cache[flight_id] = callsign.strip().upper() if callsign else ""
+                self.live_state.flight_callsign[slot] = callsign.strip().upper()
                 
             inserted_flights.append((modeS, callsign))
             return flight_id
@@ -194,20 +199,20 @@ class FlightManager:
         new_callsign = f.callsign.strip().upper() if f.callsign else ""
         
         db_callsign = None
-        if flight_id in self._flight_callsign_cache:
-            db_callsign = self._flight_callsign_cache[flight_id]
+        slot = self.live_state.slot_of(modeS)
+        if slot is not None and self.live_state.flight_id[slot] == flight_id:
+            db_callsign = self.live_state.flight_callsign[slot]
+        
+        slot = self.live_state.assign_flight(modeS, flight_id, now.timestamp())
         
         if new_callsign and db_callsign != new_callsign:
             update_data["callsign"] = f.callsign
             callsign_updates.append((flight_id, update_data))
             updated_flights.append((modeS, f.callsign))
             
-            self._flight_callsign_cache[flight_id] = new_callsign
+            self.live_state.flight_callsign[slot] = new_callsign
         else:
             callsign_updates.append((flight_id, update_data))
-        
-        self.modeS_flightid_map[modeS] = flight_id
-        self.flight_last_contact[flight_id] = now
     
     def _process_flight_batch(self, batch, flights_by_icao, thresh_timestmp, now, inserted_flights, updated_flights):
         """Process a batch of flights for better memory management and performance"""
@@ -222,21 +227,15 @@ class FlightManager:
         new_flights = []
         
         for modeS in batch_modes:
-            if modeS in self.modeS_flightid_map:
-                flight_id = self.modeS_flightid_map[modeS]
-                if flight_id in self.flight_last_contact:
-                    if self._should_create_new_flight(modeS, flight_id, thresh_timestmp):
-                        unknown_modes.add(modeS)
-                    else:
-                        known_modes.add(modeS)
-                else:
-                    unknown_modes.add(modeS)
+            flight_id = self.live_state.flight_id_of(modeS)
+            if flight_id is not None and not self._should_create_new_flight(modeS, flight_id, thresh_timestmp):
+                known_modes.add(modeS)
             else:
                 unknown_modes.add(modeS)
                 
         if known_modes:
             for modeS in known_modes:
-                flight_id = self.modeS_flightid_map[modeS]
+                flight_id = self.live_state.flight_id_of(modeS)
                 f = flights_by_icao[modeS]
                 
                 update_data = {"last_contact": now}
@@ -314,7 +313,7 @@ class FlightManager:
                 self._update_flight(modeS, flight_id, f, now, update_data, callsign_updates, updated_flights)
                 
                 db_callsign = matching_flight.get("callsign", "").strip().upper() if matching_flight.get("callsign") else ""
-                self._flight_callsign_cache[flight_id] = db_callsign
+                self.live_state.flight_callsign[self.live_state.slot_of(modeS)] = db_callsign
             else:
                 # No matching flight found, create a new one
                 new_flights.append((modeS, f.callsign, self.mil_ranges.is_military(modeS)))
@@ -335,10 +334,5 @@ class FlightManager:
         if not self.mil_only:
             return positions
             
-        # Fast filtering with set lookups
-        mil_icao_set = set()
-        for pos in positions:
-            if self.mil_ranges.is_military(pos.icao24):
-                mil_icao_set.add(pos.icao24)
-                
+        mil_icao_set = self.mil_ranges.military_subset(pos.icao24 for pos in positions)
         return [pos for pos in positions if pos.icao24 in mil_icao_set]
\ No newline at end of file
@@ -1,5 +1,6 @@
 import logging
 import threading
+import time
 from typing import Any, Dict, Callable, Set, Optional
 
 from ...data.sources.radar_service_factory import RadarServiceFactory
@@ -12,11 +13,26 @@ from ...sse.notifier import SSENotifier
 from ...monitoring.performance_monitor import PerformanceMonitor
 from ..models.position_report import PositionReport
 from .incomplete_aircraft_manager import IncompleteAircraftManager
+from ...crawling.aircraft_queue import SharedAircraftQueue
+from .stream_ingestor import StreamIngestor
+from .live_state import LiveStateTable
+from .live_state_checkpoint import LiveStateCheckpoint
+from ..constants import MINUTES_BEFORE_CONSIDERED_NEW_FLIGHT
 from ...config import app_state
 from ...exceptions import DatabaseException
 
 logger = logging.getLogger('FlightUpdaterCoordinator')
 
+DEFAULT_UPDATE_INTERVAL_SEC = 2.0
+LIVE_STATE_EVICTION_INTERVAL_SEC = 60
+
+# Startup stages, in order
+STAGE_STARTING = 'starting'
+STAGE_DB_CONNECTED = 'db_connected'
+STAGE_CACHE_WARMED = 'cache_warmed'
+STAGE_READY = 'ready'  # First ingest cycle done
+STAGE_FAILED = 'failed'
+
 class FlightUpdaterCoordinator:
     _update_lock = threading.RLock()
     
@@ -25,11 +41,52 @@ class FlightUpdaterCoordinator:
         self.sleep_time = 1
         self._t = None
         self.interrupted = False
+        self.update_interval = DEFAULT_UPDATE_INTERVAL_SEC
+        self._stream_ingestor = None
+        self._position_manager = None
+        self._last_eviction = 0.0
+        self._checkpoint = None
+        self._checkpoint_interval = 0
+        self._last_checkpoint = 0.0
+        self._mongodb = None
+        self._aircraft_queue = None
+        self._classification_stats = {
+            "runs": 0,
+            "aircraft_classified": 0,
+            "last_batch_size": 0,
+            "last_duration_ms": 0.0,
+            "max_duration_ms": 0.0,
+        }
+        self.startup_stage = STAGE_STARTING
+        self._warm_start_progress = {
+            "started_at": None,
+            "duration_sec": None,
+            "checkpoint_restored": False,
+            "checkpoint_aircraft": 0,
+            "flights_read": 0,
+            "flights_loaded": 0,
+            "positions_restored": 0,
+            "attempts": 0,
+            "error": None,
+        }
         
     def initialize(self, config, mongodb=None):
-        """Initialize all components with configuration"""
+        """Initialize all components with configuration and warm the cache synchronously"""
+        self.configure(config, mongodb)
+        self.warm_start()
+
+    def configure(self, config, mongodb=None):
+        """Create all components without touching the database"""
         
         self._radar_service = RadarServiceFactory.create(config)
+
+        if getattr(config, 'GRPC_STREAMING', False):
+            if hasattr(self._radar_service, 'stream_updates'):
+                stream_interval_ms = getattr(config, 'GRPC_STREAM_INTERVAL_MS', 500)
+                self._stream_ingestor = StreamIngestor(self._radar_service, stream_interval_ms)
+                self.update_interval = stream_interval_ms / 1000.0
+            else:
+                logger.warning(f"Streaming ingestion not supported by service type '{config.RADAR_SERVICE_TYPE}', falling back to polling")
         
         self._retention_minutes = getattr(config, 'DB_RETENTION_MIN', 0)
         self._use_ttl_indexes = self._retention_minutes > 0
@@ -39,33 +96,103 @@ class FlightUpdaterCoordinator:
         else:
             logger.info(f"Using TTL indexes for document expiration with retention of {self._retention_minutes} minutes")
             
+        self._mongodb = mongodb
         db_repo = MongoDBRepository(mongodb)
         
         # Create repositories
         self._flight_repository = FlightRepository(db_repo)
         self._position_repository = PositionRepository(db_repo)
         
-        # Create managers and services
-        self._flight_manager = FlightManager(config)        
-        self._flight_manager.initialize(self._flight_repository)
+        # Create managers and services sharing a single live state table
+        self._live_state = LiveStateTable()
+
+        checkpoint_file = getattr(config, 'LIVE_STATE_CHECKPOINT_FILE', None)
+        self._checkpoint_interval = getattr(config, 'LIVE_STATE_CHECKPOINT_INTERVAL_SEC', 0)
+        if checkpoint_file and self._checkpoint_interval > 0:
+            self._checkpoint = LiveStateCheckpoint(checkpoint_file)
+
+        self._flight_manager = FlightManager(config, self._live_state)
         
-        self._position_manager = PositionManager(config)
+        self._position_manager = PositionManager(config, self._live_state)
         self._position_manager.initialize(self._position_repository)
         
         self._sse_notifier = SSENotifier()
         self._performance_monitor = PerformanceMonitor()
         
         self._unknown_aircraft_manager = IncompleteAircraftManager(config, mongodb)
-            
-        
-        logger.info("Loading cached position data...")
-        # Initialize position manager with data from flight manager
-        position_count = 0
-        for flight_id, flight_pos in self._flight_manager.repository.get_last_positions().items():
-            if flight_id in self._flight_manager.flight_last_contact:
-                self._position_manager.flight_lastpos_map[flight_id] = flight_pos
-                position_count += 1
-        logger.info(f"Loaded {position_count} cached positions")
+        # Live aircraft waiting for metadata classification, drained by its own scheduler job
+        self._aircraft_queue = SharedAircraftQueue()
+
+    def warm_start(self):
+        """Load the live state from the checkpoint and the database, then start ingesting"""
+        progress = self._warm_start_progress
+        progress["started_at"] = time.time()
+        progress["attempts"] += 1
+        progress["error"] = None
+        try:
+            if self._mongodb is not None:
+                self._mongodb.command('ping')
+            self.startup_stage = STAGE_DB_CONNECTED
+
+            checkpoint_time = None
+            if self._checkpoint:
+                checkpoint_time = self._checkpoint.load(
+                    self._live_state, time.time() - MINUTES_BEFORE_CONSIDERED_NEW_FLIGHT * 60)
+            progress["checkpoint_restored"] = checkpoint_time is not None
+            progress["checkpoint_aircraft"] = len(self._live_state)
+
+            # Without a checkpoint all recent flights are loaded, otherwise only the gap since it was saved
+            last_positions = self._flight_manager.initialize(
+                self._flight_repository, since=checkpoint_time, progress=self._on_warm_start_progress)
+
+            # Seed positions from the flights loaded by the flight manager
+            if checkpoint_time is not None:
+                self._position_manager.track_restored_slots(self._live_state.occupied_slots())
+            position_count = self._position_manager.restore_positions(last_positions)
+            self._position_manager.refresh_active_flights()
+            progress["positions_restored"] = position_count
+            logger.info(f"Loaded {position_count} cached positions")
+        except Exception as e:
+            progress["error"] = str(e)
+            self.startup_stage = STAGE_FAILED
+            raise
+        finally:
+            progress["duration_sec"] = round(time.time() - progress["started_at"], 3)
+
+        self.startup_stage = STAGE_CACHE_WARMED
+        if self._stream_ingestor:
+            self._stream_ingestor.start()
+
+    def _on_warm_start_progress(self, flights_read: int, flights_loaded: int):
+        self._warm_start_progress["flights_read"] = flights_read
+        self._warm_start_progress["flights_loaded"] = flights_loaded
+
+    @property
+    def is_warmed_up(self) -> bool:
+        return self.startup_stage in (STAGE_CACHE_WARMED, STAGE_READY)
+
+    def get_startup_status(self) -> Dict[str, Any]:
+        """Startup stage and warm start progress"""
+        return {"stage": self.startup_stage, "warm_start": dict(self._warm_start_progress)}
+
+    def shutdown(self):
+        """Stop background ingestion and flush pending writes"""
+        if self._stream_ingestor:
+            self._stream_ingestor.stop()
+        if self._position_manager:
+            self._position_manager.shutdown()
+        # A partially warmed table must not replace the last good checkpoint
+        if self.is_warmed_up:
+            self._save_checkpoint()
+
+    def _save_checkpoint(self):
+        if not self._checkpoint:
+            return
+        try:
+            count = self._checkpoint.save(self._live_state)
+            logger.debug(f"Checkpointed live state of {count} aircraft")
+        except OSError as e:
+            logger.warning(f"Failed to write live state checkpoint: {str(e)}")
 
     def is_service_alive(self) -> bool:
         """Check if the radar service connection is alive"""
@@ -83,21 +210,68 @@ class FlightUpdaterCoordinator:
         """Get flights with recent positions"""
         return self._position_manager.get_cached_flights(self._flight_manager)
         
+    def get_cached_flights_in(self, bbox) -> Dict[str, PositionReport]:
+        """Get flights with recent positions inside a bounding box"""
+        return self._position_manager.get_cached_flights_in(bbox)
+
+    def get_position_dedup_stats(self) -> Dict[str, int]:
+        """Get position dedup counters"""
+        return self._position_manager.get_dedup_stats()
+
+    def classify_queued_aircraft(self):
+        """Schedule queued live aircraft for metadata processing, runs as its own scheduler job"""
+        if self._aircraft_queue is None:
+            return
+        icao24s = self._aircraft_queue.get_aircraft(max_items=self._aircraft_queue.max_size)
+        if not icao24s:
+            return
+
+        start = time.monotonic()
+        try:
+            self._unknown_aircraft_manager.schedule_aircraft_for_processing(icao24s)
+        except Exception as e:
+            logger.exception(f"Failed to classify {len(icao24s)} aircraft: {str(e)}")
+        duration_ms = (time.monotonic() - start) * 1000
+
+        stats = self._classification_stats
+        stats["runs"] += 1
+        stats["aircraft_classified"] += len(icao24s)
+        stats["last_batch_size"] = len(icao24s)
+        stats["last_duration_ms"] = round(duration_ms, 2)
+        stats["max_duration_ms"] = round(max(stats["max_duration_ms"], duration_ms), 2)
+        logger.debug(f"Classified {len(icao24s)} aircraft for metadata processing in {duration_ms:.1f}ms")
+
+    def get_classification_stats(self) -> Optional[Dict[str, Any]]:
+        """Queue and timing counters of the metadata classification stage"""
+        if self._aircraft_queue is None:
+            return None
+        return {**self._aircraft_queue.get_stats(), **self._classification_stats}
+
+    def _refresh_active_flights(self):
+        """Refresh the active flights view and pass on the flights that left it"""
+        self._position_manager.refresh_active_flights()
+        self._sse_notifier.notify_removed_flights(self._position_manager.get_removed_flight_ids())
+
     def get_silhouete_params(self):
         """Get silhouette parameters from radar service"""
         return self._radar_service.get_silhouete_params()
 
     def update(self):
         """Main update method that coordinates the update process"""
+        if not self.is_warmed_up:
+            logger.debug("Warm start in progress, skipping this cycle")
+            return
+
         # Use thread lock to prevent concurrent updates
         # Non-blocking acquisition - if locked, just return instead of waiting
         if not FlightUpdaterCoordinator._update_lock.acquire(blocking=False):
             logger.debug("Update already in progress, skipping this cycle")
             return
 
+        refreshed = False
         try:
-            import time
             cycle_start = time.time()
+            cycle_completed = False
 
             self.is_updating = True
             self._position_manager.clear_changes()
@@ -105,60 +279,37 @@ class FlightUpdaterCoordinator:
             self._performance_monitor.start_timer('main')
 
             self._performance_monitor.start_timer('service')
-            positions = self._radar_service.query_live_flights(False)
+            removed = None
+            if self._stream_ingestor:
+                # Removals first, an aircraft seen again after its removal is then in the positions
+                removed = self._stream_ingestor.drain_removed()
+                # Only aircraft updated since the last cycle, already coalesced per icao24
+                positions = self._stream_ingestor.drain()
+            else:
+                positions = self._radar_service.query_live_flights(False)
             service_time = self._performance_monitor.stop_timer('service')
 
             logger.debug(f"Radar service query took {service_time:.3f}s, received {len(positions) if positions else 0} positions")
-                
-            if not positions:
-                return        
-            live_icao24s = {pos.icao24 for pos in positions if pos.icao24}
-            self._unknown_aircraft_manager.schedule_aircraft_for_processing(live_icao24s)
-            
-            try:
-                filtered_pos = self._flight_manager.filter_military_only(positions)
-                
-                if not filtered_pos:
-                    return
-
-                valid_positions = [p for p in filtered_pos if p.lat and p.lon]                
 
-                self._performance_monitor.start_timer('flight')
-                self._flight_manager.update_flights(filtered_pos)
-                flight_time = self._performance_monitor.stop_timer('flight')
+            # Quiet cycles (empty stream drains, military-only filter) still evict and checkpoint
+            if cycle_start - self._last_eviction >= LIVE_STATE_EVICTION_INTERVAL_SEC:
+                self._last_eviction = cycle_start
+                self._position_manager.discard_flights(self._flight_manager.evict_stale_flights())
 
-                self._performance_monitor.start_timer('position')
-                self._position_manager.add_positions(valid_positions, self._flight_manager)
-                position_time = self._performance_monitor.stop_timer('position')
-
-                logger.debug(f"Processing {len(valid_positions)} valid positions. Update timings: flight={flight_time:.3f}s, position={position_time:.3f}s")
-
-                # Broadcast positions via SSE if needed
-                has_callbacks = self._sse_notifier.has_callbacks()
-                has_changes = self._position_manager.has_positions_changed()
-                changed_count = len(self._position_manager.get_changed_flight_ids())
-
-                logger.debug(f"SSE check: has_callbacks={has_callbacks}, has_changes={has_changes}, changed_count={changed_count}")
-
-                if (has_callbacks and has_changes and changed_count > 0):
-
-                    all_cached_flights = self.get_cached_flights()
-                    changed_flight_ids = self._position_manager.get_changed_flight_ids()
-
-                    logger.debug(f"Broadcasting {changed_count} changed positions to SSE clients")
-                    self._sse_notifier.notify_position_changes(all_cached_flights, changed_flight_ids)
+            try:
+                if removed:
+                    self._position_manager.remove_flights(self._flight_manager.end_flights(removed))
 
-                # Broadcast category changes separately if any occurred
-                if has_callbacks and self._position_manager.has_category_changes():
-                    category_changes = self._position_manager.get_category_changes()
-                    logger.debug(f"Broadcasting {len(category_changes)} category changes to SSE clients")
-                    self._sse_notifier.notify_category_changes(category_changes)
+                filtered_pos = None
+                if positions:
+                    # Classified for metadata crawling off the ingest path, see classify_queued_aircraft
+                    self._aircraft_queue.add_aircraft(pos.icao24 for pos in positions if pos.icao24)
+                    filtered_pos = self._flight_manager.filter_military_only(positions)
 
-                # Broadcast callsign changes separately if any occurred
-                if has_callbacks and self._position_manager.has_callsign_changes():
-                    callsign_changes = self._position_manager.get_callsign_changes()
-                    logger.debug(f"Broadcasting {len(callsign_changes)} callsign changes to SSE clients")
-                    self._sse_notifier.notify_callsign_changes(callsign_changes)
+                if filtered_pos:
+                    self._process_positions(filtered_pos)
+                    refreshed = True
+                cycle_completed = True
 
             except (KeyboardInterrupt, SystemExit):
                 raise
@@ -168,9 +319,64 @@ class FlightUpdaterCoordinator:
                 else:
                     logger.exception(f"An error occurred: {str(e)}")
 
+            if self._checkpoint and cycle_start - self._last_checkpoint >= self._checkpoint_interval:
+                self._last_checkpoint = cycle_start
+                self._save_checkpoint()
+
             self._performance_monitor.log_performance(threshold=0.2)
-            
+
+            if cycle_completed and self.startup_stage == STAGE_CACHE_WARMED:
+                self.startup_stage = STAGE_READY
+                logger.info("First update cycle done, updater is ready")
+
         finally:
+            if not refreshed:
+                try:
+                    # Expire flights even in cycles without new positions
+                    self._refresh_active_flights()
+                except Exception as e:
+                    logger.exception(f"Failed to refresh active flights: {str(e)}")
             self.is_updating = False
             FlightUpdaterCoordinator._update_lock.release()
 
+    def _process_positions(self, filtered_pos):
+        """Store a cycle's positions, refresh the active flights view and notify SSE clients"""
+        valid_positions = [p for p in filtered_pos if p.lat and p.lon]
+
+        self._performance_monitor.start_timer('flight')
+        self._flight_manager.update_flights(filtered_pos)
+        flight_time = self._performance_monitor.stop_timer('flight')
+
+        self._performance_monitor.start_timer('position')
+        self._position_manager.add_positions(valid_positions, self._flight_manager)
+        self._refresh_active_flights()
+        position_time = self._performance_monitor.stop_timer('position')
+
+        logger.debug(f"Processing {len(valid_positions)} valid positions. Update timings: flight={flight_time:.3f}s, position={position_time:.3f}s")
+
+        # Broadcast positions via SSE if needed
+        has_callbacks = self._sse_notifier.has_callbacks()
+        has_changes = self._position_manager.has_positions_changed()
+        changed_count = len(self._position_manager.get_changed_flight_ids())
+
+        logger.debug(f"SSE check: has_callbacks={has_callbacks}, has_changes={has_changes}, changed_count={changed_count}")
+
+        if (has_callbacks and has_changes and changed_count > 0):
+
+            all_cached_flights = self.get_cached_flights()
+            changed_flight_ids = self._position_manager.get_changed_flight_ids()
+
+            logger.debug(f"Broadcasting {changed_count} changed positions to SSE clients")
+            self._sse_notifier.notify_position_changes(all_cached_flights, changed_flight_ids)
+
+        # Broadcast category changes separately if any occurred
+        if has_callbacks and self._position_manager.has_category_changes():
+            category_changes = self._position_manager.get_category_changes()
+            logger.debug(f"Broadcasting {len(category_changes)} category changes to SSE clients")
+            self._sse_notifier.notify_category_changes(category_changes)
+
+        # Broadcast callsign changes separately if any occurred
+        if has_callbacks and self._position_manager.has_callsign_changes():
+            callsign_changes = self._position_manager.get_callsign_changes()
+            logger.debug(f"Broadcasting {len(callsign_changes)} callsign changes to SSE clients")
+            self._sse_notifier.notify_callsign_changes(callsign_changes)
@@ -1,11 +1,14 @@
 import logging
+import time
 from datetime import datetime, timedelta
-from typing import Set, List, Tuple
+from typing import Dict, Set, List, Tuple
 from ...data.repositories.aircraft_repository import AircraftRepository
 from ...data.repositories.aircraft_processing_repository import AircraftProcessingRepository, CrawlReason
 
 logger = logging.getLogger("IncompleteAircraftManager")
 
+CRITICAL_FIELDS = ["registeredOwners", "type", "icaoTypeCode", "registration"]
+
 
 class IncompleteAircraftManager:
     """
@@ -16,6 +19,9 @@ class IncompleteAircraftManager:
     4. Repository initialization and configuration
     """
 
+    QUEUED_RECHECK_SEC = 300  # Recheck of queued or just added aircraft
+    MAX_RECHECK_SEC = 3600  # Upper bound, picks up changes made outside the crawler
+
     def __init__(self, config, mongodb=None):
         """Initialize manager with database connections"""
         from ...data.repositories.aircraft_repository import AircraftRepository
@@ -32,6 +38,8 @@ class IncompleteAircraftManager:
             max_attempts=max_attempts,
             service_error_reset_hours=service_error_reset_hours
         )
+        self._recheck_at: Dict[str, float] = {}  # icao24 -> time it has to be classified again
+        self._next_purge = 0.0
 
     @classmethod
     def create_with_repositories(cls, aircraft_repo: AircraftRepository,
@@ -44,6 +52,8 @@ class IncompleteAircraftManager:
         instance.processing_aircraft_repo = processing_aircraft_repo
         instance.staleness_days = staleness_days
         instance.incomplete_staleness_days = incomplete_staleness_days
+        instance._recheck_at = {}
+        instance._next_purge = 0.0
         return instance
 
     def schedule_aircraft_for_processing(self, icao24s: Set[str]) -> None:
@@ -56,23 +66,22 @@ class IncompleteAircraftManager:
         if not icao24s:
             return
 
-        aircraft_to_process = self._classify_unknown_aircraft(icao24s)
+        now = time.time()
+        self._purge_recheck_times(now)
+        candidates = [icao24 for icao24 in icao24s if self._recheck_at.get(icao24, 0.0) <= now]
+        if not candidates:
+            return
+
+        aircraft_to_process = self._classify_unknown_aircraft(candidates)
 
         if aircraft_to_process:
-            # Only add aircraft that don't already exist in unknown collection
-            new_unknown_aircraft = [
-                (icao24, reason) for icao24, reason in aircraft_to_process
-                if not self.processing_aircraft_repo.aircraft_exists(icao24)
-            ]
-
-            if new_unknown_aircraft:
-                logger.info(f"Adding {len(new_unknown_aircraft)} new aircraft (found {len(aircraft_to_process)} total requiring metadata)")
-                for icao24, reason in new_unknown_aircraft:
-                    self.processing_aircraft_repo.add_aircraft(icao24, reason)
+            added = self.processing_aircraft_repo.add_aircraft_batch(aircraft_to_process)
+            if added:
+                logger.info(f"Adding {added} new aircraft (found {len(aircraft_to_process)} total requiring metadata)")
             else:
                 logger.debug(f"All {len(aircraft_to_process)} aircraft requiring metadata already exist in unknown collection")
 
-    def _classify_unknown_aircraft(self, icao24s: Set[str]) -> List[Tuple[str, CrawlReason]]:
+    def _classify_unknown_aircraft(self, icao24s: List[str]) -> List[Tuple[str, CrawlReason]]:
         """
         Classify aircraft as unknown based on staleness and completeness criteria.
 
@@ -84,60 +93,77 @@ class IncompleteAircraftManager:
         This allows incomplete aircraft to be re-queued sooner than complete aircraft,
         giving external services another chance to provide full data.
 
+        Uses one query per collection for the whole batch. Every classified aircraft
+        gets a recheck time, until then it is skipped: aircraft that are recent enough
+        until they could turn stale, queued aircraft until they may have been crawled.
+
         Args:
-            icao24s: Set of ICAO24 addresses to classify
+            icao24s: ICAO24 addresses to classify
 
         Returns:
             List of tuples (icao24, crawl_reason) for aircraft that need processing
         """
         aircraft_to_process: List[Tuple[str, CrawlReason]] = []
-        staleness_threshold = datetime.now() - timedelta(days=self.staleness_days)
-        incomplete_staleness_threshold = datetime.now() - timedelta(days=self.incomplete_staleness_days)
+        now = time.time()
+        now_dt = datetime.now()
+        staleness = timedelta(days=self.staleness_days)
+        incomplete_staleness = timedelta(days=self.incomplete_staleness_days)
+
+        try:
+            # Skip if already in processing queue (being crawled)
+            queued = self.processing_aircraft_repo.get_existing(icao24s)
+            unqueued = [icao24 for icao24 in icao24s if icao24.upper() not in queued]
+            aircraft_docs = self.aircraft_repo.query_aircraft_docs(
+                unqueued, ["lastModified"] + CRITICAL_FIELDS) if unqueued else {}
+        except Exception as e:
+            logger.warning(f"Error classifying {len(icao24s)} aircraft, retrying next cycle: {e}")
+            return aircraft_to_process
 
         for icao24 in icao24s:
-            try:
-                # Skip if already in processing queue (being crawled)
-                if self.processing_aircraft_repo.aircraft_exists(icao24):
-                    continue
-
-                existing_aircraft = self.aircraft_repo.query_aircraft(icao24)
-
-                if existing_aircraft is None:
-                    # Criteria 1: Aircraft not present in aircraft collection
-                    logger.debug(f"Aircraft {icao24} not found in database")
-                    aircraft_to_process.append((icao24, CrawlReason.NOT_IN_DB))
-                    continue
-
-                aircraft_doc = self.aircraft_repo.db[self.aircraft_repo.collection_name].find_one(
-                    {"modeS": icao24.strip().upper()}
-                )
-
-                if aircraft_doc:
-                    last_modified = aircraft_doc.get("lastModified")
-                    is_incomplete = self._has_missing_critical_fields(aircraft_doc)
-
-                    # Check staleness based on completeness
-                    if last_modified is None:
-                        # No timestamp - always re-queue
-                        logger.debug(f"Aircraft {icao24} has no lastModified, queuing")
-                        aircraft_to_process.append((icao24, CrawlReason.NO_TIMESTAMP))
-                    elif is_incomplete and last_modified < incomplete_staleness_threshold:
-                        # Incomplete data - use shorter staleness threshold
-                        logger.debug(f"Aircraft {icao24} is incomplete and stale ({self.incomplete_staleness_days}d), queuing")
-                        aircraft_to_process.append((icao24, CrawlReason.INCOMPLETE_STALE))
-                    elif last_modified < staleness_threshold:
-                        # Complete data but old - use longer staleness threshold
-                        logger.debug(f"Aircraft {icao24} is stale ({self.staleness_days}d), queuing")
-                        aircraft_to_process.append((icao24, CrawlReason.STALE))
-                    else:
-                        logger.debug(f"Aircraft {icao24} was recently updated, skipping")
-
-            except Exception as e:
-                logger.warning(f"Error classifying aircraft {icao24}: {e}")
-                aircraft_to_process.append((icao24, CrawlReason.UNKNOWN))
+            recheck_in = self.QUEUED_RECHECK_SEC
+            modes = icao24.strip().upper()
+            aircraft_doc = aircraft_docs.get(modes)
+
+            if modes in queued:
+                pass
+            elif aircraft_doc is None:
+                # Criteria 1: Aircraft not present in aircraft collection
+                logger.debug(f"Aircraft {icao24} not found in database")
+                aircraft_to_process.append((icao24, CrawlReason.NOT_IN_DB))
+            else:
+                last_modified = aircraft_doc.get("lastModified")
+                is_incomplete = self._has_missing_critical_fields(aircraft_doc)
+
+                # Check staleness based on completeness
+                if last_modified is None:
+                    # No timestamp - always re-queue
+                    logger.debug(f"Aircraft {icao24} has no lastModified, queuing")
+                    aircraft_to_process.append((icao24, CrawlReason.NO_TIMESTAMP))
+                elif is_incomplete and last_modified < now_dt - incomplete_staleness:
+                    # Incomplete data - use shorter staleness threshold
+                    logger.debug(f"Aircraft {icao24} is incomplete and stale ({self.incomplete_staleness_days}d), queuing")
+                    aircraft_to_process.append((icao24, CrawlReason.INCOMPLETE_STALE))
+                elif last_modified < now_dt - staleness:
+                    # Complete data but old - use longer staleness threshold
+                    logger.debug(f"Aircraft {icao24} is stale ({self.staleness_days}d), queuing")
+                    aircraft_to_process.append((icao24, CrawlReason.STALE))
+                else:
+                    logger.debug(f"Aircraft {icao24} was recently updated, skipping")
+                    stale_at = last_modified + (incomplete_staleness if is_incomplete else staleness)
+                    recheck_in = min(max((stale_at - now_dt).total_seconds(), self.QUEUED_RECHECK_SEC),
+                                     self.MAX_RECHECK_SEC)
+
+            self._recheck_at[icao24] = now + recheck_in
 
         return aircraft_to_process
 
+    def _purge_recheck_times(self, now: float):
+        """Forget recheck times that have passed, so aircraft no longer seen do not pile up"""
+        if now < self._next_purge:
+            return
+        self._next_purge = now + self.QUEUED_RECHECK_SEC
+        self._recheck_at = {icao24: at for icao24, at in self._recheck_at.items() if at > now}
+
     def _has_missing_critical_fields(self, aircraft_doc: dict) -> bool:
         """
         Check if aircraft has missing critical fields
@@ -148,9 +174,7 @@ class IncompleteAircraftManager:
         Returns:
             True if aircraft has missing critical fields, False otherwise
         """
-        critical_fields = ["registeredOwners", "type", "icaoTypeCode", "registration"]
-        
-        for field in critical_fields:
+        for field in CRITICAL_FIELDS:
             value = aircraft_doc.get(field)
             if value is None or (isinstance(value, str) and value.strip() == ""):
                 return True
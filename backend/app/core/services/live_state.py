@@ -0,0 +1,202 @@
+import logging
+import math
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..models.position_report import PositionReport
+
+logger = logging.getLogger('LiveStateTable')
+
+NO_ALTITUDE = -(2 ** 31)  # Sentinel for unknown altitude in the int32 column
+NO_CATEGORY = -1          # Sentinel for unknown category in the int8 column
+NO_VALUE = math.nan       # Sentinel for unknown float values
+
+# Positions are compared at 5 decimal places (~1 meter precision)
+QUANTIZE_SCALE = 100000
+
+CATEGORY_NAMES = {num: name for name, num in PositionReport.CATEGORY_MAP.items()}
+
+
+class LiveStateTable:
+    """
+    Columnar store for the live state of all tracked aircraft.
+
+    Each aircraft (icao24) owns one slot holding its current flight, last contact,
+    last stored position and last reported category/callsign. Numeric values live
+    in packed arrays instead of one PositionReport object per flight, and slots of
+    evicted aircraft are recycled through a free-list.
+
+    FlightManager and PositionManager share a single table; the updater thread is
+    the only writer.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._lock = threading.RLock()
+        self._slots: Dict[str, int] = {}  # icao24 -> slot
+        self._free: List[int] = []
+
+        # Object columns
+        self.icao24: List[Optional[str]] = []
+        self.flight_id: List[Optional[str]] = []
+        self.flight_callsign: List[Optional[str]] = []  # Normalized callsign stored with the flight
+        self.callsign: List[Optional[str]] = []  # Last reported callsign
+
+        # Numeric columns
+        self.last_contact = array('d')  # POSIX seconds
+        self.has_position = array('b')
+        self.lat = array('d')
+        self.lon = array('d')
+        self.qlat = array('i')  # Quantized lat/lon of the stored position
+        self.qlon = array('i')
+        self.alt = array('i')
+        self.gs = array('d')
+        self.track = array('d')
+        self.category = array('b')  # Numeric category from PositionReport.CATEGORY_MAP
+
+        self._grow(capacity)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, icao24):
+        return icao24 in self._slots
+
+    @property
+    def capacity(self) -> int:
+        return len(self.icao24)
+
+    def _grow(self, count: int):
+        start = len(self.icao24)
+        self.icao24.extend([None] * count)
+        self.flight_id.extend([None] * count)
+        self.flight_callsign.extend([None] * count)
+        self.callsign.extend([None] * count)
+        self.last_contact.extend([0.0] * count)
+        self.has_position.extend([0] * count)
+        self.lat.extend([NO_VALUE] * count)
+        self.lon.extend([NO_VALUE] * count)
+        self.qlat.extend([0] * count)
+        self.qlon.extend([0] * count)
+        self.alt.extend([NO_ALTITUDE] * count)
+        self.gs.extend([NO_VALUE] * count)
+        self.track.extend([NO_VALUE] * count)
+        self.category.extend([NO_CATEGORY] * count)
+        # Hand out low slots first
+        self._free.extend(range(start + count - 1, start - 1, -1))
+
+    def _clear_flight_columns(self, slot: int):
+        """Reset everything that belongs to the flight rather than to the aircraft"""
+        self.flight_callsign[slot] = None
+        self.callsign[slot] = None
+        self.has_position[slot] = 0
+        self.lat[slot] = NO_VALUE
+        self.lon[slot] = NO_VALUE
+        self.alt[slot] = NO_ALTITUDE
+        self.gs[slot] = NO_VALUE
+        self.track[slot] = NO_VALUE
+        self.category[slot] = NO_CATEGORY
+
+    def slot_of(self, icao24: str) -> Optional[int]:
+        return self._slots.get(icao24)
+
+    def occupied_slots(self) -> List[int]:
+        with self._lock:
+            return list(self._slots.values())
+
+    def flight_id_of(self, icao24: str) -> Optional[str]:
+        slot = self._slots.get(icao24)
+        return self.flight_id[slot] if slot is not None else None
+
+    def assign_flight(self, icao24: str, flight_id: str, last_contact: float) -> int:
+        """Bind an aircraft to its current flight, allocating a slot if needed"""
+        with self._lock:
+            slot = self._slots.get(icao24)
+            if slot is None:
+                if not self._free:
+                    self._grow(max(self.capacity, 64))
+                slot = self._free.pop()
+                self._slots[icao24] = slot
+                self.icao24[slot] = icao24
+                self._clear_flight_columns(slot)
+            elif self.flight_id[slot] != flight_id:
+                self._clear_flight_columns(slot)
+
+            self.flight_id[slot] = flight_id
+            self.last_contact[slot] = last_contact
+            return slot
+
+    def touch(self, slot: int, last_contact: float):
+        self.last_contact[slot] = last_contact
+
+    def set_position(self, slot: int, pos: PositionReport):
+        with self._lock:
+            self.lat[slot] = pos.lat
+            self.lon[slot] = pos.lon
+            self.qlat[slot] = round(pos.lat * QUANTIZE_SCALE)
+            self.qlon[slot] = round(pos.lon * QUANTIZE_SCALE)
+            self.alt[slot] = int(pos.alt) if pos.alt is not None else NO_ALTITUDE
+            self.gs[slot] = pos.gs if pos.gs is not None else NO_VALUE
+            self.track[slot] = pos.track if pos.track is not None else NO_VALUE
+            self.has_position[slot] = 1
+
+    def position_changed_mask(self, slots: List[int], positions: List[PositionReport]) -> List[bool]:
+        """
+        Quantizes a whole cycle of positions at once and compares them with the
+        stored last position of their slots. Returns True where the position
+        differs (or none is stored yet), i.e. where it should be persisted.
+        """
+        scale = QUANTIZE_SCALE
+        qlats = [round(p.lat * scale) for p in positions]
+        qlons = [round(p.lon * scale) for p in positions]
+        alts = [int(p.alt) if p.alt is not None else NO_ALTITUDE for p in positions]
+
+        has_position, qlat, qlon, alt = self.has_position, self.qlat, self.qlon, self.alt
+        return [
+            not has_position[s] or la != qlat[s] or lo != qlon[s] or al != alt[s]
+            for s, la, lo, al in zip(slots, qlats, qlons, alts)
+        ]
+
+    def position_of(self, slot: int) -> Optional[PositionReport]:
+        """Materialize the last stored position of a slot"""
+        if not self.has_position[slot]:
+            return None
+        alt = self.alt[slot]
+        gs = self.gs[slot]
+        track = self.track[slot]
+        category = self.category[slot]
+        return PositionReport(
+            self.icao24[slot],
+            self.lat[slot],
+            self.lon[slot],
+            alt if alt != NO_ALTITUDE else None,
+            gs=gs if gs == gs else None,
+            track=track if track == track else None,
+            callsign=self.callsign[slot],
+            category=CATEGORY_NAMES.get(category) if category != NO_CATEGORY else None
+        )
+
+    def _release(self, icao24: str) -> Tuple[int, str]:
+        slot = self._slots.pop(icao24)
+        flight_id = self.flight_id[slot]
+        self.icao24[slot] = None
+        self.flight_id[slot] = None
+        self.last_contact[slot] = 0.0
+        self._clear_flight_columns(slot)
+        self._free.append(slot)
+        return slot, flight_id
+
+    def evict_stale(self, min_last_contact: float) -> List[str]:
+        """Release slots of aircraft without contact since the given time, returns their flight ids"""
+        with self._lock:
+            stale = [icao24 for icao24, slot in self._slots.items()
+                     if self.last_contact[slot] <= min_last_contact]
+            evicted = [self._release(icao24)[1] for icao24 in stale]
+        if stale:
+            logger.debug(f"Evicted {len(stale)} stale aircraft, {len(self._slots)} remaining")
+        return evicted
+
+    def remove(self, icao24s: Iterable[str]) -> Dict[int, str]:
+        """Release slots of the given aircraft, returns the flight id of every released slot"""
+        with self._lock:
+            return dict(self._release(icao24) for icao24 in icao24s if icao24 in self._slots)
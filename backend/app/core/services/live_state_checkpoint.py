@@ -0,0 +1,131 @@
+import logging
+import os
+import struct
+import time
+from array import array
+from typing import List, Optional
+
+from ..models.position_report import PositionReport
+from .live_state import LiveStateTable, NO_ALTITUDE
+
+logger = logging.getLogger('LiveStateCheckpoint')
+
+MAGIC = b'FRLS'
+VERSION = 1
+HEADER = struct.Struct('<4sHdI')  # magic, version, saved at (POSIX seconds), aircraft count
+LENGTH = struct.Struct('<I')
+
+# Numeric columns in file order, written in native byte order
+NUMERIC_COLUMNS = (
+    ('last_contact', 'd'),
+    ('has_position', 'b'),
+    ('lat', 'd'),
+    ('lon', 'd'),
+    ('alt', 'i'),
+    ('gs', 'd'),
+    ('track', 'd'),
+    ('category', 'b'),
+)
+STRING_COLUMNS = ('icao24', 'flight_id', 'flight_callsign', 'callsign')
+
+
+class LiveStateCheckpoint:
+    """
+    Binary snapshot of the live state table in a local file.
+
+    The updater writes it periodically and on shutdown. At startup the table is
+    restored from it, so only flights contacted after the checkpoint have to be
+    loaded from MongoDB instead of every recent flight with its last position.
+
+    Layout: header, then each numeric column as a packed array of the occupied
+    slots, then each string column NUL-joined as UTF-8 with a length prefix.
+    The file is replaced atomically, a crash never leaves a partial checkpoint.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def save(self, live_state: LiveStateTable, saved_at: float = None) -> int:
+        """Write all aircraft of the table, returns the number written"""
+        saved_at = saved_at if saved_at is not None else time.time()
+        slots = live_state.occupied_slots()
+
+        parts = [HEADER.pack(MAGIC, VERSION, saved_at, len(slots))]
+        for name, typecode in NUMERIC_COLUMNS:
+            column = getattr(live_state, name)
+            parts.append(array(typecode, [column[s] for s in slots]).tobytes())
+        for name in STRING_COLUMNS:
+            column = getattr(live_state, name)
+            blob = '\0'.join(column[s] or '' for s in slots).encode('utf-8')
+            parts.append(LENGTH.pack(len(blob)))
+            parts.append(blob)
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(parts))
+        os.replace(tmp_path, self.path)
+        return len(slots)
+
+    def load(self, live_state: LiveStateTable, min_last_contact: float) -> Optional[float]:
+        """
+        Restore aircraft contacted after min_last_contact into the table.
+        Returns the time the checkpoint was saved, None if there is no usable checkpoint.
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+            saved_at, columns = self._decode(data)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, struct.error, UnicodeDecodeError) as e:
+            logger.warning(f"Ignoring unreadable live state checkpoint {self.path}: {str(e)}")
+            return None
+
+        if saved_at <= min_last_contact:
+            logger.info(f"Live state checkpoint {self.path} is too old, ignoring it")
+            return None
+
+        restored = 0
+        for row in zip(*columns):
+            (last_contact, has_position, lat, lon, alt, gs, track, category,
+             icao24, flight_id, flight_callsign, callsign) = row
+            if last_contact <= min_last_contact:
+                continue
+            slot = live_state.assign_flight(icao24, flight_id, last_contact)
+            live_state.flight_callsign[slot] = flight_callsign or None
+            live_state.callsign[slot] = callsign or None
+            live_state.category[slot] = category
+            if has_position:
+                live_state.set_position(slot, PositionReport(
+                    icao24, lat, lon, alt if alt != NO_ALTITUDE else None,
+                    gs=gs if gs == gs else None, track=track if track == track else None))
+            restored += 1
+
+        logger.info(f"Restored {restored} aircraft from live state checkpoint saved {time.time() - saved_at:.0f}s ago")
+        return saved_at
+
+    @staticmethod
+    def _decode(data: bytes):
+        magic, version, saved_at, count = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"unsupported format {magic!r} version {version}")
+        offset = HEADER.size
+
+        columns: List[list] = []
+        for _, typecode in NUMERIC_COLUMNS:
+            column = array(typecode)
+            size = column.itemsize * count
+            column.frombytes(data[offset:offset + size])
+            if len(column) != count:
+                raise ValueError("truncated checkpoint")
+            columns.append(column)
+            offset += size
+        for _ in STRING_COLUMNS:
+            (length,) = LENGTH.unpack_from(data, offset)
+            offset += LENGTH.size
+            values = data[offset:offset + length].decode('utf-8').split('\0') if count else []
+            if len(values) != count:
+                raise ValueError("truncated checkpoint")
+            columns.append(values)
+            offset += length
+        return saved_at, columns
@@ -0,0 +1,87 @@
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, Tuple
+
+from ..models.position_report import PositionReport
+from .live_state import QUANTIZE_SCALE, NO_ALTITUDE
+
+logger = logging.getLogger('PositionDedupCache')
+
+PositionKey = Tuple[int, int, int]
+
+
+class PositionDedupCache:
+    """
+    Per-flight ring of the last stored quantized positions.
+
+    A position is a duplicate only if the same flight stored it recently, so two
+    aircraft parked at the same gate never suppress each other. Memory is bounded
+    by a budget of retained positions: once the number of flights exceeds
+    max_entries / history_size, the least recently updated flights are evicted.
+    """
+
+    def __init__(self, history_size: int = 8, max_entries: int = 200000):
+        self._history_size = max(1, history_size)
+        self._max_flights = max(1, max_entries // self._history_size)
+        self._lock = threading.Lock()
+        self._rings: 'OrderedDict[str, deque]' = OrderedDict()
+
+        # Counters for monitoring
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._rings)
+
+    @staticmethod
+    def key(pos: PositionReport) -> PositionKey:
+        """Quantized (lat, lon, alt) key, same precision as the live state columns"""
+        return (
+            round(pos.lat * QUANTIZE_SCALE),
+            round(pos.lon * QUANTIZE_SCALE),
+            int(pos.alt) if pos.alt is not None else NO_ALTITUDE
+        )
+
+    def add(self, flight_id: str, key: PositionKey) -> bool:
+        """Record a position for a flight. Returns False if it was stored recently."""
+        with self._lock:
+            ring = self._rings.get(flight_id)
+            if ring is None:
+                ring = deque(maxlen=self._history_size)
+                self._rings[flight_id] = ring
+                while len(self._rings) > self._max_flights:
+                    self._rings.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._rings.move_to_end(flight_id)
+                if key in ring:
+                    self.hits += 1
+                    return False
+
+            ring.append(key)
+            self.misses += 1
+            return True
+
+    def count_hits(self, count: int):
+        """Account for duplicates already rejected before reaching the ring"""
+        with self._lock:
+            self.hits += count
+
+    def discard(self, flight_ids: Iterable[str]):
+        """Forget the rings of flights that ended"""
+        with self._lock:
+            for flight_id in flight_ids:
+                self._rings.pop(flight_id, None)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "tracked_flights": len(self._rings),
+                "max_flights": self._max_flights,
+                "history_size": self._history_size,
+            }
@@ -4,23 +4,59 @@ from datetime import datetime, timezone
 from bson import ObjectId
 
 from ..models.position_report import PositionReport
+from .live_state import LiveStateTable
+from .position_dedup import PositionDedupCache
+from .position_writer import PositionWriter
+from .active_flights import ActiveFlightsView
 
 logger = logging.getLogger('PositionManager')
 
 class PositionManager:
-    def __init__(self, config):
-        self._insert_batch_size = 200
-        self.positions_hash = set()
-        self.flight_lastpos_map = dict()
+    def __init__(self, config, live_state: LiveStateTable = None):
+        self._write_buffer_size = getattr(config, 'POSITION_WRITE_BUFFER_SIZE', 50000)
+        self._writer = None
+        # Last stored position, category and callsign per aircraft
+        self.live_state = live_state if live_state is not None else LiveStateTable()
+        # Recently stored positions per flight, catches jitter back to an earlier position
+        self._dedup = PositionDedupCache(
+            history_size=getattr(config, 'POSITION_DEDUP_HISTORY', 8),
+            max_entries=getattr(config, 'POSITION_DEDUP_MAX_ENTRIES', 200000)
+        )
+        # Flights with a recent position, shared read-only by all consumers
+        self._active_flights = ActiveFlightsView(self.live_state)
+        self._view_changed_slots = set()
         self._changed_flight_ids = set()
         self._positions_changed = False
-        self.flight_category_map = dict()  # Track last known category per flight
         self._category_changes = dict()  # Track category changes for SSE
-        self.flight_callsign_map = dict()  # Track last known callsign per flight
         self._callsign_changes = dict()  # Track callsign changes for SSE
 
     def initialize(self, repository):
         self.repository = repository
+        self._writer = PositionWriter(repository, max_pending=self._write_buffer_size)
+        self._writer.start()
+
+    def shutdown(self):
+        """Flush buffered positions to the database"""
+        if self._writer:
+            self._writer.stop()
+
+    def restore_positions(self, last_positions: Dict[str, PositionReport]) -> int:
+        """Seed the last stored position of flights already bound in the live state"""
+        live_state = self.live_state
+        count = 0
+        for flight_id, pos in last_positions.items():
+            slot = live_state.slot_of(pos.icao24)
+            if slot is not None and live_state.flight_id[slot] == flight_id:
+                live_state.set_position(slot, pos)
+                if live_state.callsign[slot] is None:
+                    live_state.callsign[slot] = pos.callsign
+                self._view_changed_slots.add(slot)
+                count += 1
+        return count
+
+    def track_restored_slots(self, slots: List[int]):
+        """Publish slots restored directly into the live state with the next view refresh"""
+        self._view_changed_slots.update(slots)
 
     def clear_changes(self):
         """Reset change tracking"""
@@ -36,165 +72,113 @@ class PositionManager:
             return
             
         now = datetime.now(timezone.utc)
+        live_state = self.live_state
         
-        flight_id_by_icao = {}                
-        existing_icao_set = set(flight_manager.modeS_flightid_map.keys())
+        slots = []
         valid_positions = []
         
-        # Filter in one pass, storing flight_id lookup for later use
+        # Filter in one pass, storing the live state slot for later use
         for pos in positions:
-            if pos.icao24 in existing_icao_set:
+            slot = live_state.slot_of(pos.icao24)
+            if slot is not None:
+                slots.append(slot)
                 valid_positions.append(pos)
-                flight_id_by_icao[pos.icao24] = flight_manager.modeS_flightid_map[pos.icao24]
                 
         if not valid_positions:
             return
-            
-        all_positions_to_insert = []
-        all_flight_updates = []
-        position_count = 0
 
-        # Process positions in batches, this avoids large arrays that could cause memory pressure
-        position_batches = [valid_positions[i:i+self._insert_batch_size] for i in range(0, len(valid_positions), self._insert_batch_size)]
-        
-        for batch in position_batches:
-            positions_to_insert, flight_updates = self._process_position_batch(
-                batch, flight_id_by_icao, now, flight_manager
-            )
-            
-            if positions_to_insert:
-                all_positions_to_insert.extend(positions_to_insert)
-                position_count += len(positions_to_insert)
-                
-            if flight_updates:
-                all_flight_updates.extend(flight_updates)
-                
-        # Perform DB operations in optimal batches
-        if all_positions_to_insert:
-            for i in range(0, len(all_positions_to_insert), self._insert_batch_size):
-                batch = all_positions_to_insert[i:i+self._insert_batch_size]
-                self.repository.insert_positions(batch)
-
-            if all_flight_updates:
-                # Remove duplicates to avoid redundant updates
-                seen_flights = set()
-                unique_updates = []
-                
-                for flight_id, timestamp in all_flight_updates:
-                    if flight_id not in seen_flights:
-                        seen_flights.add(flight_id)
-                        unique_updates.append((flight_id, timestamp))
-                        
-                self.repository.bulk_update_flight_last_contacts(unique_updates)
-
-        # Grow the position hash cache to improve hit rates, but reset if too large
-        if len(self.positions_hash) > 150000:  # Increased threshold for better caching
-            self.positions_hash = set()
-            
-    def _process_position_batch(self, batch, flight_id_by_icao, timestamp, flight_manager):
-        """Process a batch of positions efficiently"""
+        self._track_attribute_changes(slots, valid_positions)
+
+        # Quantize the whole cycle at once and compare against the stored last positions
+        store_mask = live_state.position_changed_mask(slots, valid_positions)
+
+        self._dedup.count_hits(store_mask.count(False))
+
         positions_to_insert = []
         flight_updates = []
-        
-        # Pre-compute hashes for this batch in one pass, this avoids repeated calculations
-        # Using 5 decimal places (~1 meter precision)
-        position_hashes = {}
-        for pos in batch:
-            pos_hash = hash((round(pos.lat, 5), round(pos.lon, 5), pos.alt))
-            position_hashes[pos.icao24] = pos_hash
-            
-        new_hashes = set()
-        
-        for pos in batch:
-            icao24 = pos.icao24
-            flight_id = flight_id_by_icao[icao24]
-            pos_hash = position_hashes[icao24]
-
-            # Check for category changes
-            if pos.category is not None:
-                last_category = self.flight_category_map.get(flight_id)
-                if last_category != pos.category:
-                    # Category changed - track it
-                    self.flight_category_map[flight_id] = pos.category
-                    # Convert to compact numeric format
-                    category_num = PositionReport.CATEGORY_MAP.get(pos.category)
-                    if category_num is not None:
-                        self._category_changes[str(flight_id)] = category_num
+        epoch = now.timestamp()
 
-            # Check for callsign changes
-            if pos.callsign is not None:
-                last_callsign = self.flight_callsign_map.get(flight_id)
-                if last_callsign != pos.callsign:
-                    # Callsign changed - track it
-                    self.flight_callsign_map[flight_id] = pos.callsign
-                    self._callsign_changes[str(flight_id)] = pos.callsign
-
-            if pos_hash in self.positions_hash:
+        for slot, pos, store_position in zip(slots, valid_positions, store_mask):
+            if not store_position:
                 continue
 
-            new_hashes.add(pos_hash)
-            store_position = True
-
-            if flight_id in self.flight_lastpos_map:
-                last_pos = self.flight_lastpos_map[flight_id]
+            flight_id = live_state.flight_id[slot]
+            live_state.touch(slot, epoch)
+            flight_updates.append((flight_id, now))
+            if not self._dedup.add(flight_id, PositionDedupCache.key(pos)):
+                # Jitter back to a recent position, the aircraft was still heard
+                continue
 
-                last_pos_hash = hash((
-                    round(last_pos.lat, 5),
-                    round(last_pos.lon, 5),
-                    last_pos.alt
-                ))
+            # Update in-memory cache immediately
+            live_state.set_position(slot, pos)
+            self._view_changed_slots.add(slot)
+
+            # Mark for SSE notification
+            self._positions_changed = True
+            self._changed_flight_ids.add(flight_id)
+
+            positions_to_insert.append({
+                "flight_id": ObjectId(flight_id),
+                "lat": pos.lat,
+                "lon": pos.lon,
+                "alt": pos.alt,
+                "track": pos.track,
+                "timestmp": now
+            })
+
+        # Written behind by the writer thread, coalesced with other cycles
+        if flight_updates:
+            self._writer.submit(positions_to_insert, flight_updates)
+
+    def _track_attribute_changes(self, slots, positions):
+        """Record category and callsign changes for SSE"""
+        live_state = self.live_state
+
+        for slot, pos in zip(slots, positions):
+            # Check for category changes, tracked in compact numeric format
+            if pos.category is not None:
+                category_num = PositionReport.CATEGORY_MAP.get(pos.category)
+                if category_num is not None and live_state.category[slot] != category_num:
+                    live_state.category[slot] = category_num
+                    self._view_changed_slots.add(slot)
+                    self._category_changes[live_state.flight_id[slot]] = category_num
 
-                if last_pos_hash == pos_hash:
-                    store_position = False
+            # Check for callsign changes
+            if pos.callsign is not None and live_state.callsign[slot] != pos.callsign:
+                live_state.callsign[slot] = pos.callsign
+                self._view_changed_slots.add(slot)
+                self._callsign_changes[live_state.flight_id[slot]] = pos.callsign
+    
+    def discard_flights(self, flight_ids: List[str]):
+        """Drop per-flight dedup history of flights evicted from the live state"""
+        self._dedup.discard(flight_ids)
 
-            if store_position:
+    def remove_flights(self, ended: Dict[int, str]):
+        """Take flights released from the live state out of the active view at the next refresh"""
+        self._view_changed_slots.update(ended)
+        self._dedup.discard(ended.values())
 
-                # Update in-memory cache immediately
-                flight_manager.flight_last_contact[flight_id] = timestamp
-                self.flight_lastpos_map[flight_id] = pos
+    def get_dedup_stats(self) -> Dict[str, int]:
+        """Hit/miss counters and occupancy of the position dedup cache"""
+        return self._dedup.get_stats()
 
-                # Mark for WebSocket notification
-                self._positions_changed = True
-                self._changed_flight_ids.add(str(flight_id))
+    def refresh_active_flights(self):
+        """Publish this cycle's changes to the active flights view, once per ingest cycle"""
+        changed_slots = self._view_changed_slots
+        self._view_changed_slots = set()
+        self._active_flights.refresh(changed_slots)
 
-                position_doc = {
-                    "flight_id": ObjectId(flight_id),
-                    "lat": pos.lat,
-                    "lon": pos.lon,
-                    "alt": pos.alt,
-                    "track": pos.track,
-                    "timestmp": timestamp
-                }
+    def get_removed_flight_ids(self):
+        """Get the set of flight IDs that left the active flights view in the last refresh"""
+        return self._active_flights.removed_flight_ids
 
-                positions_to_insert.append(position_doc)
+    def get_cached_flights_in(self, bbox) -> Dict[str, PositionReport]:
+        """Get cached flights inside a bounding box, read-only"""
+        return self._active_flights.in_bbox(bbox)
 
-                flight_updates.append((flight_id, timestamp))
-        
-        self.positions_hash.update(new_hashes)
-        
-        return positions_to_insert, flight_updates
-    
     def get_cached_flights(self, flight_manager) -> Dict[str, PositionReport]:
-        """Get all cached flights with a recent position report (within the last minute)"""
-        from datetime import timedelta
-        from ..utils.time_util import make_datetimes_comparable
-        
-        timestamp = datetime.now(timezone.utc) - timedelta(minutes=1)
-        
-        result = {}
-        for k, v in flight_manager.modeS_flightid_map.items():
-            if v in self.flight_lastpos_map:
-                
-                last_contact = flight_manager.flight_last_contact[v]
-                
-                comparable_last_contact, comparable_timestamp = make_datetimes_comparable(
-                    last_contact, timestamp
-                )
-                
-                if comparable_last_contact > comparable_timestamp:
-                    result[v] = self.flight_lastpos_map[v]
-                    
-        return result
+        """Get all cached flights with a recent position report (within the last minute), read-only"""
+        return self._active_flights.snapshot
         
     def has_positions_changed(self):
         """Check if positions have changed since last update"""
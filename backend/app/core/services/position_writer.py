@@ -0,0 +1,198 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger('PositionWriter')
+
+
+class PositionWriter:
+    """
+    Write-behind buffer for position documents and flight last_contact updates.
+
+    The ingest cycle only appends to in-memory buffers; a dedicated writer thread
+    coalesces them across cycles into large unordered inserts and a single bulk
+    last_contact update per flight. When the buffer is full the producer blocks
+    for up to backpressure_timeout seconds before the oldest positions are dropped.
+    Positions the database reported as not inserted and failed last_contact
+    updates are put back at the front of the buffer and retried with backoff;
+    while the database is down the buffer limit decides what is dropped. The
+    positions collection is a time-series collection without a unique _id, so
+    positions that may have been stored (timeouts, lost connections) are never
+    retried, that would duplicate them.
+    """
+    RETRY_DELAY_SEC = 1.0
+    MAX_RETRY_DELAY_SEC = 30.0
+
+    def __init__(self, repository, max_pending: int = 50000, max_batch: int = 5000,
+                 flush_interval: float = 1.0, backpressure_timeout: float = 5.0):
+        self._repository = repository
+        self._max_pending = max_pending
+        self._max_batch = max_batch
+        self._flush_interval = flush_interval
+        self._backpressure_timeout = backpressure_timeout
+
+        self._cond = threading.Condition()
+        self._positions: List[Dict[str, Any]] = []
+        self._last_contacts: Dict[str, datetime] = {}
+        self._in_flight = 0
+        self._failures = 0  # Consecutive failed writes, drives the retry backoff
+        self._stopping = False
+        self._thread = None
+
+        # Counters for monitoring
+        self.positions_written = 0
+        self.positions_dropped = 0
+        self.write_errors = 0
+
+    def start(self):
+        """Start the writer thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='position-writer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Flush everything still buffered and stop the writer thread"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning(f"Writer did not finish within {timeout}s, {self.pending_count()} positions not written")
+            self._thread = None
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._positions)
+
+    def submit(self, positions: List[Dict[str, Any]], last_contacts: List[Tuple[str, datetime]]):
+        """Queue positions and last_contact updates, repeated flights keep the latest timestamp"""
+        with self._cond:
+            if len(self._positions) + len(positions) > self._max_pending and not self._stopping:
+                self._cond.notify_all()
+                self._cond.wait_for(
+                    lambda: len(self._positions) + len(positions) <= self._max_pending or self._stopping,
+                    timeout=self._backpressure_timeout
+                )
+
+            self._positions.extend(positions)
+            overflow = len(self._positions) - self._max_pending
+            if overflow > 0:
+                del self._positions[:overflow]
+                self.positions_dropped += overflow
+                logger.warning(f"Write-behind buffer full, dropped {overflow} oldest positions")
+
+            for flight_id, timestamp in last_contacts:
+                current = self._last_contacts.get(flight_id)
+                if current is None or timestamp > current:
+                    self._last_contacts[flight_id] = timestamp
+
+            if len(self._positions) >= self._max_batch:
+                self._cond.notify_all()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until everything queued so far has been written"""
+        with self._cond:
+            self._cond.notify_all()
+            return self._cond.wait_for(
+                lambda: not self._positions and not self._last_contacts and not self._in_flight,
+                timeout=timeout
+            )
+
+    def _run(self):
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self._flush_interval
+                while not self._stopping and len(self._positions) < self._max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                positions = self._positions[:self._max_batch]
+                del self._positions[:self._max_batch]
+                last_contacts = self._last_contacts
+                self._last_contacts = {}
+                self._in_flight = len(positions) + len(last_contacts)
+                stopping = self._stopping and not self._positions
+                # Space was freed for blocked producers
+                self._cond.notify_all()
+
+            written = self._write(positions, last_contacts)
+
+            with self._cond:
+                self._in_flight = 0
+                self._cond.notify_all()
+                if not written and not self._stopping:
+                    # Back off before retrying, producers keep filling the buffer meanwhile
+                    delay = min(self.RETRY_DELAY_SEC * 2 ** (self._failures - 1), self.MAX_RETRY_DELAY_SEC)
+                    self._cond.wait_for(lambda: self._stopping, timeout=delay)
+
+            if stopping:
+                break
+
+    def _write(self, positions: List[Dict[str, Any]], last_contacts: Dict[str, datetime]) -> bool:
+        """Write a batch, what is known to be unwritten is put back for a retry"""
+        failed = False
+        retry_positions = []
+        if positions:
+            try:
+                self._repository.insert_positions(positions)
+                self.positions_written += len(positions)
+            except BulkWriteError as e:
+                # Unordered insert, everything not listed in writeErrors was stored
+                retry_positions = [positions[error["index"]] for error in e.details.get("writeErrors", [])]
+                self.positions_written += e.details.get("nInserted", 0)
+                failed = True
+                logger.error(f"Failed to write {len(retry_positions)} of {len(positions)} positions, "
+                             f"retrying them: {str(e)}")
+            except Exception as e:
+                # Unknown which positions were stored, retrying could duplicate them
+                self.positions_dropped += len(positions)
+                failed = True
+                logger.error(f"Failed to write {len(positions)} positions, dropped them: {str(e)}")
+
+        if last_contacts:
+            try:
+                self._repository.bulk_update_flight_last_contacts(list(last_contacts.items()))
+                last_contacts = {}
+            except Exception as e:
+                # Idempotent $set, safe to retry
+                failed = True
+                logger.error(f"Failed to update {len(last_contacts)} last contacts, retrying: {str(e)}")
+
+        if not failed:
+            self._failures = 0
+            return True
+
+        self.write_errors += 1
+        self._failures += 1
+        self._requeue(retry_positions, last_contacts)
+        return False
+
+    def _requeue(self, positions: List[Dict[str, Any]], last_contacts: Dict[str, datetime]):
+        with self._cond:
+            if self._stopping:
+                # The writer thread exits after this batch, nothing would retry it
+                self.positions_dropped += len(positions)
+                logger.warning(f"Stopping, dropped {len(positions)} positions of the failed write")
+                return
+
+            self._positions[:0] = positions
+            overflow = len(self._positions) - self._max_pending
+            if overflow > 0:
+                # The failed batch is the oldest data in the buffer
+                del self._positions[:overflow]
+                self.positions_dropped += overflow
+                logger.warning(f"Write-behind buffer full, dropped {overflow} positions of the failed write")
+
+            for flight_id, timestamp in last_contacts.items():
+                current = self._last_contacts.get(flight_id)
+                if current is None or timestamp > current:
+                    self._last_contacts[flight_id] = timestamp
@@ -0,0 +1,128 @@
+import logging
+import threading
+from typing import Dict, List, Set
+
+from ..models.position_report import PositionReport
+
+logger = logging.getLogger('StreamIngestor')
+
+
+class StreamIngestor:
+    """
+    Push-based ingestion from a radar service exposing a StreamUpdates RPC.
+
+    A background thread consumes ADD/UPDATE/REMOVE deltas and keeps only the
+    latest report per aircraft until the next update cycle drains them, along with
+    the aircraft removed since. When the stream breaks or a delta cannot be applied
+    it reconnects with exponential backoff; every (re)connect asks for an initial
+    snapshot so no aircraft is lost across reconnects.
+    """
+
+    BASE_BACKOFF_SECONDS = 1
+    MAX_BACKOFF_SECONDS = 60
+
+    def __init__(self, radar_service, update_interval_ms: int = 500):
+        self._radar_service = radar_service
+        self._update_interval_ms = update_interval_ms
+        self._lock = threading.Lock()
+        self._pending: Dict[str, PositionReport] = {}
+        self._removed: Set[str] = set()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._retry_count = 0
+
+        # Counters for monitoring
+        self.updates_received = 0
+        self.removals_received = 0
+        self.reconnects = 0
+
+    def start(self):
+        """Start consuming the update stream in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='stream-ingestor', daemon=True)
+        self._thread.start()
+        logger.info(f"Streaming ingestion started (update interval {self._update_interval_ms}ms)")
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the background thread and cancel the active stream"""
+        self._stop_event.set()
+        self._radar_service.cancel_stream()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        logger.info("Streaming ingestion stopped")
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def drain(self) -> List[PositionReport]:
+        """Return the latest report of every aircraft updated since the last drain"""
+        with self._lock:
+            if not self._pending:
+                return []
+            pending = self._pending
+            self._pending = {}
+        return list(pending.values())
+
+    def drain_removed(self) -> Set[str]:
+        """Return the icao24 of every aircraft removed since the last drain and not seen again"""
+        with self._lock:
+            removed = self._removed
+            self._removed = set()
+        return removed
+
+    def _backoff_seconds(self) -> float:
+        """Exponential backoff: base * 2^(retry_count-1), capped at max"""
+        if self._retry_count == 0:
+            return 0
+        backoff = self.BASE_BACKOFF_SECONDS * (2 ** (self._retry_count - 1))
+        return min(backoff, self.MAX_BACKOFF_SECONDS)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                stream = self._radar_service.stream_updates(
+                    include_initial_snapshot=True,
+                    update_interval_ms=self._update_interval_ms
+                )
+
+                received = False
+                for update in stream or ():
+                    if self._stop_event.is_set():
+                        break
+                    if not received:
+                        received = True
+                        self._retry_count = 0
+                    self._apply(update)
+            except Exception as e:
+                logger.exception(f"Update stream failed: {str(e)}")
+                self._radar_service.cancel_stream()
+
+            if self._stop_event.is_set():
+                break
+
+            self._retry_count += 1
+            self.reconnects += 1
+            backoff = self._backoff_seconds()
+            logger.warning(f"Update stream ended, reconnecting in {backoff}s (attempt #{self._retry_count})")
+            self._stop_event.wait(backoff)
+
+    def _apply(self, update: dict):
+        """Merge a single stream update into the pending deltas"""
+        if update['update_type'] == 'UPDATE_TYPE_REMOVE':
+            with self._lock:
+                self._pending.pop(update['icao_address'], None)
+                self._removed.add(update['icao_address'])
+            self.removals_received += 1
+            return
+
+        plane = update['plane']
+        if not plane.icao24:
+            return
+
+        with self._lock:
+            self._pending[plane.icao24] = plane
+            self._removed.discard(plane.icao24)
+        self.updates_received += 1
@@ -1,6 +1,8 @@
 import json
 import string
+from bisect import bisect_right
 from os import path
+from typing import Dict, Iterable, List, Set
 
 
 class ModesUtil:
@@ -9,8 +11,13 @@ class ModesUtil:
 
     Military ranges are loaded from mil_ranges.json, sourced from:
     https://github.com/wiedehopf/tar1090-db
+
+    Lookups bisect over the merged, sorted range boundaries and are memoized
+    per address, the same aircraft are classified every update cycle.
     """
 
+    MAX_CACHED_ADDRESSES = 100000
+
     def __init__(self, folder):
         self.ranges = []
 
@@ -24,6 +31,17 @@ class ModesUtil:
                 end = int(range_pair[1], 16)
                 self.ranges.append((start, end))
 
+        # Non-overlapping ranges sorted by start, for bisect lookups
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        for start, end in sorted(self.ranges):
+            if self._ends and start <= self._ends[-1] + 1:
+                self._ends[-1] = max(self._ends[-1], end)
+            else:
+                self._starts.append(start)
+                self._ends.append(end)
+        self._cache: Dict[str, bool] = {}
+
     @staticmethod
     def is_icao24_addr(icao24: str):
         return len(icao24) == 6 and all(c in string.hexdigits for c in icao24)
@@ -38,12 +56,39 @@ class ModesUtil:
         Returns:
             True if the address is in a military range
         """
-        icao_nr = int(icao24, 16)
+        military = self._cache.get(icao24)
+        if military is None:
+            military = self._in_ranges(int(icao24, 16))
+            if len(self._cache) >= self.MAX_CACHED_ADDRESSES:
+                self._cache.clear()
+            self._cache[icao24] = military
+        return military
 
-        for start, end in self.ranges:
-            if start <= icao_nr <= end:
-                return True
-        return False
+    def military_subset(self, icao24s: Iterable[str]) -> Set[str]:
+        """Classifies a whole update cycle at once, returns the military addresses"""
+        cache = self._cache
+        military = set()
+        unknown = set()
+        for icao24 in icao24s:
+            cached = cache.get(icao24)
+            if cached is None:
+                unknown.add(icao24)
+            elif cached:
+                military.add(icao24)
+
+        if unknown:
+            if len(cache) + len(unknown) > self.MAX_CACHED_ADDRESSES:
+                cache.clear()
+            in_ranges = self._in_ranges
+            for icao24 in unknown:
+                cache[icao24] = is_mil = in_ranges(int(icao24, 16))
+                if is_mil:
+                    military.add(icao24)
+        return military
+
+    def _in_ranges(self, icao_nr: int) -> bool:
+        i = bisect_right(self._starts, icao_nr) - 1
+        return i >= 0 and icao_nr <= self._ends[i]
 
     @staticmethod
     def is_swiss_mil(icao: int) -> bool:
@@ -0,0 +1,118 @@
+import math
+import threading
+from typing import Dict, Hashable, Iterable, NamedTuple, Optional, Set, Tuple
+
+Cell = Tuple[int, int]
+
+
+class BoundingBox(NamedTuple):
+    """Map viewport in degrees. west > east means the box crosses the antimeridian."""
+    south: float
+    west: float
+    north: float
+    east: float
+
+    @staticmethod
+    def parse(value: Optional[str]) -> Optional['BoundingBox']:
+        """Parse 'south,west,north,east', raises ValueError for malformed boxes"""
+        if not value:
+            return None
+        parts = [float(v) for v in value.split(',')]
+        if len(parts) != 4:
+            raise ValueError("Bounding box must be 'south,west,north,east'")
+        return BoundingBox.of(*parts)
+
+    @staticmethod
+    def of(south: float, west: float, north: float, east: float) -> 'BoundingBox':
+        if not (-90 <= south <= north <= 90):
+            raise ValueError("Bounding box latitudes must satisfy -90 <= south <= north <= 90")
+        if not (-180 <= west <= 180 and -180 <= east <= 180):
+            raise ValueError("Bounding box longitudes must be within -180..180")
+        return BoundingBox(south, west, north, east)
+
+    def contains(self, lat: float, lon: float) -> bool:
+        if not self.south <= lat <= self.north:
+            return False
+        if self.west <= self.east:
+            return self.west <= lon <= self.east
+        return lon >= self.west or lon <= self.east
+
+
+class GridIndex:
+    """
+    Uniform lat/lon grid mapping keys to the cell of their last position.
+
+    Queries visit only the cells overlapping a bounding box, or scan all keys
+    when that would be cheaper (e.g. a zoomed-out world view).
+    """
+
+    def __init__(self, cell_deg: float = 1.0):
+        self._cell_deg = cell_deg
+        self._lock = threading.Lock()
+        self._cells: Dict[Cell, Set[Hashable]] = {}
+        self._positions: Dict[Hashable, Tuple[float, float]] = {}
+        self._cell_of: Dict[Hashable, Cell] = {}
+
+    def __len__(self):
+        return len(self._positions)
+
+    def _cell(self, lat: float, lon: float) -> Cell:
+        return int(math.floor(lat / self._cell_deg)), int(math.floor(lon / self._cell_deg))
+
+    def update(self, key: Hashable, lat: float, lon: float):
+        cell = self._cell(lat, lon)
+        with self._lock:
+            self._positions[key] = (lat, lon)
+            current = self._cell_of.get(key)
+            if current == cell:
+                return
+            if current is not None:
+                self._discard(key, current)
+            self._cells.setdefault(cell, set()).add(key)
+            self._cell_of[key] = cell
+
+    def remove(self, key: Hashable):
+        with self._lock:
+            self._positions.pop(key, None)
+            cell = self._cell_of.pop(key, None)
+            if cell is not None:
+                self._discard(key, cell)
+
+    def _discard(self, key: Hashable, cell: Cell):
+        keys = self._cells.get(cell)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._cells[cell]
+
+    def _lon_ranges(self, bbox: BoundingBox) -> Iterable[Tuple[int, int]]:
+        if bbox.west <= bbox.east:
+            return [(self._cell(0, bbox.west)[1], self._cell(0, bbox.east)[1])]
+        return [(self._cell(0, bbox.west)[1], self._cell(0, 180)[1]),
+                (self._cell(0, -180)[1], self._cell(0, bbox.east)[1])]
+
+    def query(self, bbox: BoundingBox) -> Set[Hashable]:
+        """All keys whose last position lies inside the bounding box"""
+        row_start, row_end = self._cell(bbox.south, 0)[0], self._cell(bbox.north, 0)[0]
+        lon_ranges = self._lon_ranges(bbox)
+        cell_count = (row_end - row_start + 1) * sum(end - start + 1 for start, end in lon_ranges)
+
+        result = set()
+        with self._lock:
+            if cell_count >= len(self._cells):
+                candidates = self._positions.keys()
+            else:
+                candidates = []
+                for row in range(row_start, row_end + 1):
+                    for start, end in lon_ranges:
+                        for col in range(start, end + 1):
+                            keys = self._cells.get((row, col))
+                            if keys:
+                                candidates.extend(keys)
+
+            positions = self._positions
+            for key in candidates:
+                lat, lon = positions[key]
+                if bbox.contains(lat, lon):
+                    result.add(key)
+        return result
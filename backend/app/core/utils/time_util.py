@@ -32,3 +32,13 @@ def make_datetimes_comparable(dt1: datetime, dt2: datetime) -> Tuple[datetime, d
     
     # This shouldn't happen given the checks above, but just in case
     return dt1, dt2
+
+
+def to_epoch_seconds(dt: datetime) -> float:
+    """
+    Converts a datetime to POSIX seconds. Naive datetimes (as returned by
+    MongoDB) are treated as UTC rather than local time.
+    """
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
@@ -1,39 +1,55 @@
 import logging
 import threading
 from collections import deque
-from typing import Set, Optional
+from typing import Dict, Iterable, Set
 
 logger = logging.getLogger(__name__)
 
 
 class SharedAircraftQueue:
-    """Thread-safe shared queue for new aircraft between flight updater and crawler."""
+    """
+    Thread-safe bounded queue of aircraft between the flight updater and the
+    metadata classification stage. An address is queued at most once until it
+    is taken; when the queue is full further addresses are dropped, they are
+    offered again with the next cycle.
+    """
     
     def __init__(self, max_size: int = 10000):
         self.max_size = max_size
-        self._queue: deque[str] = deque(maxlen=max_size)
-        self._known_aircraft: Set[str] = set()
+        self._queue: deque[str] = deque()
+        self._pending: Set[str] = set()
         self._lock = threading.RLock()
+        self.total_added = 0
+        self.total_dropped = 0
     
-    def add_aircraft(self, icao24s: Set[str]) -> int:
+    def add_aircraft(self, icao24s: Iterable[str]) -> int:
         """
-        Add new aircraft to the queue if not already seen.
+        Add aircraft to the queue if not already pending.
         
         Args:
-            icao24s: Set of ICAO24 addresses to add
+            icao24s: ICAO24 addresses to add
             
         Returns:
             Number of new aircraft added
         """
         with self._lock:
             new_count = 0
+            dropped = 0
             for icao24 in icao24s:
-                if icao24 not in self._known_aircraft:
-                    self._queue.append(icao24)
-                    self._known_aircraft.add(icao24)
-                    new_count += 1
-                    
-            if new_count > 0:
+                if icao24 in self._pending:
+                    continue
+                if len(self._queue) >= self.max_size:
+                    dropped += 1
+                    continue
+                self._queue.append(icao24)
+                self._pending.add(icao24)
+                new_count += 1
+
+            self.total_added += new_count
+            if dropped:
+                self.total_dropped += dropped
+                logger.debug(f"Shared aircraft queue full, dropped {dropped} aircraft")
+            elif new_count > 0:
                 logger.debug(f"Added {new_count} new aircraft to shared queue")
                 
             return new_count
@@ -50,12 +66,11 @@ class SharedAircraftQueue:
         """
         with self._lock:
             aircraft = set()
-            items_retrieved = 0
             
-            while self._queue and items_retrieved < max_items:
+            while self._queue and len(aircraft) < max_items:
                 icao24 = self._queue.popleft()
+                self._pending.discard(icao24)
                 aircraft.add(icao24)
-                items_retrieved += 1
                 
             if aircraft:
                 logger.debug(f"Retrieved {len(aircraft)} aircraft from shared queue")
@@ -66,14 +81,18 @@ class SharedAircraftQueue:
         """Get current queue size"""
         with self._lock:
             return len(self._queue)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._queue), "total_added": self.total_added, "total_dropped": self.total_dropped}
     
     def clear(self) -> None:
-        """Clear the queue and known aircraft set"""
+        """Clear the queue"""
         with self._lock:
             self._queue.clear()
-            self._known_aircraft.clear()
+            self._pending.clear()
             logger.info("Cleared shared aircraft queue")
 
 
 # Global shared queue instance
-shared_aircraft_queue = SharedAircraftQueue()
\ No newline at end of file
+shared_aircraft_queue = SharedAircraftQueue()
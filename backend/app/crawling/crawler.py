@@ -11,17 +11,22 @@ from ..core.utils.logging import init_logging
 from .utils.source_backoff import CircuitBreakerRegistry
 
 import logging
+import threading
 import time
 from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 logger = logging.getLogger("Crawler")
 
 # Maximum number of activity entries to keep
 MAX_ACTIVITY_ENTRIES = 50
 
+# Longest a query waits for its source's rate limit before the source is skipped
+RATE_LIMIT_MAX_WAIT_SEC = 30
+
 
 @dataclass
 class CrawlActivity:
@@ -95,6 +100,13 @@ class AirplaneCrawler:
         circuit_breaker_threshold = getattr(config, 'CRAWLER_CIRCUIT_BREAKER_THRESHOLD', 5)
         circuit_breaker_base_reset_sec = getattr(config, 'CRAWLER_CIRCUIT_BREAKER_BASE_RESET_SEC', 60)
         circuit_breaker_max_reset_sec = getattr(config, 'CRAWLER_CIRCUIT_BREAKER_MAX_RESET_SEC', 1800)
+        concurrency = max(1, getattr(config, 'CRAWLER_CONCURRENCY', 8))
+        source_concurrency = max(1, getattr(config, 'CRAWLER_SOURCE_CONCURRENCY', 2))
+        self._hedge_sources = max(1, getattr(config, 'CRAWLER_HEDGE_SOURCES', 2))
+        self._hedge_delay = max(0, getattr(config, 'CRAWLER_HEDGE_DELAY_MS', 500)) / 1000.0
+        source_rate = getattr(config, 'CRAWLER_SOURCE_RATE', 2.0)
+        source_max_rate = getattr(config, 'CRAWLER_SOURCE_MAX_RATE', 20.0)
+        source_latency_target_ms = getattr(config, 'CRAWLER_SOURCE_LATENCY_TARGET_MS', 2000)
 
         self.aircraft_repo = AircraftRepository(mongodb)
         self.processing_repo = AircraftProcessingRepository(
@@ -104,11 +116,14 @@ class AirplaneCrawler:
         )
         self.log_repo = CrawlerLogRepository(mongodb)
 
-        # Circuit breaker registry for all sources (with exponential backoff)
+        # Circuit breaker registry for all sources (with exponential backoff and adaptive rate limits)
         self.circuit_breakers = CircuitBreakerRegistry(
             failure_threshold=circuit_breaker_threshold,
             base_reset_seconds=circuit_breaker_base_reset_sec,
-            max_reset_seconds=circuit_breaker_max_reset_sec
+            max_reset_seconds=circuit_breaker_max_reset_sec,
+            rate=source_rate,
+            max_rate=source_max_rate,
+            latency_target_sec=source_latency_target_ms / 1000.0
         )
 
         self.sources: List[AircraftMetadataSource] = [
@@ -128,27 +143,64 @@ class AirplaneCrawler:
         # Volatile source enabled state (resets on restart)
         self._source_enabled: dict[str, bool] = {source.name(): True for source in self.sources}
 
-    def _query_aircraft_metadata(self, icao24: str) -> CrawlResult:
-        """
-        Query metadata sources for aircraft information.
-
-        Queries sources in order until complete data is found.
-        If no source provides complete data, returns the best merged
-        partial result from all sources.
+        # Aircraft of a batch are crawled in parallel, each source takes a bounded number of requests at a time
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='Crawler')
+        self._source_slots: dict[str, threading.BoundedSemaphore] = {
+            source.name(): threading.BoundedSemaphore(source_concurrency) for source in self.sources
+        }
+        # Source queries run on their own pool, waiting on them from a crawler thread can't starve it
+        self._query_executor = ThreadPoolExecutor(
+            max_workers=concurrency * self._hedge_sources, thread_name_prefix='CrawlerQuery'
+        )
 
-        Returns a CrawlResult that distinguishes between:
-        - Aircraft found (complete or partial)
-        - Aircraft not found in any source (permanent failure)
-        - Service errors occurred (temporary failure, should retry)
+    def _query_source(self, source: AircraftMetadataSource, icao24: str,
+                      abandoned: threading.Event) -> Tuple[Optional[QueryResult], SourceQueryLog]:
         """
-        best_result: Optional[Aircraft] = None
-        sources_used: List[str] = []
-        had_service_error = False
-        any_not_found = False  # Track if any source confirmed "not found"
-        any_source_queried = False  # Track if we actually queried any source
-        query_logs: List[SourceQueryLog] = []
+        Query a source on a query thread and record the outcome with its circuit breaker.
+        Waits for the source's rate limit and while it already has its maximum of requests
+        in flight. The outcome is recorded here so queries abandoned by a hedged lookup
+        still count for the breaker, a query abandoned before it got a token is not sent.
+        """
+        source_name = source.name()
+        wait_start = time.time()
+        if not self.circuit_breakers.acquire_token(source_name, RATE_LIMIT_MAX_WAIT_SEC, abandoned):
+            if not abandoned.is_set():
+                logger.debug(f'Skipping {source_name} for {icao24} - rate limited')
+            return None, SourceQueryLog(
+                source=source_name,
+                status='skipped_rate_limit',
+                duration_ms=int((time.time() - wait_start) * 1000),
+            )
 
-        for source in self.sources:
+        try:
+            with self._source_slots[source_name]:
+                start_time = time.time()
+                result = source.query_aircraft_with_status(icao24)
+        except Exception as e:
+            logger.warning(f'Unexpected error from {source_name} for {icao24}: {e}')
+            self.circuit_breakers.record_failure(source_name)
+            return None, SourceQueryLog(source=source_name, status='exception', duration_ms=0, error=str(e))
+        latency = time.time() - start_time
+
+        if result.status == QueryStatus.SERVICE_ERROR:
+            # 429, 5xx and timeouts, the source is throttling or struggling
+            self.circuit_breakers.record_failure(source_name, latency)
+            logger.warning(f'Service error from {source_name} for {icao24}: {result.error_message}')
+        else:
+            # Not found is a definitive answer from a working source
+            self.circuit_breakers.record_success(source_name, latency)
+
+        return result, SourceQueryLog(
+            source=source_name,
+            status=result.status.value,
+            duration_ms=int(latency * 1000),
+            payload=result.raw_payload,
+            error=result.error_message,
+        )
+
+    def _next_source(self, sources, icao24: str, query_logs: List[SourceQueryLog]) -> Optional[AircraftMetadataSource]:
+        """Next source in priority order that accepts the aircraft and may be queried"""
+        for source in sources:
             if not source.accept(icao24):
                 continue
 
@@ -159,7 +211,7 @@ class AirplaneCrawler:
                 logger.debug(f'Skipping {source_name} - disabled by admin')
                 continue
 
-            # Check circuit breaker before querying
+            # Check circuit breaker right before querying, a half-open breaker hands out its probe here
             if not self.circuit_breakers.is_source_available(source_name):
                 logger.debug(f'Skipping {source_name} - circuit breaker open')
                 # Don't set had_service_error here - circuit breaker skips shouldn't
@@ -171,96 +223,107 @@ class AirplaneCrawler:
                 ))
                 continue
 
-            try:
-                start_time = time.time()
-                result = source.query_aircraft_with_status(icao24)
-                duration_ms = int((time.time() - start_time) * 1000)
+            return source
+        return None
 
-                # Create query log entry
-                query_log = SourceQueryLog(
-                    source=source_name,
-                    status=result.status.value,
-                    duration_ms=duration_ms,
-                    payload=result.raw_payload,
-                    error=result.error_message,
-                )
-                query_logs.append(query_log)
+    def _query_aircraft_metadata(self, icao24: str) -> CrawlResult:
+        """
+        Query metadata sources for aircraft information.
 
+        Sources are asked in priority order. A source that has not answered
+        within the hedge delay gets the next source queried alongside it, up to
+        the hedge limit of sources in flight. Answers are merged as they arrive
+        and outstanding queries are abandoned once the data is complete or
+        sufficient. If no source provides complete data, returns the best
+        merged partial result from all sources.
+
+        Returns a CrawlResult that distinguishes between:
+        - Aircraft found (complete or partial)
+        - Aircraft not found in any source (permanent failure)
+        - Service errors occurred (temporary failure, should retry)
+        """
+        best_result: Optional[Aircraft] = None
+        sources_used: List[str] = []
+        had_service_error = False
+        any_not_found = False  # Track if any source confirmed "not found"
+        any_source_queried = False  # Track if we actually queried any source
+        query_logs: List[SourceQueryLog] = []
+
+        sources = iter(self.sources)
+        sources_exhausted = False
+        pending: Dict[Future, Tuple[str, float]] = {}
+        abandoned = threading.Event()
+        last_launch = 0.0
+
+        while True:
+            # Launch the next source when nothing is in flight or the ones in flight are slow
+            while not sources_exhausted and len(pending) < self._hedge_sources and (
+                    not pending or time.time() - last_launch >= self._hedge_delay):
+                source = self._next_source(sources, icao24, query_logs)
+                if source is None:
+                    sources_exhausted = True
+                    break
+                last_launch = time.time()
+                pending[self._query_executor.submit(self._query_source, source, icao24, abandoned)] = (source.name(), last_launch)
+                if len(pending) > 1:
+                    logger.debug(f'Hedging {icao24} with {source.name()}')
+
+            if not pending:
+                break
+
+            timeout = None
+            if not sources_exhausted and len(pending) < self._hedge_sources:
+                timeout = max(0.0, last_launch + self._hedge_delay - time.time())
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                source_name, _ = pending.pop(future)
+                result, query_log = future.result()
+                query_logs.append(query_log)
+                if query_log.status == 'skipped_rate_limit':
+                    # Like a circuit breaker skip, the source gave no answer
+                    continue
                 any_source_queried = True
 
-                if result.status == QueryStatus.SERVICE_ERROR:
-                    # Service error - record failure and continue to next source
-                    self.circuit_breakers.record_failure(source_name)
+                if result is None or result.status == QueryStatus.SERVICE_ERROR:
                     had_service_error = True
-                    logger.warning(f'Service error from {source_name} for {icao24}: {result.error_message}')
                     continue
 
                 if result.status == QueryStatus.NOT_FOUND:
-                    # Not found in this source - this is a definitive answer from a working source
-                    self.circuit_breakers.record_success(source_name)  # Service is working
                     any_not_found = True  # At least one source confirmed "not found"
                     logger.debug(f'Aircraft {icao24} not found in {source_name}')
                     continue
 
-                # Success or partial data
-                self.circuit_breakers.record_success(source_name)
+                # Success or partial data - merge with best result so far
                 aircraft = result.aircraft
+                if not aircraft:
+                    continue
+                if best_result is None:
+                    best_result = aircraft
+                    sources_used.append(source_name)
+                    logger.debug(f'Data for {icao24} from {source_name}')
+                elif best_result.merge(aircraft):
+                    sources_used.append(source_name)
+                    logger.debug(f'Merged additional data for {icao24} from {source_name}')
+
+            if best_result is None:
+                continue
 
-                if aircraft:
-                    if aircraft.is_complete_with_operator():
-                        # Found complete data, return immediately
-                        logger.info(f'Found complete data for {icao24} from {source_name}')
-                        return CrawlResult(
-                            aircraft=aircraft,
-                            had_service_error=had_service_error,
-                            all_not_found=False,
-                            query_logs=query_logs
-                        )
-
-                    # Partial data - merge with best result so far
-                    if best_result is None:
-                        best_result = aircraft
-                        sources_used.append(source_name)
-                        logger.debug(f'Partial data for {icao24} from {source_name}')
-                    else:
-                        if best_result.merge(aircraft):
-                            sources_used.append(source_name)
-                            logger.debug(f'Merged additional data for {icao24} from {source_name}')
-
-                    # Check if merged result is now complete
-                    if best_result.is_complete_with_operator():
-                        best_result.source = '+'.join(sources_used)
-                        logger.info(f'Merged complete data for {icao24} from {best_result.source}')
-                        return CrawlResult(
-                            aircraft=best_result,
-                            had_service_error=had_service_error,
-                            all_not_found=False,
-                            query_logs=query_logs
-                        )
-
-                    # Early stop if we have sufficient data (3 of 4 key fields)
-                    # This avoids unnecessary calls to remaining sources
-                    if _is_sufficient(best_result):
-                        best_result.source = '+'.join(sources_used)
-                        logger.info(f'Sufficient data for {icao24} from {best_result.source}, stopping early')
-                        return CrawlResult(
-                            aircraft=best_result,
-                            had_service_error=had_service_error,
-                            all_not_found=False,
-                            query_logs=query_logs
-                        )
-
-            except Exception as e:
-                logger.warning(f'Unexpected error from {source_name} for {icao24}: {e}')
-                self.circuit_breakers.record_failure(source_name)
-                had_service_error = True
-                any_source_queried = True
-                query_logs.append(SourceQueryLog(
-                    source=source_name,
-                    status='exception',
-                    duration_ms=0,
-                    error=str(e),
-                ))
+            # Early stop if complete or sufficient (3 of 4 key fields)
+            # This avoids waiting for or calling remaining sources
+            complete = best_result.is_complete_with_operator()
+            if complete or _is_sufficient(best_result):
+                abandoned.set()
+                self._abandon_queries(pending, query_logs)
+                if len(sources_used) > 1:
+                    best_result.source = '+'.join(sources_used)
+                logger.info(f'{"Complete" if complete else "Sufficient"} data for {icao24} from {best_result.source}')
+                return CrawlResult(
+                    aircraft=best_result,
+                    had_service_error=had_service_error,
+                    all_not_found=False,
+                    query_logs=query_logs
+                )
 
         # Return best partial result (may still be incomplete)
         if best_result and len(sources_used) > 1:
@@ -288,6 +351,19 @@ class AirplaneCrawler:
             query_logs=query_logs
         )
 
+    def _abandon_queries(self, pending: Dict[Future, Tuple[str, float]], query_logs: List[SourceQueryLog]) -> None:
+        """Cancel queries that have not started, running ones finish in the background and are ignored"""
+        now = time.time()
+        for future, (source_name, launched) in pending.items():
+            if future.cancel():
+                # Never ran, hand a half-open probe on to the next caller
+                self.circuit_breakers.release_probe(source_name)
+            query_logs.append(SourceQueryLog(
+                source=source_name,
+                status='cancelled',
+                duration_ms=int((now - launched) * 1000),
+            ))
+
     def crawl_sources(self) -> None:
         """Process aircraft from the collection that need metadata"""
 
@@ -310,67 +386,77 @@ class AirplaneCrawler:
 
             logger.info(f"Processing {len(aircraft_to_process)} aircraft")
 
-            for icao24 in aircraft_to_process:
-                try:
-                    # Get crawl reason before processing (it will be removed on success)
-                    crawl_reason = self.processing_repo.get_crawl_reason(icao24)
-
-                    crawl_result = self._query_aircraft_metadata(icao24)
-
-                    query_count = len(crawl_result.query_logs)
-
-                    if crawl_result.aircraft:
-                        # Found data (complete or partial) - save it
-                        if self.aircraft_repo.insert_aircraft(crawl_result.aircraft):
-                            self.processing_repo.remove_aircraft(icao24)
-                            if crawl_result.aircraft.is_complete_with_operator():
-                                status = 'success'
-                            elif '+' in (crawl_result.aircraft.source or ''):
-                                status = 'merged'
-                            else:
-                                status = 'partial'
-                            self._record_activity(icao24, status, crawl_result.aircraft, crawl_reason, query_count)
-                            logger.info(f"Successfully processed aircraft: {icao24}")
-                        else:
-                            # Database error - treat as service error (retry later)
-                            logger.warning(f"Failed to insert aircraft {icao24} to database")
-                            self.processing_repo.record_service_error(icao24, "Database insert failed")
-                            self._record_activity(icao24, 'service_error', crawl_reason=crawl_reason, query_count=query_count)
-                            status = 'service_error'
-                    elif crawl_result.had_service_error:
-                        # Service error occurred - don't increment attempts, just record for retry
-                        self.processing_repo.record_service_error(icao24, crawl_result.error_message)
-                        self._record_activity(icao24, 'service_error', crawl_reason=crawl_reason, query_count=query_count)
-                        logger.debug(f"Service error for {icao24}, will retry after cooldown")
-                        status = 'service_error'
-                    elif crawl_result.all_not_found:
-                        # Aircraft not found in any source - increment "not found" attempts
-                        self.processing_repo.record_not_found(icao24)
-                        self._record_activity(icao24, 'not_found', crawl_reason=crawl_reason, query_count=query_count)
-                        logger.debug(f"Aircraft {icao24} not found in any source, incremented attempts")
-                        status = 'not_found'
-                    else:
-                        # Unexpected state - treat as service error to be safe
-                        self.processing_repo.record_service_error(icao24, "Unknown crawl state")
-                        self._record_activity(icao24, 'service_error', crawl_reason=crawl_reason, query_count=query_count)
-                        logger.warning(f"Unexpected crawl state for {icao24}")
-                        status = 'service_error'
+            start_time = time.time()
+            # Each aircraft runs on a crawler thread, sources limit their own concurrency
+            list(self._executor.map(self._crawl_aircraft, aircraft_to_process))
+            logger.info(f"Processed {len(aircraft_to_process)} aircraft in {time.time() - start_time:.1f}s")
+
+        except Exception as e:
+            logger.exception(f"Error in crawl_sources: {e}")
+
+    def _crawl_aircraft(self, icao24: str) -> None:
+        """Query metadata for a single aircraft and update its processing state"""
+        try:
+            # Get crawl reason before processing (it will be removed on success)
+            crawl_reason = self.processing_repo.get_crawl_reason(icao24)
 
-                    # Save query log if multiple sources were queried
-                    if len(crawl_result.query_logs) >= 2:
-                        self._save_query_log(icao24, crawl_result, status)
+            crawl_result = self._query_aircraft_metadata(icao24)
 
-                except Exception as e:
-                    logger.warning(f"Error processing aircraft {icao24}: {e}")
-                    self.processing_repo.record_service_error(icao24, str(e))
+            query_count = len(crawl_result.query_logs)
+
+            if crawl_result.aircraft:
+                # Found data (complete or partial) - save it
+                if self.aircraft_repo.insert_aircraft(crawl_result.aircraft):
+                    self.processing_repo.remove_aircraft(icao24)
+                    if crawl_result.aircraft.is_complete_with_operator():
+                        status = 'success'
+                    elif '+' in (crawl_result.aircraft.source or ''):
+                        status = 'merged'
+                    else:
+                        status = 'partial'
+                    self._record_activity(icao24, status, crawl_result.aircraft, crawl_reason, query_count)
+                    logger.info(f"Successfully processed aircraft: {icao24}")
+                else:
+                    # Database error - treat as service error (retry later)
+                    logger.warning(f"Failed to insert aircraft {icao24} to database")
+                    self.processing_repo.record_service_error(icao24, "Database insert failed")
+                    self._record_activity(icao24, 'service_error', crawl_reason=crawl_reason, query_count=query_count)
+                    status = 'service_error'
+            elif crawl_result.had_service_error:
+                # Service error occurred - don't increment attempts, just record for retry
+                self.processing_repo.record_service_error(icao24, crawl_result.error_message)
+                self._record_activity(icao24, 'service_error', crawl_reason=crawl_reason, query_count=query_count)
+                logger.debug(f"Service error for {icao24}, will retry after cooldown")
+                status = 'service_error'
+            elif crawl_result.all_not_found:
+                # Aircraft not found in any source - increment "not found" attempts
+                self.processing_repo.record_not_found(icao24)
+                self._record_activity(icao24, 'not_found', crawl_reason=crawl_reason, query_count=query_count)
+                logger.debug(f"Aircraft {icao24} not found in any source, incremented attempts")
+                status = 'not_found'
+            else:
+                # Unexpected state - treat as service error to be safe
+                self.processing_repo.record_service_error(icao24, "Unknown crawl state")
+                self._record_activity(icao24, 'service_error', crawl_reason=crawl_reason, query_count=query_count)
+                logger.warning(f"Unexpected crawl state for {icao24}")
+                status = 'service_error'
+
+            # Save query log if multiple sources were queried
+            if len(crawl_result.query_logs) >= 2:
+                self._save_query_log(icao24, crawl_result, status)
 
         except Exception as e:
-            logger.exception(f"Error in crawl_sources: {e}")
+            logger.warning(f"Error processing aircraft {icao24}: {e}")
+            self.processing_repo.record_service_error(icao24, str(e))
 
     def get_circuit_breaker_stats(self) -> dict:
         """Get statistics for all circuit breakers"""
         return self.circuit_breakers.get_all_stats()
 
+    def get_rate_limit_stats(self) -> dict:
+        """Get statistics for the adaptive rate limit of each source"""
+        return self.circuit_breakers.get_rate_limit_stats()
+
     def _record_activity(self, icao24: str, status: str, aircraft: Optional[Aircraft] = None,
                          crawl_reason: Optional[str] = None, query_count: int = 1) -> None:
         """Record a crawl activity for the admin dashboard"""
@@ -0,0 +1,116 @@
+import time
+import logging
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveTokenBucket:
+    """
+    Token bucket for requests to an external metadata source.
+
+    The refill rate adapts AIMD-style to how the source copes: every
+    answer within the latency target adds a fixed step to the rate, a slow
+    answer cuts it slightly and a service error (429, 5xx, timeout) halves
+    it. Decreases are applied at most once per second so a burst of errors
+    from requests already in flight counts as one signal. The bucket holds
+    at most one second worth of tokens.
+
+    Thread-safe, acquire() is called from the crawler query threads.
+    """
+    MIN_RATE = 0.1  # Requests per second the rate never drops below
+    INCREASE_STEP = 0.05  # Added to the rate for each fast answer
+    SLOW_DECREASE_FACTOR = 0.9  # Applied when an answer exceeds the latency target
+    ERROR_DECREASE_FACTOR = 0.5  # Applied on a service error
+    DECREASE_COOLDOWN_SEC = 1.0
+    LATENCY_SMOOTHING = 0.2  # Weight of the newest answer in the average latency
+
+    def __init__(self, rate: float = 2.0, max_rate: float = 20.0, latency_target_sec: float = 2.0):
+        self.max_rate = max(self.MIN_RATE, max_rate)
+        self.rate = min(max(self.MIN_RATE, rate), self.max_rate)
+        self.latency_target_sec = latency_target_sec
+        self.tokens = self._capacity()
+        self.avg_latency_sec = 0.0
+        self.total_granted = 0
+        self.total_timeouts = 0
+        self.decrease_count = 0
+        self._last_refill = time.monotonic()
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def _capacity(self) -> float:
+        return max(1.0, self.rate)
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self._capacity(), self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self, timeout: float, cancelled: Optional[threading.Event] = None) -> bool:
+        """Take a token, waiting up to timeout seconds. False on timeout or once cancelled is set"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    self.total_granted += 1
+                    return True
+                wait = (1.0 - self.tokens) / self.rate
+                if now + wait > deadline:
+                    self.total_timeouts += 1
+                    return False
+
+            # Re-check after the wait, the rate may have changed meanwhile
+            if cancelled is not None:
+                if cancelled.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+    def record_success(self, latency_sec: float) -> None:
+        """Additive increase for a fast answer, a gentle cut for a slow one"""
+        with self._lock:
+            self._track_latency(latency_sec)
+            if latency_sec > self.latency_target_sec:
+                self._decrease(self.SLOW_DECREASE_FACTOR)
+            else:
+                self.rate = min(self.max_rate, self.rate + self.INCREASE_STEP)
+
+    def record_failure(self, latency_sec: Optional[float] = None) -> None:
+        """Multiplicative decrease, the source is throttling or struggling"""
+        with self._lock:
+            if latency_sec is not None:
+                self._track_latency(latency_sec)
+            self._decrease(self.ERROR_DECREASE_FACTOR)
+
+    def _track_latency(self, latency_sec: float) -> None:
+        if self.avg_latency_sec == 0.0:
+            self.avg_latency_sec = latency_sec
+        else:
+            self.avg_latency_sec += self.LATENCY_SMOOTHING * (latency_sec - self.avg_latency_sec)
+
+    def _decrease(self, factor: float) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.DECREASE_COOLDOWN_SEC:
+            return
+        self._refill(now)
+        self._last_decrease = now
+        self.rate = max(self.MIN_RATE, self.rate * factor)
+        self.tokens = min(self.tokens, self._capacity())
+        self.decrease_count += 1
+
+    def get_stats(self) -> dict:
+        """Get rate limiter statistics"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "rate_per_sec": round(self.rate, 3),
+                "max_rate_per_sec": self.max_rate,
+                "tokens": round(self.tokens, 3),
+                "avg_latency_ms": round(self.avg_latency_sec * 1000, 1),
+                "total_granted": self.total_granted,
+                "total_timeouts": self.total_timeouts,
+                "decrease_count": self.decrease_count,
+            }
@@ -1,8 +1,11 @@
 import time
 import logging
+import threading
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict
+from typing import Dict, Optional
+
+from .rate_limiter import AdaptiveTokenBucket
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +58,10 @@ class CircuitBreaker:
     - CLOSED: Normal operation, requests allowed
     - OPEN: Service failing, requests blocked until backoff elapsed
     - HALF_OPEN: Testing if service recovered (one request allowed)
+
+    Thread-safe, the crawler queries sources from several threads. In
+    HALF_OPEN only the first caller gets through as the probe, everyone else
+    is held off until the probe has been recorded.
     """
     failure_threshold: int = 5      # Failures before opening circuit
     base_reset_seconds: int = 60    # Initial backoff time (1 min)
@@ -66,6 +73,8 @@ class CircuitBreaker:
     total_failures: int = field(default=0, init=False)
     total_successes: int = field(default=0, init=False)
     trip_count: int = field(default=0, init=False)  # Number of times circuit has opened
+    probe_in_flight: bool = field(default=False, init=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
 
     def _get_current_reset_seconds(self) -> int:
         """Calculate current reset time with exponential backoff"""
@@ -76,52 +85,66 @@ class CircuitBreaker:
         return min(backoff, self.max_reset_seconds)
 
     def is_available(self) -> bool:
-        """Check if requests should be allowed through"""
-        if self.state == CircuitState.CLOSED:
-            return True
-
-        if self.state == CircuitState.OPEN:
-            # Check if enough time has passed to try again (with exponential backoff)
-            reset_seconds = self._get_current_reset_seconds()
-            if time.time() - self.last_failure_time >= reset_seconds:
-                self.state = CircuitState.HALF_OPEN
-                logger.info(f"Circuit breaker entering HALF_OPEN state after {reset_seconds}s backoff, testing service")
+        """Check if requests should be allowed through, a True in HALF_OPEN makes the caller the probe"""
+        with self._lock:
+            if self.state == CircuitState.CLOSED:
                 return True
-            return False
 
-        # HALF_OPEN - allow one request to test
-        return True
+            if self.state == CircuitState.OPEN:
+                # Check if enough time has passed to try again (with exponential backoff)
+                reset_seconds = self._get_current_reset_seconds()
+                if time.time() - self.last_failure_time >= reset_seconds:
+                    self.state = CircuitState.HALF_OPEN
+                    self.probe_in_flight = True
+                    logger.info(f"Circuit breaker entering HALF_OPEN state after {reset_seconds}s backoff, testing service")
+                    return True
+                return False
+
+            # HALF_OPEN - allow one request to test
+            if self.probe_in_flight:
+                return False
+            self.probe_in_flight = True
+            return True
 
     def record_success(self) -> None:
         """Record a successful request"""
-        self.total_successes += 1
-        if self.state == CircuitState.HALF_OPEN:
-            logger.info("Circuit breaker closing after successful test, resetting backoff")
-            self.trip_count = 0  # Reset exponential backoff on successful recovery
-        self.state = CircuitState.CLOSED
-        self.consecutive_failures = 0
+        with self._lock:
+            self.total_successes += 1
+            if self.state == CircuitState.HALF_OPEN:
+                logger.info("Circuit breaker closing after successful test, resetting backoff")
+                self.trip_count = 0  # Reset exponential backoff on successful recovery
+            self.state = CircuitState.CLOSED
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Give back a probe granted by is_available() that was never sent"""
+        with self._lock:
+            self.probe_in_flight = False
 
     def record_failure(self) -> None:
         """Record a failed request"""
-        self.total_failures += 1
-        self.consecutive_failures += 1
-        self.last_failure_time = time.time()
-
-        if self.state == CircuitState.HALF_OPEN:
-            # Failed during test, reopen circuit with increased backoff
-            self.trip_count += 1
-            self.state = CircuitState.OPEN
-            reset_seconds = self._get_current_reset_seconds()
-            logger.warning(f"Circuit breaker reopening after failed test, backoff now {reset_seconds}s (trip #{self.trip_count})")
-        elif self.consecutive_failures >= self.failure_threshold:
-            if self.state != CircuitState.OPEN:
+        with self._lock:
+            self.total_failures += 1
+            self.consecutive_failures += 1
+            self.last_failure_time = time.time()
+            self.probe_in_flight = False
+
+            if self.state == CircuitState.HALF_OPEN:
+                # Failed during test, reopen circuit with increased backoff
                 self.trip_count += 1
+                self.state = CircuitState.OPEN
                 reset_seconds = self._get_current_reset_seconds()
-                logger.warning(
-                    f"Circuit breaker opening after {self.consecutive_failures} consecutive failures, "
-                    f"backoff {reset_seconds}s (trip #{self.trip_count})"
-                )
-            self.state = CircuitState.OPEN
+                logger.warning(f"Circuit breaker reopening after failed test, backoff now {reset_seconds}s (trip #{self.trip_count})")
+            elif self.consecutive_failures >= self.failure_threshold:
+                if self.state != CircuitState.OPEN:
+                    self.trip_count += 1
+                    reset_seconds = self._get_current_reset_seconds()
+                    logger.warning(
+                        f"Circuit breaker opening after {self.consecutive_failures} consecutive failures, "
+                        f"backoff {reset_seconds}s (trip #{self.trip_count})"
+                    )
+                self.state = CircuitState.OPEN
 
     def get_stats(self) -> dict:
         """Get circuit breaker statistics"""
@@ -143,42 +166,87 @@ class CircuitBreakerRegistry:
     Registry of circuit breakers for multiple sources.
 
     Each metadata source gets its own circuit breaker to track
-    failures independently.
+    failures independently, and an adaptive token bucket that shapes the
+    request rate before failures occur. Both are fed by the same outcomes.
     """
 
     def __init__(
         self,
         failure_threshold: int = 5,
         base_reset_seconds: int = 60,
-        max_reset_seconds: int = 1800
+        max_reset_seconds: int = 1800,
+        rate: float = 2.0,
+        max_rate: float = 20.0,
+        latency_target_sec: float = 2.0
     ):
         self.failure_threshold = failure_threshold
         self.base_reset_seconds = base_reset_seconds
         self.max_reset_seconds = max_reset_seconds
+        self.rate = rate
+        self.max_rate = max_rate
+        self.latency_target_sec = latency_target_sec
         self._breakers: Dict[str, CircuitBreaker] = {}
+        self._buckets: Dict[str, AdaptiveTokenBucket] = {}
+        self._lock = threading.Lock()
 
     def get_breaker(self, source_name: str) -> CircuitBreaker:
         """Get or create a circuit breaker for a source"""
-        if source_name not in self._breakers:
-            self._breakers[source_name] = CircuitBreaker(
-                failure_threshold=self.failure_threshold,
-                base_reset_seconds=self.base_reset_seconds,
-                max_reset_seconds=self.max_reset_seconds
-            )
-        return self._breakers[source_name]
+        breaker = self._breakers.get(source_name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(source_name, CircuitBreaker(
+                    failure_threshold=self.failure_threshold,
+                    base_reset_seconds=self.base_reset_seconds,
+                    max_reset_seconds=self.max_reset_seconds
+                ))
+        return breaker
+
+    def get_bucket(self, source_name: str) -> AdaptiveTokenBucket:
+        """Get or create the token bucket for a source"""
+        bucket = self._buckets.get(source_name)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.setdefault(source_name, AdaptiveTokenBucket(
+                    rate=self.rate,
+                    max_rate=self.max_rate,
+                    latency_target_sec=self.latency_target_sec
+                ))
+        return bucket
+
+    def acquire_token(self, source_name: str, timeout: float, cancelled: Optional[threading.Event] = None) -> bool:
+        """
+        Wait for the source's rate limit to allow a request. On False the
+        request must not be sent, a half-open probe held by the caller is
+        handed on to the next caller.
+        """
+        if self.get_bucket(source_name).acquire(timeout, cancelled):
+            return True
+        self.release_probe(source_name)
+        return False
 
     def is_source_available(self, source_name: str) -> bool:
         """Check if a source is available (circuit not open)"""
         return self.get_breaker(source_name).is_available()
 
-    def record_success(self, source_name: str) -> None:
-        """Record a successful request to a source"""
+    def record_success(self, source_name: str, latency_sec: Optional[float] = None) -> None:
+        """Record a successful request to a source, the latency steers its request rate"""
         self.get_breaker(source_name).record_success()
+        if latency_sec is not None:
+            self.get_bucket(source_name).record_success(latency_sec)
 
-    def record_failure(self, source_name: str) -> None:
-        """Record a failed request to a source"""
+    def record_failure(self, source_name: str, latency_sec: Optional[float] = None) -> None:
+        """Record a failed request to a source and back off its request rate"""
         self.get_breaker(source_name).record_failure()
+        self.get_bucket(source_name).record_failure(latency_sec)
+
+    def release_probe(self, source_name: str) -> None:
+        """Give back a half-open probe for a request that was never sent"""
+        self.get_breaker(source_name).release_probe()
 
     def get_all_stats(self) -> Dict[str, dict]:
         """Get statistics for all circuit breakers"""
-        return {name: breaker.get_stats() for name, breaker in self._breakers.items()}
\ No newline at end of file
+        return {name: breaker.get_stats() for name, breaker in list(self._breakers.items())}
+
+    def get_rate_limit_stats(self) -> Dict[str, dict]:
+        """Get statistics for all token buckets"""
+        return {name: bucket.get_stats() for name, bucket in list(self._buckets.items())}
\ No newline at end of file
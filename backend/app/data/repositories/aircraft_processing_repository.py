@@ -9,9 +9,9 @@ Note: Collection and indexes are managed by app.data.schema module.
 import logging
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import List, Optional
+from typing import Iterable, List, Optional, Set, Tuple
 from pymongo.database import Database
-from pymongo.errors import PyMongoError
+from pymongo.errors import BulkWriteError, PyMongoError
 
 logger = logging.getLogger(__name__)
 
@@ -55,18 +55,22 @@ class AircraftProcessingRepository:
         self.max_attempts = max_attempts
         self.service_error_reset_hours = service_error_reset_hours
 
+    @staticmethod
+    def _new_document(icao24: str, crawl_reason: CrawlReason) -> dict:
+        return {
+            "modeS": icao24.upper(),
+            "query_attempts": 0,
+            "sources_queried": [],
+            "last_attempt_time": None,
+            "failure_type": FailureType.NONE.value,
+            "crawl_reason": crawl_reason.value,
+            "created_at": datetime.now()
+        }
+
     def add_aircraft(self, icao24: str, crawl_reason: CrawlReason = CrawlReason.UNKNOWN) -> bool:
         """Add aircraft to processing queue with crawl reason"""
         try:
-            self.db[self.collection_name].insert_one({
-                "modeS": icao24.upper(),
-                "query_attempts": 0,
-                "sources_queried": [],
-                "last_attempt_time": None,
-                "failure_type": FailureType.NONE.value,
-                "crawl_reason": crawl_reason.value,
-                "created_at": datetime.now()
-            })
+            self.db[self.collection_name].insert_one(self._new_document(icao24, crawl_reason))
             return True
         except PyMongoError as e:
             if hasattr(e, 'code') and e.code == 11000:  # Duplicate key error
@@ -74,6 +78,35 @@ class AircraftProcessingRepository:
             logger.error(f"Failed to add aircraft {icao24}: {e}")
             return False
 
+    def add_aircraft_batch(self, aircraft: List[Tuple[str, CrawlReason]]) -> int:
+        """
+        Add aircraft to the processing queue in a single unordered bulk insert.
+        Aircraft already queued are skipped by the unique modeS index.
+        Returns the number of aircraft added.
+        """
+        if not aircraft:
+            return 0
+        try:
+            result = self.db[self.collection_name].insert_many(
+                [self._new_document(icao24, reason) for icao24, reason in aircraft], ordered=False)
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            other_errors = [err for err in e.details.get("writeErrors", []) if err.get("code") != 11000]
+            if other_errors:
+                logger.error(f"Failed to add {len(other_errors)} aircraft: {other_errors[0].get('errmsg')}")
+            return e.details.get("nInserted", 0)
+        except PyMongoError as e:
+            logger.error(f"Failed to add {len(aircraft)} aircraft: {e}")
+            return 0
+
+    def get_existing(self, icao24s: Iterable[str]) -> Set[str]:
+        """ModeS addresses (upper case) of the given aircraft that are already queued"""
+        cursor = self.db[self.collection_name].find(
+            {"modeS": {"$in": [icao24.upper() for icao24 in icao24s]}},
+            {"_id": 0, "modeS": 1}
+        )
+        return {doc["modeS"] for doc in cursor}
+
     def get_crawl_reason(self, icao24: str) -> Optional[str]:
         """Get the crawl reason for an aircraft in the processing queue"""
         try:
@@ -69,6 +69,13 @@ class AircraftRepository:
         else:
             return None
     
+    def query_aircraft_docs(self, icao24s, fields):
+        """Aircraft documents with the given fields by ModeS address (upper case), in a single query"""
+        projection = {"_id": 0, "modeS": 1, **{field: 1 for field in fields}}
+        cursor = self.db[self.collection_name].find(
+            {"modeS": {"$in": [icao24.strip().upper() for icao24 in icao24s]}}, projection)
+        return {doc["modeS"]: doc for doc in cursor}
+
     def _build_update_dict(self, aircraft):
         """Build update dictionary with ICAO designator if available"""
         base_fields = {"lastModified": datetime.now()}
@@ -1,5 +1,5 @@
 import logging
-from typing import Dict, List, Tuple, Set, Optional, Any
+from typing import Dict, Iterator, List, Tuple, Set, Optional, Any
 from datetime import datetime
 from .mongodb_repository import MongoDBRepository
 
@@ -25,23 +25,6 @@ class FlightRepository:
         """Get recent flights with their last position"""
         return self.db_repo.get_recent_flights_last_pos(timestamp, page_size, last_id)
         
-    def get_last_positions(self) -> Dict[str, 'PositionReport']:
-        from ...core.models.position_report import PositionReport
-        
-        # Get all flights with their last positions
-        results = self.db_repo.get_all_flights_last_pos()
-        positions = {}
-        
-        for result in results:
-            if "flight" in result and "position" in result:
-                flight = result["flight"]
-                position = result["position"]
-                flight_id = str(flight["_id"])
-                
-                pos_report = PositionReport(
-                    flight["modeS"], position["lat"], position["lon"],
-                    position.get("alt"), position.get("track", 0.0), flight.get("callsign"))
-                    
-                positions[flight_id] = pos_report
-                
-        return positions
\ No newline at end of file
+    def iter_recent_flights_last_pos(self, timestamp: datetime) -> Iterator[Dict[str, Any]]:
+        """Stream recent flights with their last position"""
+        return self.db_repo.iter_recent_flights_last_pos(timestamp)
\ No newline at end of file
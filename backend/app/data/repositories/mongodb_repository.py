@@ -7,7 +7,7 @@ Note: Collection and indexes are managed by app.data.schema module.
 """
 
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Tuple, Optional, Any, Set
+from typing import Iterator, List, Dict, Tuple, Optional, Any, Set
 from pymongo.database import Database
 from pymongo import ReturnDocument, UpdateOne
 from itertools import zip_longest
@@ -170,29 +170,35 @@ class MongoDBRepository:
 
         return list(self.flights_collection.aggregate(pipeline))
         
-    def get_all_flights_last_pos(self) -> List[Dict[str, Any]]:
-        """Get all flights with their latest position"""
+    def iter_recent_flights_last_pos(self, min_timestamp: datetime, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Stream flights contacted after min_timestamp with their latest position.
+        Bounded by the last_contact index, each lookup reads a single position
+        through the (flight_id, timestmp) index; only the fields needed to warm
+        the live state are returned.
+        """
         pipeline = [
+            {"$match": {"last_contact": {"$gt": min_timestamp}}},
+            {"$project": {"modeS": 1, "callsign": 1, "last_contact": 1}},
             {"$lookup": {
                 "from": self.positions_collection_name,
                 "let": {"flight_id": "$_id"},
                 "pipeline": [
                     {"$match": {"$expr": {"$eq": ["$flight_id", "$$flight_id"]}}},
                     {"$sort": {"timestmp": -1}},
-                    {"$limit": 1}
+                    {"$limit": 1},
+                    {"$project": {"_id": 0, "lat": 1, "lon": 1, "alt": 1, "track": 1}}
                 ],
                 "as": "latest_position"
             }},
-            {"$match": {"latest_position": {"$ne": []}}},  # Only include flights with positions
             {"$unwind": "$latest_position"},
             {"$project": {
-                "flight": "$$ROOT",
+                "flight": {"_id": "$_id", "modeS": "$modeS", "callsign": "$callsign", "last_contact": "$last_contact"},
                 "position": "$latest_position"
-            }},
-            {"$sort": {"flight.last_contact": -1}}
+            }}
         ]
-        
-        return list(self.flights_collection.aggregate(pipeline))
+
+        return self.flights_collection.aggregate(pipeline, batchSize=batch_size)
 
     def get_flights_older_than(self, timestamp: datetime) -> List[Dict[str, Any]]:
         """Get flights with last contact older than given timestamp"""
@@ -436,9 +442,9 @@ class MongoDBRepository:
 
     @handle_mongodb_errors
     def insert_positions(self, positions: List[Dict[str, Any]]) -> None:
-        """Insert multiple position documents"""
+        """Insert multiple position documents, independent so order does not matter"""
         if positions:
-            self.positions_collection.insert_many(positions)
+            self.positions_collection.insert_many(positions, ordered=False)
 
     @handle_mongodb_errors
     def get_or_create_flight(self, modeS: str, is_military: bool, callsign: Optional[str] = None, expire_at: Optional[datetime] = None, airline_icao: Optional[str] = None) -> Dict[str, Any]:
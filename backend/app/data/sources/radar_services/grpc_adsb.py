@@ -23,6 +23,7 @@ class GrpcAdsb(RadarService):
         self.grpc_address = f"{self._url_parms.hostname}:{self._url_parms.port or 50051}"
         self.channel: Optional[grpc.Channel] = None
         self.stub: Optional[adsb_pb2_grpc.PlaneTrackingServiceStub] = None
+        self._stream_call = None
         self._connect()
 
     def _connect(self):
@@ -180,7 +181,9 @@ class GrpcAdsb(RadarService):
 
             logger.info(f"Starting plane update stream (initial_snapshot={include_initial_snapshot})")
 
-            for update in self.stub.StreamUpdates(request):
+            self._stream_call = self.stub.StreamUpdates(request)
+
+            for update in self._stream_call:
                 update_dict = {'update_type': adsb_pb2.UpdateType.Name(update.update_type)}
 
                 if update.update_type == adsb_pb2.UPDATE_TYPE_REMOVE:
@@ -195,9 +198,20 @@ class GrpcAdsb(RadarService):
                 self.connection_alive = True
 
         except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.CANCELLED:
+                logger.info("Plane update stream cancelled")
+                return None
             logger.error(f"Stream error: {e}")
             self.connection_alive = False
             return None
+        finally:
+            self._stream_call = None
+
+    def cancel_stream(self):
+        """Cancel the active update stream, if any, unblocking its consumer"""
+        call = self._stream_call
+        if call is not None:
+            call.cancel()
 
     def get_silhouete_params(self):
         """Not applicable for gRPC service"""
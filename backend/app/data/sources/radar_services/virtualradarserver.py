@@ -40,7 +40,7 @@ class VirtualRadarServer(RadarService):
                         track = acjsn['Trak'] if 'Trak' in acjsn and acjsn['Trak'] else None
 
                         if (lat and lon or alt) or (not filter_incomplete and callsign):
-                            flights.append(PositionReport(icao24, lat, lon, alt, track, callsign))
+                            flights.append(PositionReport(icao24, lat, lon, alt, track=track, callsign=callsign))
 
                     self.connection_alive = True
                     return flights
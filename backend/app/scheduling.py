@@ -1,4 +1,6 @@
 import logging
+import threading
+import time
 from fastapi import FastAPI
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.events import *
@@ -8,17 +10,39 @@ from .config import Config
 from .core.services.flight_updater_coordinator import FlightUpdaterCoordinator
 from .crawling.crawler import AirplaneCrawler
 from .sse.notifier import SSENotifier
+from .sse.bus import BUS_MODE_PUBLISHER, BUS_MODE_SUBSCRIBER, BusPublisher, BusSubscriber, LiveMirror, snapshot_data
 
 logger = logging.getLogger(__name__)
 
 UPDATER_JOB_NAME = 'flight_updater_job'
+CLASSIFIER_JOB_NAME = 'aircraft_classifier_job'
 DEFAULT_CRAWLER_RUN_INTERVAL_SEC = 20
+CLASSIFIER_INTERVAL_SEC = 5  # Live aircraft are classified for metadata crawling off the ingest path
+WARM_START_RETRY_SEC = 5  # First retry of a failed warm start, doubled for every further failure
+WARM_START_MAX_RETRY_SEC = 300
 
 def create_updater(config, mongodb=None):
+    """Updater whose cache is still cold, see warm_start_updater"""
     updater = FlightUpdaterCoordinator()
-    updater.initialize(config, mongodb)
+    updater.configure(config, mongodb)
     return updater
 
+def warm_start_updater(app, updater, on_warm=None):
+    """Verify the schema and warm the updater cache, run in the background so the API serves meanwhile.
+    Retried with backoff until it succeeds, /startup reports the failure meanwhile"""
+    delay = WARM_START_RETRY_SEC
+    while True:
+        try:
+            ensure_db_indexes(app)
+            updater.warm_start()
+            break
+        except Exception as e:
+            logger.exception(f"Warm start failed, retrying in {delay}s: {str(e)}")
+        time.sleep(delay)
+        delay = min(delay * 2, WARM_START_MAX_RETRY_SEC)
+    if on_warm:
+        on_warm()
+
 def ensure_db_indexes(app):
     """Make sure database indexes are correctly configured"""
     if hasattr(app.state, 'mongodb') and app.state.mongodb is not None:
@@ -41,8 +65,6 @@ def configure_scheduling(app: FastAPI, conf: Config):
         'max_instances': 1
     }
 
-    ensure_db_indexes(app)
-
     scheduler = AsyncIOScheduler(
         jobstores=jobstores, 
         executors=executors, 
@@ -50,10 +72,34 @@ def configure_scheduling(app: FastAPI, conf: Config):
     )
     
     app.state.apscheduler = scheduler
-    
+
+    if conf.LIVE_BUS_MODE == BUS_MODE_SUBSCRIBER:
+        # API worker: live data comes from the ingest process, which also runs the crawler
+        logger.info("Running as API worker, subscribing to the live bus")
+        app.state.updater = LiveMirror()
+        app.state.live_bus = BusSubscriber(conf.LIVE_BUS_SOCKET, app.state.updater.apply)
+        app.state.live_bus.start()
+        scheduler.start()
+        return
+
     updater = create_updater(conf, app.state.mongodb)
     app.state.updater = updater
 
+    start_bus = None
+    if conf.LIVE_BUS_MODE == BUS_MODE_PUBLISHER:
+        app.state.live_bus = BusPublisher(
+            conf.LIVE_BUS_SOCKET,
+            lambda: snapshot_data(app.state.updater.get_cached_flights())
+        )
+
+        def start_bus():
+            # Subscribers only connect once there is a warm snapshot to send them
+            app.state.live_bus.start()
+            SSENotifier._bus = app.state.live_bus
+
+    # Update cycles are skipped until the cache is warm, /startup reports progress
+    threading.Thread(target=warm_start_updater, args=(app, updater, start_bus), name='WarmStart', daemon=True).start()
+
     # Reduce logging noise
     logging.getLogger('apscheduler.executors.default').setLevel(logging.ERROR)  
     logging.getLogger('apscheduler.scheduler').setLevel(logging.ERROR)
@@ -69,11 +115,20 @@ def configure_scheduling(app: FastAPI, conf: Config):
         id=UPDATER_JOB_NAME,
         func=lambda: app.state.updater.update(),
         trigger='interval',
-        seconds=2.0,  # Changed from 1.0 to 2.0 to avoid overloading
+        seconds=updater.update_interval,  # 2s when polling, shorter when streaming deltas
         misfire_grace_time=10,  # Increased for reliability
         coalesce=True
     )
 
+    scheduler.add_job(
+        id=CLASSIFIER_JOB_NAME,
+        func=lambda: app.state.updater.classify_queued_aircraft(),
+        trigger='interval',
+        seconds=CLASSIFIER_INTERVAL_SEC,
+        misfire_grace_time=30,
+        coalesce=True
+    )
+
     if conf.UNKNOWN_AIRCRAFT_CRAWLING:
         crawler = AirplaneCrawler(conf, app.state.mongodb)
         app.state.crawler = crawler
@@ -0,0 +1,330 @@
+"""
+Local broadcast bus between the ingest process and API worker processes.
+
+With LIVE_BUS_MODE=publisher the process running the updater publishes every
+cycle's deltas on a Unix socket. Processes started with LIVE_BUS_MODE=subscriber
+run no updater: they mirror the live state from the bus and fan it out to their
+own SSE clients, so viewer traffic can be spread over several workers while a
+single process writes to MongoDB.
+
+Messages are a 4-byte big-endian length followed by {"type": ..., "data": ...}
+as JSON. A subscriber first receives a "snapshot" of all active flights, then
+"positions", "categories", "callsigns" and "removed" deltas.
+"""
+import asyncio
+import logging
+import os
+import queue
+import socket
+import struct
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .compact import flight_index
+from .encoding import dumps, loads
+from .manager import sse_manager
+from ..core.models.position_report import PositionReport
+from ..core.utils.spatial_index import BoundingBox, GridIndex
+
+logger = logging.getLogger('LiveBus')
+
+BUS_MODE_PUBLISHER = 'publisher'
+BUS_MODE_SUBSCRIBER = 'subscriber'
+
+HEADER = struct.Struct('>I')
+CATEGORY_NAMES = {number: name for name, number in PositionReport.CATEGORY_MAP.items()}
+
+
+def encode_message(message_type: str, data: Any) -> bytes:
+    body = dumps({"type": message_type, "data": data})
+    return HEADER.pack(len(body)) + body
+
+
+def snapshot_data(cached_flights: Dict[str, PositionReport]) -> Dict[str, Dict[str, Any]]:
+    """Bus representation of the active flights, see LiveMirror"""
+    snapshot = {}
+    for flight_id, pos in cached_flights.items():
+        entry = {"icao": pos.icao24, "lat": pos.lat, "lon": pos.lon, "alt": pos.alt, "track": pos.track}
+        if pos.gs is not None:
+            entry["gs"] = pos.gs
+        if pos.callsign is not None:
+            entry["callsign"] = pos.callsign
+        if pos.category is not None:
+            entry["category"] = pos.category
+        snapshot[str(flight_id)] = entry
+    return snapshot
+
+
+class _OutboundSubscriber:
+    """
+    Connection to one bus subscriber with its own bounded queue, drained by a
+    sender thread so a slow subscriber never blocks the publishing thread.
+    """
+
+    def __init__(self, connection: socket.socket, queue_size: int):
+        self.connection = connection
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.closed = False
+
+    def offer(self, message: bytes) -> bool:
+        """Queue a message without blocking, False when the subscriber has fallen behind"""
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except queue.Full:
+            return False
+
+    def run(self, snapshot_provider: Callable[[], Dict[str, Any]], on_close: Callable[['_OutboundSubscriber'], None]):
+        try:
+            # Deltas queued while the snapshot is taken may already be in it, which is harmless
+            self.connection.sendall(encode_message("snapshot", snapshot_provider()))
+            while not self.closed:
+                message = self._queue.get()
+                if message is None:
+                    break
+                self.connection.sendall(message)
+        except Exception as e:
+            if not self.closed:
+                logger.warning(f"Dropping bus subscriber: {str(e)}")
+        finally:
+            self.close()
+            on_close(self)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.connection.close()
+        try:
+            # Wake the sender thread if it waits for messages
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+
+class BusPublisher:
+    """
+    Unix socket server of the ingest process. Publishing encodes the message
+    once and queues it for every subscriber, each subscriber has a sender
+    thread writing its queue to the socket. A subscriber whose queue is full
+    is dropped and resyncs from a fresh snapshot on reconnect.
+    """
+
+    def __init__(self, socket_path: str, snapshot_provider: Callable[[], Dict[str, Any]],
+                 send_timeout: float = 2.0, queue_size: int = 100):
+        self._socket_path = socket_path
+        self._snapshot_provider = snapshot_provider
+        self._send_timeout = send_timeout
+        self._queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers: List[_OutboundSubscriber] = []
+        self._server: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def start(self):
+        if os.path.exists(self._socket_path):
+            os.unlink(self._socket_path)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self._socket_path)
+        self._server.listen()
+        self._running = True
+        self._thread = threading.Thread(target=self._accept_loop, name='LiveBusPublisher', daemon=True)
+        self._thread.start()
+        logger.info(f"Publishing live updates on {self._socket_path}")
+
+    def stop(self):
+        self._running = False
+        if self._server is not None:
+            self._server.close()
+        with self._lock:
+            subscribers = self._subscribers
+            self._subscribers = []
+        for subscriber in subscribers:
+            subscriber.close()
+        if os.path.exists(self._socket_path):
+            os.unlink(self._socket_path)
+
+    def has_subscribers(self) -> bool:
+        return len(self._subscribers) > 0
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                connection, _ = self._server.accept()
+            except OSError:
+                break
+            connection.settimeout(self._send_timeout)
+            subscriber = _OutboundSubscriber(connection, self._queue_size)
+            # Registered before the snapshot is taken, so deltas published meanwhile are queued behind it
+            with self._lock:
+                self._subscribers.append(subscriber)
+            threading.Thread(
+                target=subscriber.run, args=(self._snapshot_provider, self._remove),
+                name='LiveBusSender', daemon=True
+            ).start()
+            logger.info(f"Bus subscriber connected. Total subscribers: {len(self._subscribers)}")
+
+    def _remove(self, subscriber: _OutboundSubscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def publish(self, message_type: str, data: Any):
+        """Queue a message for all subscribers, encoded once, never blocks on a subscriber"""
+        if not self._subscribers:
+            return
+        message = encode_message(message_type, data)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            if not subscriber.offer(message):
+                logger.warning("Bus subscriber fell behind, dropping it to resync")
+                subscriber.close()
+                self._remove(subscriber)
+
+
+class BusSubscriber:
+    """Reads the bus in an API worker's event loop, reconnecting when the publisher restarts"""
+
+    def __init__(self, socket_path: str, handler: Callable[[str, Any], Awaitable[None]], reconnect_delay: float = 1.0):
+        self._socket_path = socket_path
+        self._handler = handler
+        self._reconnect_delay = reconnect_delay
+        self._task: Optional[asyncio.Task] = None
+        self.connected = False
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    async def run(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self._socket_path)
+            except OSError as e:
+                logger.debug(f"Live bus not available yet: {str(e)}")
+                await asyncio.sleep(self._reconnect_delay)
+                continue
+
+            logger.info(f"Subscribed to live updates on {self._socket_path}")
+            try:
+                while True:
+                    header = await reader.readexactly(HEADER.size)
+                    message = loads(await reader.readexactly(HEADER.unpack(header)[0]))
+                    self.connected = True
+                    try:
+                        await self._handler(message["type"], message["data"])
+                    except Exception as e:
+                        logger.exception(f"Error handling live bus message: {str(e)}")
+            except (asyncio.IncompleteReadError, OSError):
+                logger.warning("Live bus connection lost, reconnecting")
+            finally:
+                self.connected = False
+                writer.close()
+            await asyncio.sleep(self._reconnect_delay)
+
+
+class LiveMirror:
+    """
+    Live state of an API worker, built from the bus. Stands in for the updater
+    coordinator on the read side: the endpoints query it for active flights and
+    every delta is fanned out to this worker's SSE clients.
+    """
+
+    def __init__(self):
+        self._snapshot: Dict[str, PositionReport] = {}
+        self._grid = GridIndex()
+
+    def get_cached_flights(self) -> Dict[str, PositionReport]:
+        """Published flight_id -> PositionReport map, must be treated as read-only"""
+        return self._snapshot
+
+    def get_cached_flights_in(self, bbox: BoundingBox) -> Dict[str, PositionReport]:
+        snapshot = self._snapshot
+        return {flight_id: snapshot[flight_id] for flight_id in self._grid.query(bbox) if flight_id in snapshot}
+
+    def get_position_dedup_stats(self) -> Optional[Dict[str, int]]:
+        """Positions are deduplicated by the ingest process"""
+        return None
+
+    def get_classification_stats(self) -> Optional[Dict[str, Any]]:
+        """Aircraft are classified for metadata crawling by the ingest process"""
+        return None
+
+    def shutdown(self):
+        pass
+
+    async def apply(self, message_type: str, data: Any):
+        """Apply a bus message and fan it out to the SSE clients of this worker"""
+        if message_type == "snapshot":
+            self._load(data)
+            # Deltas may have been missed while disconnected
+            sse_manager.resync_position_clients()
+        elif message_type == "positions":
+            self._update(data, self._with_position)
+            if sse_manager.has_clients():
+                await sse_manager.publish_positions(data)
+        elif message_type == "categories":
+            self._update(data, lambda pos, category: self._with(pos, category=CATEGORY_NAMES.get(category)))
+            if sse_manager.has_clients():
+                await sse_manager.broadcast_categories(data)
+        elif message_type == "callsigns":
+            self._update(data, lambda pos, callsign: self._with(pos, callsign=callsign))
+            if sse_manager.has_clients():
+                await sse_manager.broadcast_callsigns(data)
+        elif message_type == "removed":
+            snapshot = dict(self._snapshot)
+            for flight_id in data:
+                snapshot.pop(flight_id, None)
+                self._grid.remove(flight_id)
+            self._snapshot = snapshot
+            flight_index.release(data)
+        else:
+            logger.warning(f"Unknown live bus message type '{message_type}'")
+
+    def _load(self, data: Dict[str, Dict[str, Any]]):
+        snapshot = {}
+        self._grid = GridIndex()
+        for flight_id, entry in data.items():
+            snapshot[flight_id] = self._with_position(None, entry)
+            self._grid.update(flight_id, entry["lat"], entry["lon"])
+        self._snapshot = snapshot
+        logger.info(f"Loaded live snapshot with {len(snapshot)} flights")
+
+    def _update(self, deltas: Dict[str, Any], apply: Callable[[Optional[PositionReport], Any], Optional[PositionReport]]):
+        # Copy on write, readers keep a consistent snapshot
+        snapshot = dict(self._snapshot)
+        for flight_id, delta in deltas.items():
+            pos = apply(snapshot.get(flight_id), delta)
+            if pos is not None:
+                snapshot[flight_id] = pos
+                self._grid.update(flight_id, pos.lat, pos.lon)
+        self._snapshot = snapshot
+
+    @staticmethod
+    def _with_position(pos: Optional[PositionReport], entry: Dict[str, Any]) -> PositionReport:
+        return PositionReport(
+            entry.get("icao") or (pos.icao24 if pos else None),
+            entry["lat"], entry["lon"], entry.get("alt"),
+            gs=entry.get("gs"), track=entry.get("track"),
+            callsign=entry.get("callsign", pos.callsign if pos else None),
+            category=entry.get("category", pos.category if pos else None)
+        )
+
+    @staticmethod
+    def _with(pos: Optional[PositionReport], **changes) -> Optional[PositionReport]:
+        """Copy of a position with changed attributes, None for flights without a position yet"""
+        if pos is None:
+            return None
+        updated = PositionReport(pos.icao24, pos.lat, pos.lon, pos.alt, pos.gs, pos.track, pos.callsign, pos.category)
+        for name, value in changes.items():
+            setattr(updated, name, value)
+        return updated
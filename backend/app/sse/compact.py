@@ -0,0 +1,207 @@
+"""
+Compact encoding of live position frames.
+
+Negotiated with ?encoding=compact on /live/stream. Instead of a JSON object per
+flight keyed by its 24-char ObjectId, a positions frame carries
+
+    {"type": "initial"|"update", "count": n, "flights": {...}, "data": "<base64>"}
+
+where data is a packed array of little-endian records (20 bytes each):
+
+    uint32 flight index
+    int32  lat * 1e5
+    int32  lon * 1e5
+    int32  alt in feet, -2^31 if unknown
+    uint16 track * 100, 0xFFFF if unknown
+    uint16 gs * 10, 0xFFFF if unknown
+
+Flight indexes are small integers assigned server-wide, so the packed data of a
+broadcast is shared by every compact client. They are released when a flight
+leaves the active flights view and reused after a delay, so they stay close to
+the peak number of active flights. "flights" maps indexes the client has not seen yet in this
+session, or last saw for another flight, to [flight_id, icao24]; it is omitted
+once everything in the frame has been announced.
+"""
+import base64
+import struct
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+from .encoding import encode_event
+
+RECORD = struct.Struct('<IiiiHH')
+NO_ALTITUDE = -(2 ** 31)
+NO_VALUE = 0xFFFF
+SCALE = 100000
+# Altitude of formatted positions without one, see _format_position
+UNKNOWN_ALTITUDE = -1
+
+
+class FlightIndex:
+    """
+    Server-wide flight_id -> small integer mapping.
+
+    Released indexes stay retired for REUSE_DELAY_SEC before they are reused, so
+    deltas merged for slow clients and resumed after a reconnect still find the
+    index of a removed flight instead of allocating a new one. Lookups of flights
+    not active anymore (see lookup) never allocate a permanent index, what they
+    allocate is retired at the next release.
+    """
+
+    # Longer than the resume history (60 broadcasts at the 2s polling interval)
+    # and than slow clients keep merging deltas before they are resynced
+    REUSE_DELAY_SEC = 300.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}  # Active flights
+        self._transient: Dict[str, int] = {}  # Allocated by lookups, retired at the next release
+        self._retired: Dict[str, Tuple[int, float]] = {}  # flight_id -> (index, reusable from)
+        self._retiring: Deque[Tuple[float, str, int]] = deque()
+        self._next = 0
+        self._free: List[int] = []
+
+    def index_of(self, flight_id: str) -> int:
+        """Index of an active flight, a retired flight that is active again gets its index back"""
+        index = self._index.get(flight_id)
+        if index is None:
+            with self._lock:
+                index = self._index.get(flight_id)
+                if index is None:
+                    index = self._transient.pop(flight_id, None)
+                    if index is None:
+                        retired = self._retired.pop(flight_id, None)
+                        index = retired[0] if retired is not None else self._allocate()
+                    self._index[flight_id] = index
+        return index
+
+    def lookup(self, flight_id: str) -> int:
+        """Index of a flight that may have been released since, e.g. in merged or resumed deltas"""
+        index = self._index.get(flight_id)
+        if index is None:
+            with self._lock:
+                index = self._index.get(flight_id)
+                if index is None:
+                    retired = self._retired.get(flight_id)
+                    if retired is not None:
+                        index = retired[0]
+                    else:
+                        index = self._transient.get(flight_id)
+                        if index is None:
+                            index = self._transient[flight_id] = self._allocate()
+        return index
+
+    def _allocate(self) -> int:
+        if self._free:
+            return self._free.pop()
+        index = self._next
+        self._next += 1
+        return index
+
+    def release(self, flight_ids: Iterable[str], now: Optional[float] = None):
+        """Retire the indexes of flights that left the active flights view and free those retired long enough"""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            retiring = self._retiring
+            while retiring and retiring[0][0] <= now:
+                reusable_from, flight_id, index = retiring.popleft()
+                # Only the latest retirement of a flight frees its index
+                if self._retired.get(flight_id) == (index, reusable_from):
+                    del self._retired[flight_id]
+                    self._free.append(index)
+
+            released = [(flight_id, self._index.pop(flight_id, None)) for flight_id in flight_ids]
+            released.extend(self._transient.items())
+            self._transient = {}
+            reusable_from = now + self.REUSE_DELAY_SEC
+            for flight_id, index in released:
+                if index is not None:
+                    self._retired[flight_id] = (index, reusable_from)
+                    retiring.append((reusable_from, flight_id, index))
+
+
+flight_index = FlightIndex()
+
+
+def _scaled(value: Optional[float], factor: int) -> int:
+    if value is None:
+        return NO_VALUE
+    scaled = int(round(value * factor))
+    return scaled if 0 <= scaled < NO_VALUE else NO_VALUE
+
+
+def pack_positions(positions: Dict[str, Dict[str, Any]],
+                   active: bool = True) -> Tuple[str, List[Tuple[int, str, Optional[str]]]]:
+    """
+    Pack formatted positions (flight_id -> dict with lat/lon/alt/track/gs/icao).
+    Positions that are not the current state of active flights, like merged or
+    resumed deltas, pass active=False. Returns the base64 payload and the
+    (index, flight_id, icao24) of every record.
+    """
+    index_of = flight_index.index_of if active else flight_index.lookup
+    buffer = bytearray(RECORD.size * len(positions))
+    flights = []
+    offset = 0
+    for flight_id, pos in positions.items():
+        index = index_of(flight_id)
+        alt = pos.get("alt")
+        RECORD.pack_into(
+            buffer, offset,
+            index,
+            int(round(pos["lat"] * SCALE)),
+            int(round(pos["lon"] * SCALE)),
+            int(alt) if alt is not None and alt != UNKNOWN_ALTITUDE else NO_ALTITUDE,
+            _scaled(pos.get("track"), 100),
+            _scaled(pos.get("gs"), 10)
+        )
+        flights.append((index, flight_id, pos.get("icao")))
+        offset += RECORD.size
+    return base64.b64encode(buffer).decode('ascii'), flights
+
+
+def positions_frame(message_type: str, payload: str, count: int,
+                    announcements: Optional[Dict[str, List[Optional[str]]]] = None,
+                    event_id: Optional[str] = None) -> bytes:
+    message = {"type": message_type, "count": count}
+    if announcements:
+        message["flights"] = announcements
+    message["data"] = payload
+    return encode_event("positions", message, event_id)
+
+
+class CompactSession:
+    """Flight announced to one client per index, bounded by the reused index range"""
+
+    def __init__(self):
+        self._announced: Dict[int, str] = {}
+
+    def reset(self, flight_ids: Iterable[str] = ()):
+        """Start over after a snapshot, which announced exactly the given flights"""
+        self._announced = {flight_index.index_of(flight_id): flight_id for flight_id in flight_ids}
+
+    def announcements(self, flights: List[Tuple[int, str, Optional[str]]]) -> Dict[str, List[Optional[str]]]:
+        """Announcements for the flights this client has not seen, marking them as seen"""
+        announced = self._announced
+        new = {}
+        for index, flight_id, icao in flights:
+            if announced.get(index) != flight_id:
+                announced[index] = flight_id
+                new[str(index)] = [flight_id, icao]
+        return new
+
+    def frame(self, message_type: str, payload: str, flights: List[Tuple[int, str, Optional[str]]],
+              shared_frame: Optional[bytes] = None, event_id: Optional[str] = None) -> bytes:
+        """Positions frame for this client, the shared frame if nothing needs announcing"""
+        announcements = self.announcements(flights)
+        if not announcements and shared_frame is not None:
+            return shared_frame
+        return positions_frame(message_type, payload, len(flights), announcements, event_id)
+
+    def encode_deltas(self, event_type: str, deltas: Dict[str, Any]) -> Optional[bytes]:
+        """Encode merged deltas of a client that fell behind, None for events sent as JSON"""
+        if event_type != "positions":
+            return None
+        payload, flights = pack_positions(deltas, active=False)
+        return self.frame("update", payload, flights)
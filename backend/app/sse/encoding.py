@@ -0,0 +1,34 @@
+import json
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # Optional, falls back to the standard library encoder
+    orjson = None
+
+
+def dumps(data: Any) -> bytes:
+    """Encode data as compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data: bytes) -> Any:
+    """Decode JSON bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def encode_event(event_type: str, data: Any, event_id: Optional[str] = None) -> bytes:
+    """Encode a complete SSE frame, ready to be written to any number of clients"""
+    frame = b'event: ' + event_type.encode('utf-8') + b'\ndata: ' + dumps(data) + b'\n\n'
+    if event_id is not None:
+        frame = b'id: ' + event_id.encode('utf-8') + b'\n' + frame
+    return frame
+
+
+def encode_event_id(event_id: str) -> bytes:
+    """Frame without data, it only moves the client's Last-Event-ID forward"""
+    return b'id: ' + event_id.encode('utf-8') + b'\n\n'
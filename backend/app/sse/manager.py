@@ -1,22 +1,200 @@
+import asyncio
 import logging
 import threading
-from typing import Dict, Any, Optional
+import time
+from collections import deque
+from functools import partial
+from typing import Callable, Dict, Any, List, Optional, Union
 from fastapi import Request
-from asyncio import Queue
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+from .compact import CompactSession, pack_positions, positions_frame
+from .encoding import encode_event, encode_event_id
+from ..core.utils.spatial_index import BoundingBox, GridIndex
 
 logger = logging.getLogger("SSEManager")
 
+# Slow consumer policies applied when a client queue is full
+POLICY_DROP_OLDEST = "drop_oldest"  # Discard the oldest pending frame
+POLICY_COALESCE = "coalesce"        # Discard all pending frames, resend the latest state snapshot
+POLICY_DISCONNECT = "disconnect"    # Close the connection, the client reconnects and gets a snapshot
+SLOW_CLIENT_POLICIES = (POLICY_DROP_OLDEST, POLICY_COALESCE, POLICY_DISCONNECT)
+
+# Markers returned by ClientQueue.get() instead of a frame
+RESYNC = object()  # The stream should send a fresh snapshot
+CLOSED = object()  # The stream should end
+
+# Message envelopes of the delta events keyed by flight ID
+DELTA_MESSAGES = {
+    "positions": lambda deltas: {"type": "update", "count": len(deltas), "positions": deltas},
+    "categories": lambda deltas: {"categories": deltas},
+    "callsigns": lambda deltas: {"callsigns": deltas},
+}
+
+
+class ClientQueue:
+    """
+    Bounded queue of pre-encoded frames for a single SSE client.
+
+    Broadcasts never block: when the queue is full the slow consumer policy
+    decides what is given up. Delta events (positions, categories, callsigns)
+    are coalesced: a caught-up client gets the shared broadcast frame, a client
+    that still has something pending gets the deltas merged by flight ID into
+    one up-to-date frame per event type. Only used from the event loop thread.
+
+    encode_deltas can override how merged deltas are encoded, returning None
+    falls back to the JSON envelope.
+    """
+
+    def __init__(self, maxsize: int = 100, policy: str = POLICY_COALESCE,
+                 encode_deltas: Optional[Callable[[str, Dict[str, Any]], Optional[bytes]]] = None):
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.encode_deltas = encode_deltas
+        self._frames = deque()
+        self._enqueued_at = deque()
+        self._ready = asyncio.Event()
+        self._merged: Dict[str, Dict[str, Any]] = {}  # event type -> flight ID -> latest delta
+        self._merged_since = None
+        self._merged_event_id = None  # Event ID of the latest merged delta
+        self._resync = False
+        self._closed = False
+
+        # Counters for monitoring
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.deltas_coalesced = 0
+        self.resyncs = 0
+
+    def qsize(self) -> int:
+        return len(self._frames) + len(self._merged)
+
+    def lag_seconds(self) -> float:
+        """Age of the oldest frame or delta not yet picked up by the stream"""
+        oldest = self._enqueued_at[0] if self._enqueued_at else self._merged_since
+        return time.monotonic() - oldest if oldest is not None else 0.0
+
+    def put_delta(self, event_type: str, deltas: Dict[str, Any], frame: Union[bytes, Callable[[], bytes]],
+                  event_id: Optional[str] = None) -> bool:
+        """
+        Queue a delta event, merging it with pending deltas if the client is behind.
+        frame may be a callable, it is only encoded when the frame is actually queued.
+        """
+        if self._closed:
+            return False
+        if not self._frames and not self._merged and not self._resync:
+            return self.put_nowait(frame() if callable(frame) else frame)
+        if self._resync:
+            # The snapshot sent on resync already contains this delta
+            return True
+
+        merged = self._merged.get(event_type)
+        if merged is None:
+            merged = self._merged[event_type] = {}
+            if self._merged_since is None:
+                self._merged_since = time.monotonic()
+        self.deltas_coalesced += len(deltas)
+        merged.update(deltas)
+        if event_id is not None:
+            self._merged_event_id = event_id
+        self._ready.set()
+        return True
+
+    def put_nowait(self, frame: bytes) -> bool:
+        """Queue a frame, returns False if the client has to be disconnected"""
+        if self._closed:
+            return False
+
+        if len(self._frames) >= self.maxsize:
+            if self.policy == POLICY_DISCONNECT:
+                self.frames_dropped += len(self._frames)
+                self.close()
+                return False
+            if self.policy == POLICY_COALESCE:
+                self.frames_dropped += len(self._frames) + 1
+                self.request_resync()
+                return True
+            self._frames.popleft()
+            self._enqueued_at.popleft()
+            self.frames_dropped += 1
+
+        self._frames.append(frame)
+        self._enqueued_at.append(time.monotonic())
+        self._ready.set()
+        return True
+
+    def request_resync(self):
+        """Discard everything pending, the stream sends a fresh snapshot instead"""
+        self._frames.clear()
+        self._enqueued_at.clear()
+        self._clear_merged()
+        self._resync = True
+        self._ready.set()
+
+    def _clear_merged(self):
+        self._merged.clear()
+        self._merged_since = None
+        self._merged_event_id = None
+
+    def close(self):
+        self._closed = True
+        self._frames.clear()
+        self._enqueued_at.clear()
+        self._clear_merged()
+        self._ready.set()
+
+    async def get(self):
+        """Next frame, or the RESYNC / CLOSED marker"""
+        while True:
+            if self._closed:
+                return CLOSED
+            if self._resync:
+                self._resync = False
+                self.resyncs += 1
+                return RESYNC
+            if self._frames:
+                self._enqueued_at.popleft()
+                self.frames_sent += 1
+                return self._frames.popleft()
+            if self._merged:
+                event_type = next(iter(self._merged))
+                deltas = self._merged.pop(event_type)
+                self.frames_sent += 1
+                frame = self.encode_deltas(event_type, deltas) if self.encode_deltas is not None else None
+                if frame is None:
+                    frame = encode_event(event_type, DELTA_MESSAGES[event_type](deltas))
+                if not self._merged:
+                    # Only once every merged event type is out the client has caught up to the latest ID
+                    if self._merged_event_id is not None:
+                        frame += encode_event_id(self._merged_event_id)
+                    self._clear_merged()
+                return frame
+            self._ready.clear()
+            await self._ready.wait()
+
+
+def positions_equal(pos1: Dict[str, Any], pos2: Dict[str, Any]) -> bool:
+    """Check if two formatted positions are equal"""
+    return (pos1["lat"] == pos2["lat"] and
+            pos1["lon"] == pos2["lon"] and
+            pos1["alt"] == pos2["alt"] and
+            pos1.get("gs") == pos2.get("gs"))
+
 
 @dataclass
 class SSEClient:
-    """Represents an SSE client connection"""
+    """Represents an SSE client connection, its queue holds pre-encoded frames"""
     id: str
     request: Request
-    queue: Queue
+    queue: ClientQueue
     type: str  # 'positions' or 'flight'
     flight_id: Optional[str] = None
     last_activity: float = 0.0
+    connected_at: float = field(default_factory=time.time)
+    last_position: Optional[Dict[str, Any]] = None  # Last position sent to a flight client
+    bbox: Optional[BoundingBox] = None  # Viewport of a position client, None for everything
+    compact: Optional[CompactSession] = None  # Set for position clients using the compact encoding
+    military_only: bool = False  # Position client only interested in military aircraft
 
 
 class SSEConnectionManager:
@@ -24,11 +202,146 @@ class SSEConnectionManager:
     Manages SSE connections for real-time position updates
     """
 
-    def __init__(self):
+    def __init__(self, queue_size: int = 100, slow_client_policy: str = POLICY_COALESCE, resume_history: int = 60):
         # Store active connections
         self.active_connections: Dict[str, SSEClient] = {}
+        # Clients following a single flight, by flight ID
+        self._flight_clients: Dict[str, Dict[str, SSEClient]] = {}
         # Lock for thread safety when modifying connections
         self._lock = threading.Lock()
+        # Broadcasts are numbered '<boot>-<sequence>', the boot part invalidates IDs of a previous process
+        self.boot_id = format(int(time.time() * 1000), 'x')
+        self._sequence = 0
+        self._history = deque()  # (sequence, event type, deltas) of recent broadcasts
+        self.is_military: Optional[Callable[[str], bool]] = None  # icao24 classifier for military_only clients
+        self.configure(queue_size, slow_client_policy, resume_history)
+        self.slow_client_disconnects = 0
+
+    def configure(self, queue_size: int, slow_client_policy: str, resume_history: int = 60):
+        """Set the queue bound and slow consumer policy for new clients and the resume history length"""
+        if slow_client_policy not in SLOW_CLIENT_POLICIES:
+            logger.warning(f"Unknown slow client policy '{slow_client_policy}', using '{POLICY_COALESCE}'")
+            slow_client_policy = POLICY_COALESCE
+        self.queue_size = queue_size
+        self.slow_client_policy = slow_client_policy
+        self._history = deque(self._history, maxlen=max(0, resume_history))
+
+    @property
+    def last_event_id(self) -> str:
+        return f"{self.boot_id}-{self._sequence}"
+
+    def _record(self, event_type: str, deltas: Dict[str, Any]) -> str:
+        """Number a broadcast and keep its deltas for resuming clients, returns its event ID"""
+        self._sequence += 1
+        self._history.append((self._sequence, event_type, deltas))
+        return self.last_event_id
+
+    def _forget_history_if_idle(self):
+        """
+        Nothing is broadcast while no client is connected, so the history would
+        silently miss those cycles. Skip a sequence number to invalidate it.
+        """
+        if not self.active_connections and self._history:
+            self._history.clear()
+            self._sequence += 1
+
+    def _missed_deltas(self, last_event_id: Optional[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Deltas broadcast after an event ID merged per event type, None if they are no longer known"""
+        if not last_event_id:
+            return None
+        boot_id, _, sequence = last_event_id.strip().rpartition('-')
+        try:
+            sequence = int(sequence)
+        except ValueError:
+            return None
+        if boot_id != self.boot_id or sequence > self._sequence:
+            return None
+        if sequence < self._sequence and (not self._history or self._history[0][0] > sequence + 1):
+            return None
+
+        missed: Dict[str, Dict[str, Any]] = {}
+        for entry_sequence, event_type, deltas in self._history:
+            if entry_sequence > sequence:
+                missed.setdefault(event_type, {}).update(deltas)
+        return missed
+
+    def is_military_icao(self, icao24: Optional[str]) -> bool:
+        return bool(icao24) and self.is_military is not None and self.is_military(icao24)
+
+    def _filter_positions(self, client: SSEClient, positions: Dict[str, Any]) -> Dict[str, Any]:
+        """Position deltas matching a client's viewport and filters"""
+        if client.bbox is not None:
+            positions = {flight_id: pos for flight_id, pos in positions.items()
+                         if client.bbox.contains(pos["lat"], pos["lon"])}
+        if client.military_only:
+            positions = {flight_id: pos for flight_id, pos in positions.items() if self.is_military_icao(pos.get("icao"))}
+        return positions
+
+    def resume_frames(self, client: SSEClient, last_event_id: Optional[str]) -> Optional[List[bytes]]:
+        """
+        Frames bringing a reconnecting position client from last_event_id up to
+        date, None if it needs a full snapshot instead
+        """
+        missed = self._missed_deltas(last_event_id)
+        if missed is None:
+            return None
+
+        frames = []
+        for event_type, deltas in missed.items():
+            if event_type == "positions":
+                deltas = self._filter_positions(client, deltas)
+            if not deltas:
+                continue
+            frame = client.compact.encode_deltas(event_type, deltas) if client.compact is not None else None
+            frames.append(frame if frame is not None else encode_event(event_type, DELTA_MESSAGES[event_type](deltas)))
+        frames.append(encode_event_id(self.last_event_id))
+        return frames
+
+    def create_queue(self, resync_supported: bool = True, compact: Optional[CompactSession] = None) -> ClientQueue:
+        """
+        Create a bounded queue for a new client. Streams that cannot resend a
+        snapshot fall back to dropping the oldest frames instead of coalescing.
+        """
+        policy = self.slow_client_policy
+        if policy == POLICY_COALESCE and not resync_supported:
+            policy = POLICY_DROP_OLDEST
+        return ClientQueue(self.queue_size, policy, compact.encode_deltas if compact is not None else None)
+
+    def _enqueue(self, client: SSEClient, frame: Union[bytes, Callable[[], bytes]], event_type: str = None,
+                 deltas: Dict[str, Any] = None, event_id: Optional[str] = None) -> bool:
+        """
+        Queue a frame for a client, returns False if it was disconnected as too slow.
+        Frames of delta events pass their deltas so they can be coalesced.
+        """
+        queued = client.queue.put_delta(event_type, deltas, frame, event_id) if deltas is not None \
+            else client.queue.put_nowait(frame)
+        if queued:
+            return True
+        self.slow_client_disconnects += 1
+        logger.info(f"Disconnecting slow SSE client {client.id} ({client.queue.frames_dropped} frames dropped)")
+        return False
+
+    def get_client_stats(self) -> List[Dict[str, Any]]:
+        """Queue depth, lag and drop counters per connected client"""
+        with self._lock:
+            clients = list(self.active_connections.values())
+
+        now = time.time()
+        return [{
+            "id": client.id,
+            "type": client.type,
+            "flight_id": client.flight_id,
+            "connected_seconds": round(now - client.connected_at, 1),
+            "encoding": "compact" if client.compact is not None else "json",
+            "policy": client.queue.policy,
+            "queue_depth": client.queue.qsize(),
+            "queue_size": client.queue.maxsize,
+            "lag_seconds": round(client.queue.lag_seconds(), 3),
+            "frames_sent": client.queue.frames_sent,
+            "frames_dropped": client.queue.frames_dropped,
+            "deltas_coalesced": client.queue.deltas_coalesced,
+            "resyncs": client.queue.resyncs,
+        } for client in clients]
 
     def add_client(self, client: SSEClient):
         """
@@ -36,6 +349,8 @@ class SSEConnectionManager:
         """
         with self._lock:
             self.active_connections[client.id] = client
+            if client.type == "flight":
+                self._flight_clients.setdefault(client.flight_id, {})[client.id] = client
 
         client_info = f"New SSE connection established for {client.type}"
         if client.flight_id:
@@ -44,15 +359,65 @@ class SSEConnectionManager:
             client_info += f" from {client.request.headers['x-forwarded-for']}"
         logger.debug(f"{client_info}. Total active: {len(self.active_connections)}")
 
-    def remove_client(self, client_id: str):
+    def remove_client(self, client_id: str, close_queue: bool = True):
         """
-        Remove an SSE client connection
+        Remove an SSE client connection. Subscriptions sharing the queue of a
+        connection that stays open pass close_queue=False.
         """
         with self._lock:
-            if client_id in self.active_connections:
-                del self.active_connections[client_id]
+            self._pop_client(client_id, close_queue)
+            self._forget_history_if_idle()
         logger.debug(f"SSE connection closed. Total active: {len(self.active_connections)}")
 
+    def _pop_client(self, client_id: str, close_queue: bool = True) -> Optional[SSEClient]:
+        """Remove a client from the connections and the flight index and close its queue, requires the lock"""
+        client = self.active_connections.pop(client_id, None)
+        if client is None:
+            return None
+        if client.type == "flight":
+            subscribers = self._flight_clients.get(client.flight_id)
+            if subscribers is not None:
+                subscribers.pop(client_id, None)
+                if not subscribers:
+                    del self._flight_clients[client.flight_id]
+        if close_queue:
+            client.queue.close()
+        return client
+
+    def has_clients(self) -> bool:
+        """Check if any SSE client is connected"""
+        return len(self.active_connections) > 0
+
+    async def publish_positions(self, positions: Dict[str, Any]):
+        """
+        Fan out one update cycle's position deltas: once to all position
+        clients and to the subscribers of each changed flight
+        """
+        await self.broadcast_positions(positions)
+
+        with self._lock:
+            flight_ids = [flight_id for flight_id in self._flight_clients if flight_id in positions]
+        for flight_id in flight_ids:
+            await self.send_flight_position(flight_id, positions[flight_id])
+
+    def set_viewport(self, client_id: str, bbox: Optional[BoundingBox]) -> bool:
+        """Change the viewport of a position client, it is resent the flights inside it"""
+        client = self.get_client(client_id)
+        if client is None or client.type != "positions":
+            return False
+        client.bbox = bbox
+        client.queue.request_resync()
+        return True
+
+    def resync_position_clients(self):
+        """Resend the snapshot to every position client, e.g. after the live state was replaced"""
+        with self._lock:
+            clients = [client for client in self.active_connections.values() if client.type == "positions"]
+            self._history.clear()
+            self._sequence += 1
+        for client in clients:
+            client.queue.request_resync()
+
     def get_client(self, client_id: str) -> Optional[SSEClient]:
         """Get a client by ID"""
         with self._lock:
@@ -65,11 +430,8 @@ class SSEConnectionManager:
         client = self.get_client(client_id)
         if client:
             try:
-                message = {
-                    "event": event_type,
-                    "data": data
-                }
-                await client.queue.put(message)
+                if not self._enqueue(client, encode_event(event_type, data)):
+                    self.remove_client(client_id)
             except Exception as e:
                 logger.error(f"Error sending to SSE client {client_id}: {str(e)}")
                 self.remove_client(client_id)
@@ -102,17 +464,50 @@ class SSEConnectionManager:
             "positions": positions
         }
 
+        # Serialize once, every client gets the same frame
+        event_id = self._record("positions", positions)
+        frame = encode_event("positions", message, event_id)
+
         logger.debug(f"Broadcasting {len(positions)} position updates to {len(position_clients)} connected clients")
 
         disconnected_clients = []
+        delta_index = None
+        # Frame, deltas and packed compact data shared by clients with the same viewport and filter
+        viewport_deltas: Dict[tuple, list] = {(None, False): [frame, positions, None]}
 
         # Broadcast to all connected position clients
         for client_id, client in position_clients.items():
             try:
-                await client.queue.put({
-                    "event": "positions",
-                    "data": message
-                })
+                view = (client.bbox, client.military_only)
+                if view not in viewport_deltas:
+                    in_view = positions
+                    if client.bbox is not None:
+                        if delta_index is None:
+                            delta_index = GridIndex()
+                            for flight_id, pos in positions.items():
+                                delta_index.update(flight_id, pos["lat"], pos["lon"])
+                        in_view = {flight_id: positions[flight_id] for flight_id in delta_index.query(client.bbox)}
+                    if client.military_only:
+                        in_view = {flight_id: pos for flight_id, pos in in_view.items()
+                                   if self.is_military_icao(pos.get("icao"))}
+                    viewport_deltas[view] = [
+                        encode_event("positions", DELTA_MESSAGES["positions"](in_view), event_id) if in_view else None,
+                        in_view,
+                        None
+                    ]
+                shared = viewport_deltas[view]
+                client_frame, client_positions, packed = shared
+                if client_frame is None:
+                    continue
+                if client.compact is not None:
+                    if packed is None:
+                        payload, flights = pack_positions(client_positions)
+                        packed = shared[2] = (payload, flights,
+                                              positions_frame("update", payload, len(flights), event_id=event_id))
+                    # Shared frame unless this client has flights to be announced
+                    client_frame = partial(client.compact.frame, "update", *packed, event_id=event_id)
+                if not self._enqueue(client, client_frame, "positions", client_positions, event_id):
+                    disconnected_clients.append(client_id)
             except Exception as e:
                 logger.error(f"Error sending to SSE client {client_id}: {str(e)}")
                 # If connection is closed or had an error, mark for removal
@@ -122,8 +517,8 @@ class SSEConnectionManager:
         if disconnected_clients:
             with self._lock:
                 for client_id in disconnected_clients:
-                    if client_id in self.active_connections:
-                        del self.active_connections[client_id]
+                    self._pop_client(client_id)
+                self._forget_history_if_idle()
                 logger.debug(
                     f"Removed {len(disconnected_clients)} disconnected clients. {len(self.active_connections)} remaining."
                 )
@@ -157,6 +552,9 @@ class SSEConnectionManager:
             "categories": categories
         }
 
+        event_id = self._record("categories", categories)
+        frame = encode_event("categories", message, event_id)
+
         logger.debug(f"Broadcasting {len(categories)} category updates to {len(position_clients)} connected clients")
 
         disconnected_clients = []
@@ -164,10 +562,8 @@ class SSEConnectionManager:
         # Broadcast to all connected position clients
         for client_id, client in position_clients.items():
             try:
-                await client.queue.put({
-                    "event": "categories",
-                    "data": message
-                })
+                if not self._enqueue(client, frame, "categories", categories, event_id):
+                    disconnected_clients.append(client_id)
             except Exception as e:
                 logger.error(f"Error sending categories to SSE client {client_id}: {str(e)}")
                 disconnected_clients.append(client_id)
@@ -176,8 +572,8 @@ class SSEConnectionManager:
         if disconnected_clients:
             with self._lock:
                 for client_id in disconnected_clients:
-                    if client_id in self.active_connections:
-                        del self.active_connections[client_id]
+                    self._pop_client(client_id)
+                self._forget_history_if_idle()
                 logger.debug(f"Removed {len(disconnected_clients)} disconnected clients")
 
     async def broadcast_callsigns(self, callsigns: Dict[str, str]):
@@ -209,6 +605,9 @@ class SSEConnectionManager:
             "callsigns": callsigns
         }
 
+        event_id = self._record("callsigns", callsigns)
+        frame = encode_event("callsigns", message, event_id)
+
         logger.debug(f"Broadcasting {len(callsigns)} callsign updates to {len(position_clients)} connected clients")
 
         disconnected_clients = []
@@ -216,10 +615,8 @@ class SSEConnectionManager:
         # Broadcast to all connected position clients
         for client_id, client in position_clients.items():
             try:
-                await client.queue.put({
-                    "event": "callsigns",
-                    "data": message
-                })
+                if not self._enqueue(client, frame, "callsigns", callsigns, event_id):
+                    disconnected_clients.append(client_id)
             except Exception as e:
                 logger.error(f"Error sending callsigns to SSE client {client_id}: {str(e)}")
                 disconnected_clients.append(client_id)
@@ -228,8 +625,8 @@ class SSEConnectionManager:
         if disconnected_clients:
             with self._lock:
                 for client_id in disconnected_clients:
-                    if client_id in self.active_connections:
-                        del self.active_connections[client_id]
+                    self._pop_client(client_id)
+                self._forget_history_if_idle()
                 logger.debug(f"Removed {len(disconnected_clients)} disconnected clients")
 
     async def send_flight_position(self, flight_id: str, position_data: Dict[str, Any]):
@@ -239,9 +636,9 @@ class SSEConnectionManager:
         with self._lock:
             # Get clients subscribed to this flight
             flight_clients = {
-                client_id: client 
-                for client_id, client in self.active_connections.items() 
-                if client.type == "flight" and client.flight_id == flight_id
+                client_id: client
+                for client_id, client in self._flight_clients.get(flight_id, {}).items()
+                if client.last_position is None or not positions_equal(client.last_position, position_data)
             }
 
         if not flight_clients:
@@ -252,15 +649,15 @@ class SSEConnectionManager:
             "flight_id": flight_id,
             **position_data
         }
+        frame = encode_event("flight_position", message)
 
         disconnected_clients = []
 
         for client_id, client in flight_clients.items():
             try:
-                await client.queue.put({
-                    "event": "flight_position",
-                    "data": message
-                })
+                client.last_position = position_data
+                if not self._enqueue(client, frame):
+                    disconnected_clients.append(client_id)
             except Exception as e:
                 logger.error(f"Error sending flight position to SSE client {client_id}: {str(e)}")
                 disconnected_clients.append(client_id)
@@ -269,8 +666,8 @@ class SSEConnectionManager:
         if disconnected_clients:
             with self._lock:
                 for client_id in disconnected_clients:
-                    if client_id in self.active_connections:
-                        del self.active_connections[client_id]
+                    self._pop_client(client_id)
+                self._forget_history_if_idle()
                 logger.debug(f"Removed {len(disconnected_clients)} disconnected flight clients")
 
 
@@ -1,12 +1,26 @@
 import logging
 from typing import Any, Dict, Set, Callable, Optional
 import asyncio
+from itertools import islice
+
+from .bus import BusPublisher
+from .compact import flight_index
+from .manager import sse_manager
 
 logger = logging.getLogger('SSENotifier')
 
 
 class SSENotifier:
+    """
+    Hands each update cycle's deltas from the updater thread to the event loop.
+
+    Every delta is scheduled exactly once on the SSE connection manager, which
+    fans it out to all connected clients, and published on the live bus if this
+    process feeds API workers. Additional callbacks can still be registered for
+    other consumers; they are invoked once per delta as well.
+    """
     _main_loop: Optional[asyncio.AbstractEventLoop] = None
+    _bus: Optional[BusPublisher] = None  # Set when publishing to API worker processes
 
     def __init__(self):
         self._callbacks: Set[Callable] = set()
@@ -17,26 +31,58 @@ class SSENotifier:
                 logger.info("Captured main event loop for SSE notifications")
         except RuntimeError:
             logger.warning("No event loop available during SSENotifier initialization")
-        
+
     def register_callback(self, callback: Callable[[Dict[str, Any]], None]):
         """Register a callback function to notify when positions are updated"""
         self._callbacks.add(callback)
         return callback
-        
+
     def unregister_callback(self, callback: Callable[[Dict[str, Any]], None]):
         """Unregister a previously registered callback"""
         if callback in self._callbacks:
             self._callbacks.remove(callback)
             return True
         return False
-        
+
     def has_callbacks(self):
-        """Check if there are any registered callbacks"""
-        return len(self._callbacks) > 0
-        
+        """Check if there is anyone to notify: SSE clients, bus subscribers or registered callbacks"""
+        return sse_manager.has_clients() or self._has_bus_subscribers() or len(self._callbacks) > 0
+
+    def _has_bus_subscribers(self) -> bool:
+        return SSENotifier._bus is not None and SSENotifier._bus.has_subscribers()
+
+    def _get_loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        try:
+            return asyncio.get_running_loop()
+        except RuntimeError:
+            # No running loop in current thread - use the stored main loop
+            if SSENotifier._main_loop is None:
+                logger.error("No event loop available for SSE notifications")
+            return SSENotifier._main_loop
+
+    def _schedule(self, coro):
+        """Schedule a coroutine on the event loop from any thread"""
+        loop = self._get_loop()
+        if loop is None:
+            coro.close()
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(coro, loop)
+        except Exception as e:
+            coro.close()
+            logger.error(f"Failed to schedule SSE broadcast: {str(e)}")
+
     def notify_clients(self, positions_dict):
-        """Notify all registered clients with position updates"""
-        if not positions_dict or not self._callbacks:
+        """Fan out position updates once to all SSE clients and registered callbacks"""
+        if not positions_dict:
+            return
+
+        if sse_manager.has_clients():
+            self._schedule(sse_manager.publish_positions(positions_dict))
+        if self._has_bus_subscribers():
+            SSENotifier._bus.publish("positions", positions_dict)
+
+        if not self._callbacks:
             return
 
         logger.debug(f"Notifying {len(self._callbacks)} callbacks with {len(positions_dict)} positions")
@@ -44,29 +90,8 @@ class SSENotifier:
         callbacks_to_remove = set()
         for callback in self._callbacks:
             try:
-                # Check if callback is async
                 if asyncio.iscoroutinefunction(callback):
-                    # Try to get the running loop first
-                    loop = None
-                    try:
-                        loop = asyncio.get_running_loop()
-                        logger.debug("Using currently running event loop")
-                    except RuntimeError:
-                        # No running loop in current thread - use the stored main loop
-                        if SSENotifier._main_loop is not None:
-                            loop = SSENotifier._main_loop
-                            logger.debug("Using stored main event loop")
-                        else:
-                            logger.error("No event loop available for async callback")
-                            continue
-
-                    # Schedule the coroutine in the event loop
-                    if loop is not None:
-                        try:
-                            future = asyncio.run_coroutine_threadsafe(callback(positions_dict), loop)
-                            logger.debug("Scheduled async callback successfully")
-                        except Exception as e:
-                            logger.error(f"Failed to schedule async callback: {str(e)}")
+                    self._schedule(callback(positions_dict))
                 else:
                     callback(positions_dict)
             except Exception as e:
@@ -75,7 +100,7 @@ class SSENotifier:
 
         if callbacks_to_remove:
             self._callbacks.difference_update(callbacks_to_remove)
-            
+
     def notify_position_changes(self, all_cached_flights: Dict[str, Any], changed_flight_ids: Set[str]):
         """
         Notify clients of position changes with proper data transformation
@@ -84,14 +109,30 @@ class SSENotifier:
             all_cached_flights: Dictionary of flight_id -> PositionReport
             changed_flight_ids: Set of flight IDs that have changed
         """
-        from ..core.models.position_report import PositionReport
-
         if not self.has_callbacks() or not changed_flight_ids:
             return
 
         positions_dict = {}
-        for flight_id, pos in all_cached_flights.items():
-            if str(flight_id) in changed_flight_ids:
+        for flight_id in changed_flight_ids:
+            pos = all_cached_flights.get(flight_id)
+            if pos is None:
+                continue
+            position_data = {
+                "icao": pos.icao24,
+                "lat": pos.lat,
+                "lon": pos.lon,
+                "alt": pos.alt,
+                "track": pos.track
+            }
+            if pos.gs is not None:
+                position_data["gs"] = pos.gs
+            positions_dict[str(flight_id)] = position_data
+
+        # Fallback if no positions matched (should be rare)
+        if not positions_dict and all_cached_flights:
+            logger.warning("No changed positions match cached flights")
+
+            for flight_id, pos in islice(all_cached_flights.items(), 50):  # Limit to 50 positions
                 position_data = {
                     "icao": pos.icao24,
                     "lat": pos.lat,
@@ -103,27 +144,6 @@ class SSENotifier:
                     position_data["gs"] = pos.gs
                 positions_dict[str(flight_id)] = position_data
 
-        # Fallback if no positions matched (should be rare)
-        if not positions_dict and all_cached_flights:
-            logger.warning("No changed positions match cached flights")
-
-            count = 0
-            for flight_id, pos in all_cached_flights.items():
-                if count < 50:  # Limit to 50 positions
-                    position_data = {
-                        "icao": pos.icao24,
-                        "lat": pos.lat,
-                        "lon": pos.lon,
-                        "alt": pos.alt,
-                        "track": pos.track
-                    }
-                    if pos.gs is not None:
-                        position_data["gs"] = pos.gs
-                    positions_dict[str(flight_id)] = position_data
-                    count += 1
-                else:
-                    break
-
         if positions_dict:
             self.notify_clients(positions_dict)
 
@@ -134,36 +154,14 @@ class SSENotifier:
         Args:
             category_changes: Dictionary of flight_id -> category_number
         """
-        from ..sse.manager import sse_manager
-
-        if not self.has_callbacks() or not category_changes:
+        if not category_changes:
             return
 
         logger.debug(f"Notifying category changes for {len(category_changes)} flights")
-
-        # Use the SSE manager to broadcast via the categories event
-        for callback in self._callbacks:
-            try:
-                if asyncio.iscoroutinefunction(callback):
-                    # For async callbacks, we need to schedule the broadcast
-                    loop = None
-                    try:
-                        loop = asyncio.get_running_loop()
-                    except RuntimeError:
-                        if SSENotifier._main_loop is not None:
-                            loop = SSENotifier._main_loop
-
-                    if loop is not None:
-                        try:
-                            # Call the sse_manager.broadcast_categories directly
-                            asyncio.run_coroutine_threadsafe(
-                                sse_manager.broadcast_categories(category_changes),
-                                loop
-                            )
-                        except Exception as e:
-                            logger.error(f"Failed to schedule category broadcast: {str(e)}")
-            except Exception as e:
-                logger.error(f"Error in category change notification: {str(e)}", exc_info=True)
+        if sse_manager.has_clients():
+            self._schedule(sse_manager.broadcast_categories(dict(category_changes)))
+        if self._has_bus_subscribers():
+            SSENotifier._bus.publish("categories", category_changes)
 
     def notify_callsign_changes(self, callsign_changes: Dict[str, str]):
         """
@@ -172,33 +170,21 @@ class SSENotifier:
         Args:
             callsign_changes: Dictionary of flight_id -> callsign
         """
-        from ..sse.manager import sse_manager
-
-        if not self.has_callbacks() or not callsign_changes:
+        if not callsign_changes:
             return
 
         logger.debug(f"Notifying callsign changes for {len(callsign_changes)} flights")
+        if sse_manager.has_clients():
+            self._schedule(sse_manager.broadcast_callsigns(dict(callsign_changes)))
+        if self._has_bus_subscribers():
+            SSENotifier._bus.publish("callsigns", callsign_changes)
 
-        # Use the SSE manager to broadcast via the callsigns event
-        for callback in self._callbacks:
-            try:
-                if asyncio.iscoroutinefunction(callback):
-                    # For async callbacks, we need to schedule the broadcast
-                    loop = None
-                    try:
-                        loop = asyncio.get_running_loop()
-                    except RuntimeError:
-                        if SSENotifier._main_loop is not None:
-                            loop = SSENotifier._main_loop
-
-                    if loop is not None:
-                        try:
-                            # Call the sse_manager.broadcast_callsigns directly
-                            asyncio.run_coroutine_threadsafe(
-                                sse_manager.broadcast_callsigns(callsign_changes),
-                                loop
-                            )
-                        except Exception as e:
-                            logger.error(f"Failed to schedule callsign broadcast: {str(e)}")
-            except Exception as e:
-                logger.error(f"Error in callsign change notification: {str(e)}", exc_info=True)
\ No newline at end of file
+    def notify_removed_flights(self, flight_ids: Set[str]):
+        """
+        Notify bus subscribers of flights that left the active flights view.
+        SSE clients expire flights on their own.
+        """
+        # Called every cycle, also frees indexes retired long enough for reuse
+        flight_index.release(flight_ids)
+        if flight_ids and self._has_bus_subscribers():
+            SSENotifier._bus.publish("removed", list(flight_ids))
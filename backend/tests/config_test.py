@@ -32,4 +32,17 @@ class ConfigTest(unittest.TestCase):
             self.assertEqual(True, config.UNKNOWN_AIRCRAFT_CRAWLING)
             self.assertTrue(isinstance(config.LOGGING_CONFIG, LoggingConfig) )
 
-    
\ No newline at end of file
+    def test_fractional_source_rates(self):
+        "Test that crawler source rates accept fractions"
+
+        env_vars = {
+            'SERVICE_URL': 'http://path/to/service',
+            'CRAWLER_SOURCE_RATE': '0.5',
+            'CRAWLER_SOURCE_MAX_RATE': '2.5'
+        }
+
+        with patch.dict(os.environ, env_vars):
+
+            config = Config()
+            self.assertEqual(0.5, config.CRAWLER_SOURCE_RATE)
+            self.assertEqual(2.5, config.CRAWLER_SOURCE_MAX_RATE)
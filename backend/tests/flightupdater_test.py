@@ -1,6 +1,11 @@
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
-from app.core.services.flight_updater_coordinator import FlightUpdaterCoordinator
+from app.core.services.flight_updater_coordinator import FlightUpdaterCoordinator, STAGE_STARTING, \
+    STAGE_CACHE_WARMED, STAGE_READY, STAGE_FAILED
+from app.core.services.live_state import LiveStateTable
+from app.core.models.position_report import PositionReport
+from app.crawling.aircraft_queue import SharedAircraftQueue
+from app.scheduling import warm_start_updater
 from tests.db_base_test import MongoDBBaseTestCase
 
 
@@ -65,4 +70,134 @@ class FlightUpdaterCoordinatorTest(MongoDBBaseTestCase):
         result = self.sut.get_silhouete_params()
         
         self.assertEqual(result, expected_params)
-        self.mock_radar_service.get_silhouete_params.assert_called_once()
\ No newline at end of file
+        self.mock_radar_service.get_silhouete_params.assert_called_once()
+
+    def test_warm_start_stages(self):
+        """Test that update cycles wait for the warm start and the first cycle makes the updater ready"""
+        self.sut._live_state = LiveStateTable()
+        self.sut._flight_repository = MagicMock()
+        self.sut._unknown_aircraft_manager = MagicMock()
+        self.sut._performance_monitor = MagicMock()
+        self.sut._performance_monitor.stop_timer.return_value = 0.0
+        self.mock_radar_service.query_live_flights.return_value = []
+
+        self.sut.update()
+        self.assertEqual(STAGE_STARTING, self.sut.startup_stage)
+        self.mock_radar_service.query_live_flights.assert_not_called()
+
+        def initialize(repository, since=None, progress=None):
+            progress(3, 2)
+            return {}
+        self.mock_flight_manager.initialize.side_effect = initialize
+        self.mock_position_manager.restore_positions.return_value = 2
+        self.sut.warm_start()
+
+        status = self.sut.get_startup_status()
+        self.assertEqual(STAGE_CACHE_WARMED, status["stage"])
+        self.assertEqual((3, 2, 2), (status["warm_start"]["flights_read"], status["warm_start"]["flights_loaded"],
+                                     status["warm_start"]["positions_restored"]))
+
+        self.sut.update()
+        self.assertEqual(STAGE_READY, self.sut.startup_stage)
+        self.mock_radar_service.query_live_flights.assert_called_once()
+
+    def test_failed_first_cycle_is_not_ready(self):
+        """Test that a first update cycle that failed keeps the updater out of ready"""
+        self.sut.startup_stage = STAGE_CACHE_WARMED
+        self.sut._aircraft_queue = SharedAircraftQueue()
+        self.sut._performance_monitor = MagicMock()
+        self.sut._performance_monitor.stop_timer.return_value = 0.0
+        self.mock_flight_manager.filter_military_only.side_effect = lambda positions: positions
+        self.mock_flight_manager.update_flights.side_effect = RuntimeError("connection reset")
+        self.mock_radar_service.query_live_flights.return_value = [PositionReport("4b1a01", 47.0, 8.0, 1000)]
+
+        self.sut.update()
+        self.assertEqual(STAGE_CACHE_WARMED, self.sut.startup_stage)
+
+        self.mock_flight_manager.update_flights.side_effect = None
+        self.mock_position_manager.refresh_active_flights.reset_mock()
+        self.sut.update()
+        self.assertEqual(STAGE_READY, self.sut.startup_stage)
+        self.mock_position_manager.refresh_active_flights.assert_called_once()
+
+    def test_metadata_classification_is_off_the_ingest_path(self):
+        """Test that update cycles only queue live aircraft and the classifier job drains them"""
+        self.sut.startup_stage = STAGE_READY
+        self.sut._aircraft_queue = SharedAircraftQueue(max_size=2)
+        self.sut._unknown_aircraft_manager = MagicMock()
+        self.sut._performance_monitor = MagicMock()
+        self.sut._performance_monitor.stop_timer.return_value = 0.0
+        self.mock_flight_manager.filter_military_only.return_value = []
+        self.mock_radar_service.query_live_flights.return_value = [
+            PositionReport(icao24, 47.0, 8.0, 1000) for icao24 in ("4b1a01", "4b1a02", "4b1a03")]
+
+        self.sut.update()
+        self.sut.update()
+
+        self.sut._unknown_aircraft_manager.schedule_aircraft_for_processing.assert_not_called()
+        self.sut.classify_queued_aircraft()
+        self.sut._unknown_aircraft_manager.schedule_aircraft_for_processing.assert_called_once_with({"4b1a01", "4b1a02"})
+
+        stats = self.sut.get_classification_stats()
+        self.assertEqual((0, 2, 2, 1, 2), (stats["size"], stats["total_added"], stats["total_dropped"],
+                                           stats["runs"], stats["aircraft_classified"]))
+
+    def test_quiet_cycle_evicts_stale_flights(self):
+        """Test that cycles without positions still release stale live state"""
+        self.sut.startup_stage = STAGE_READY
+        self.sut._performance_monitor = MagicMock()
+        self.sut._performance_monitor.stop_timer.return_value = 0.0
+        self.mock_radar_service.query_live_flights.return_value = []
+        self.mock_flight_manager.evict_stale_flights.return_value = ["flight1"]
+
+        self.sut.update()
+
+        self.mock_position_manager.discard_flights.assert_called_once_with(["flight1"])
+        self.mock_flight_manager.update_flights.assert_not_called()
+
+    def test_quiet_cycle_saves_checkpoint(self):
+        """Test that the live state checkpoint is refreshed when the military-only filter leaves nothing"""
+        self.sut.startup_stage = STAGE_READY
+        self.sut._aircraft_queue = SharedAircraftQueue()
+        self.sut._performance_monitor = MagicMock()
+        self.sut._performance_monitor.stop_timer.return_value = 0.0
+        self.sut._checkpoint = MagicMock()
+        self.sut._live_state = LiveStateTable()
+        self.mock_flight_manager.filter_military_only.return_value = []
+        self.mock_radar_service.query_live_flights.return_value = [PositionReport("4b1a01", 47.0, 8.0, 1000)]
+
+        self.sut.update()
+
+        self.sut._checkpoint.save.assert_called_once()
+
+    def test_failed_warm_start(self):
+        """Test that a failing warm start is reported"""
+        self.sut._live_state = LiveStateTable()
+        self.sut._flight_repository = MagicMock()
+        self.mock_flight_manager.initialize.side_effect = RuntimeError("connection reset")
+
+        with self.assertRaises(RuntimeError):
+            self.sut.warm_start()
+
+        status = self.sut.get_startup_status()
+        self.assertEqual(STAGE_FAILED, status["stage"])
+        self.assertEqual("connection reset", status["warm_start"]["error"])
+        self.assertFalse(self.sut.is_warmed_up)
+
+    def test_failed_warm_start_is_retried(self):
+        """Test that the background warm start retries until the cache is warm"""
+        self.sut._live_state = LiveStateTable()
+        self.sut._flight_repository = MagicMock()
+        self.sut._checkpoint = None
+        self.mock_flight_manager.initialize.side_effect = [RuntimeError("connection reset"), {}]
+        app = MagicMock()
+        app.state.mongodb = None
+        on_warm = MagicMock()
+
+        with patch('app.scheduling.WARM_START_RETRY_SEC', 0.01):
+            warm_start_updater(app, self.sut, on_warm)
+
+        status = self.sut.get_startup_status()
+        self.assertEqual(STAGE_CACHE_WARMED, status["stage"])
+        self.assertEqual((2, None), (status["warm_start"]["attempts"], status["warm_start"]["error"]))
+        on_warm.assert_called_once()
\ No newline at end of file
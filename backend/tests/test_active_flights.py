@@ -0,0 +1,62 @@
+import unittest
+
+from app.core.models.position_report import PositionReport
+from app.core.services.active_flights import ActiveFlightsView
+from app.core.services.live_state import LiveStateTable
+
+
+class ActiveFlightsViewTest(unittest.TestCase):
+
+    def setUp(self):
+        self.live_state = LiveStateTable()
+        self.sut = ActiveFlightsView(self.live_state, max_age_sec=60, bucket_sec=5)
+
+    def _store(self, icao24, flight_id, last_contact, lat=47.0):
+        slot = self.live_state.assign_flight(icao24, flight_id, last_contact)
+        self.live_state.set_position(slot, PositionReport(icao24, lat, 8.0, 1000))
+        return slot
+
+    def test_snapshot_is_replaced_not_mutated(self):
+        slot = self._store('4b1a5f', 'flight1', 1000.0)
+        self.sut.refresh([slot], now=1000.0)
+        first = self.sut.snapshot
+
+        self._store('4b1a5f', 'flight1', 1002.0, lat=47.1)
+        self.sut.refresh([slot], now=1002.0)
+
+        self.assertEqual(47.0, first['flight1'].lat)
+        self.assertEqual(47.1, self.sut.snapshot['flight1'].lat)
+
+    def test_flights_expire_unless_contacted(self):
+        quiet = self._store('4b1a5f', 'flight1', 1000.0)
+        busy = self._store('3b76b3', 'flight2', 1000.0)
+        self.sut.refresh([quiet, busy], now=1000.0)
+
+        # Flight update without a new position keeps the flight active
+        self.live_state.touch(busy, 1050.0)
+        self.sut.refresh([], now=1070.0)
+
+        self.assertEqual({'flight2'}, set(self.sut.snapshot))
+        self.assertEqual({'flight1'}, self.sut.removed_flight_ids)
+
+    def test_removed_aircraft_leave_the_view(self):
+        slot = self._store('4b1a5f', 'flight1', 1000.0)
+        self._store('3b76b3', 'flight2', 1000.0)
+        self.sut.refresh(self.live_state.occupied_slots(), now=1000.0)
+
+        ended = self.live_state.remove(['4b1a5f', 'unknown'])
+        self.sut.refresh(ended, now=1001.0)
+
+        self.assertEqual({slot: 'flight1'}, ended)
+        self.assertEqual({'flight2'}, set(self.sut.snapshot))
+        self.assertEqual({'flight1'}, self.sut.removed_flight_ids)
+
+    def test_new_flight_replaces_previous_flight(self):
+        slot = self._store('4b1a5f', 'flight1', 1000.0)
+        self.sut.refresh([slot], now=1000.0)
+
+        self._store('4b1a5f', 'flight2', 1001.0)
+        self.sut.refresh([slot], now=1001.0)
+
+        self.assertEqual({'flight2'}, set(self.sut.snapshot))
+        self.assertEqual({'flight1'}, self.sut.removed_flight_ids)
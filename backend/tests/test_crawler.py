@@ -0,0 +1,166 @@
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.core.models.aircraft import Aircraft
+from app.crawling.crawler import AirplaneCrawler
+from app.crawling.utils.rate_limiter import AdaptiveTokenBucket
+from app.crawling.utils.source_backoff import CircuitBreaker, CircuitBreakerRegistry, CircuitState
+from app.data.sources.metadata_sources import AircraftMetadataSource
+from app.data.sources.metadata_sources.query_result import QueryResult
+
+
+class FakeSource(AircraftMetadataSource):
+
+    def __init__(self, source_name, delay=0.0, **fields):
+        self.source_name = source_name
+        self.delay = delay
+        self.fields = fields
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def name(self):
+        return self.source_name
+
+    def accept(self, modes_address):
+        return True
+
+    def query_aircraft(self, mode_s_hex):
+        return self.query_aircraft_with_status(mode_s_hex).aircraft
+
+    def query_aircraft_with_status(self, mode_s_hex):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        if not self.fields:
+            return QueryResult.not_found()
+        return QueryResult.success(Aircraft(mode_s_hex.upper(), source=self.source_name, **self.fields))
+
+
+def create_crawler(sources, **config):
+    config = SimpleNamespace(LOGGING_CONFIG=None, NIGHTHAWK_PROXY_URL=None, **{
+        'CRAWLER_SOURCE_RATE': 1000, 'CRAWLER_SOURCE_MAX_RATE': 1000, **config
+    })
+    with patch('app.crawling.crawler.HexdbIo', return_value=sources[0]), \
+            patch('app.crawling.crawler.OpenskyNet', return_value=sources[1]):
+        crawler = AirplaneCrawler(config, MagicMock())
+    crawler.aircraft_repo = MagicMock()
+    crawler.processing_repo = MagicMock()
+    crawler.log_repo = MagicMock()
+    return crawler
+
+
+class AirplaneCrawlerTest(unittest.TestCase):
+
+    def test_batch_is_crawled_concurrently_within_source_limits(self):
+        complete = FakeSource('complete', delay=0.05, reg='HB-JLT', icao_type_code='A320',
+                              aircraft_type_description='Airbus A320', operator='Swiss')
+        unused = FakeSource('unused')
+        crawler = create_crawler([complete, unused], CRAWLER_CONCURRENCY=8, CRAWLER_SOURCE_CONCURRENCY=2)
+        crawler.processing_repo.get_aircraft_for_processing.return_value = [f'4b1a0{i}' for i in range(8)]
+        crawler.processing_repo.reset_service_error_attempts.return_value = 0
+        crawler.processing_repo.cleanup_failed_aircraft.return_value = 0
+
+        start = time.time()
+        crawler.crawl_sources()
+        duration = time.time() - start
+
+        self.assertEqual(8, crawler.aircraft_repo.insert_aircraft.call_count)
+        self.assertEqual(8, crawler.processing_repo.remove_aircraft.call_count)
+        self.assertEqual(2, complete.max_in_flight)
+        self.assertEqual(0, unused.calls)
+        self.assertLess(duration, 8 * complete.delay)
+
+    def test_slow_source_is_hedged_by_the_next(self):
+        slow = FakeSource('slow', delay=0.5, reg='HB-JLT', icao_type_code='A320')
+        fast = FakeSource('fast', delay=0.01, reg='HB-JLT', icao_type_code='A320',
+                          aircraft_type_description='Airbus A320')
+        crawler = create_crawler([slow, fast], CRAWLER_HEDGE_SOURCES=2, CRAWLER_HEDGE_DELAY_MS=20)
+
+        start = time.time()
+        crawl_result = crawler._query_aircraft_metadata('4b1a01')
+        duration = time.time() - start
+
+        self.assertEqual('fast', crawl_result.aircraft.source)
+        self.assertLess(duration, slow.delay)
+        self.assertEqual(['fast', 'slow'], [log.source for log in crawl_result.query_logs])
+        self.assertEqual('cancelled', crawl_result.query_logs[1].status)
+
+    def test_partial_results_are_merged_as_they_arrive(self):
+        registration = FakeSource('registration', delay=0.02, reg='HB-JLT')
+        type_code = FakeSource('type_code', delay=0.01, icao_type_code='A320', operator='Swiss')
+        crawler = create_crawler([registration, type_code], CRAWLER_HEDGE_SOURCES=2, CRAWLER_HEDGE_DELAY_MS=0)
+
+        crawl_result = crawler._query_aircraft_metadata('4b1a01')
+
+        self.assertEqual('type_code+registration', crawl_result.aircraft.source)
+        self.assertEqual('HB-JLT', crawl_result.aircraft.reg)
+        self.assertEqual('Swiss', crawl_result.aircraft.operator)
+
+    def test_half_open_circuit_allows_a_single_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, base_reset_seconds=0)
+        breaker.record_failure()
+
+        self.assertTrue(breaker.is_available())
+        self.assertEqual(CircuitState.HALF_OPEN, breaker.state)
+        self.assertFalse(breaker.is_available())
+
+        breaker.record_success()
+        self.assertTrue(breaker.is_available())
+        self.assertTrue(breaker.is_available())
+
+
+class AdaptiveTokenBucketTest(unittest.TestCase):
+
+    def test_rate_increases_additively_and_halves_on_errors(self):
+        bucket = AdaptiveTokenBucket(rate=4.0, max_rate=5.0, latency_target_sec=1.0)
+
+        for _ in range(40):
+            bucket.record_success(0.1)
+        self.assertEqual(5.0, bucket.rate)
+
+        bucket.record_failure()
+        self.assertEqual(2.5, bucket.rate)
+        # Errors of requests already in flight count once
+        bucket.record_failure()
+        self.assertEqual(2.5, bucket.rate)
+
+    def test_slow_answers_lower_the_rate(self):
+        bucket = AdaptiveTokenBucket(rate=4.0, latency_target_sec=1.0)
+
+        bucket.record_success(2.0)
+
+        self.assertLess(bucket.rate, 4.0)
+        self.assertEqual(2000.0, bucket.get_stats()['avg_latency_ms'])
+
+    def test_acquire_waits_for_the_refill(self):
+        bucket = AdaptiveTokenBucket(rate=20.0, max_rate=20.0)
+        for _ in range(20):
+            self.assertTrue(bucket.acquire(timeout=0))
+
+        self.assertFalse(bucket.acquire(timeout=0))
+        start = time.time()
+        self.assertTrue(bucket.acquire(timeout=1))
+        self.assertGreater(time.time() - start, 0.02)
+
+    def test_rate_limited_probe_is_handed_on(self):
+        registry = CircuitBreakerRegistry(failure_threshold=1, base_reset_seconds=0, rate=1, max_rate=1)
+        registry.record_failure('hexdb')
+        registry.get_bucket('hexdb').acquire(timeout=0)
+
+        self.assertTrue(registry.is_source_available('hexdb'))
+        self.assertFalse(registry.acquire_token('hexdb', timeout=0))
+        self.assertTrue(registry.is_source_available('hexdb'))
+        self.assertEqual(1, registry.get_rate_limit_stats()['hexdb']['total_timeouts'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+from app.core.services.incomplete_aircraft_manager import IncompleteAircraftManager
+from app.data.repositories.aircraft_processing_repository import CrawlReason
+
+
+class IncompleteAircraftManagerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.aircraft_repo = MagicMock()
+        self.processing_repo = MagicMock()
+        self.processing_repo.add_aircraft_batch.side_effect = len
+        self.sut = IncompleteAircraftManager.create_with_repositories(
+            self.aircraft_repo, self.processing_repo, staleness_days=120, incomplete_staleness_days=7)
+
+    def test_batch_classification(self):
+        complete = {"registeredOwners": "Swiss", "type": "A320", "icaoTypeCode": "A320", "registration": "HB-JLT"}
+        now = datetime.now()
+        self.processing_repo.get_existing.return_value = {"4B1A00"}
+        self.aircraft_repo.query_aircraft_docs.return_value = {
+            "4B1A02": {"modeS": "4B1A02"},
+            "4B1A03": {"modeS": "4B1A03", "lastModified": now - timedelta(days=10)},
+            "4B1A04": {"modeS": "4B1A04", "lastModified": now - timedelta(days=200), **complete},
+            "4B1A05": {"modeS": "4B1A05", "lastModified": now - timedelta(days=10), **complete},
+        }
+
+        self.sut.schedule_aircraft_for_processing({"4b1a00", "4b1a01", "4b1a02", "4b1a03", "4b1a04", "4b1a05"})
+
+        self.processing_repo.get_existing.assert_called_once()
+        self.aircraft_repo.query_aircraft_docs.assert_called_once()
+        self.assertEqual({"4b1a01", "4b1a02", "4b1a03", "4b1a04", "4b1a05"},
+                         set(self.aircraft_repo.query_aircraft_docs.call_args[0][0]))
+        (added,), _ = self.processing_repo.add_aircraft_batch.call_args
+        self.assertEqual({("4b1a01", CrawlReason.NOT_IN_DB), ("4b1a02", CrawlReason.NO_TIMESTAMP),
+                          ("4b1a03", CrawlReason.INCOMPLETE_STALE), ("4b1a04", CrawlReason.STALE)}, set(added))
+
+    def test_recently_classified_aircraft_are_skipped(self):
+        self.processing_repo.get_existing.return_value = set()
+        self.aircraft_repo.query_aircraft_docs.return_value = {}
+
+        self.sut.schedule_aircraft_for_processing({"4b1a01"})
+        self.sut.schedule_aircraft_for_processing({"4b1a01", "4b1a02"})
+
+        self.assertEqual(["4b1a02"], self.processing_repo.get_existing.call_args[0][0])
+        self.assertEqual(2, self.processing_repo.add_aircraft_batch.call_count)
+
+    def test_failed_query_is_retried(self):
+        self.processing_repo.get_existing.side_effect = [Exception("timeout"), set()]
+        self.aircraft_repo.query_aircraft_docs.return_value = {}
+
+        self.sut.schedule_aircraft_for_processing({"4b1a01"})
+        self.processing_repo.add_aircraft_batch.assert_not_called()
+
+        self.sut.schedule_aircraft_for_processing({"4b1a01"})
+        self.processing_repo.add_aircraft_batch.assert_called_once_with([("4b1a01", CrawlReason.NOT_IN_DB)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import socket
+import tempfile
+import time
+import unittest
+
+from app.core.models.position_report import PositionReport
+from app.core.utils.spatial_index import BoundingBox
+from app.sse.bus import BusPublisher, BusSubscriber, LiveMirror, snapshot_data
+
+
+class LiveBusTest(unittest.TestCase):
+
+    def setUp(self):
+        self.socket_path = os.path.join(tempfile.mkdtemp(), 'live.sock')
+
+    def test_subscriber_mirrors_snapshot_and_deltas(self):
+        cached_flights = {"flight1": PositionReport("4b1a5f", 47.0, 8.0, 1000, gs=250, callsign="SWR1",
+                                                    category="AIRCRAFT_CATEGORY_MEDIUM_1")}
+        publisher = BusPublisher(self.socket_path, lambda: snapshot_data(cached_flights))
+        publisher.start()
+        mirror = LiveMirror()
+        received = []
+
+        async def handler(message_type, data):
+            received.append(message_type)
+            await mirror.apply(message_type, data)
+
+        async def run():
+            subscriber = BusSubscriber(self.socket_path, handler, reconnect_delay=0.01)
+            subscriber.start()
+            while not publisher.has_subscribers():
+                await asyncio.sleep(0.01)
+            publisher.publish("positions", {"flight1": {"icao": "4b1a5f", "lat": 47.1, "lon": 8.0, "alt": 1100},
+                                            "flight2": {"icao": "3b76b3", "lat": 51.0, "lon": 0.0, "alt": 2000}})
+            publisher.publish("categories", {"flight2": 6})
+            publisher.publish("removed", ["flight1"])
+            while len(received) < 4:
+                await asyncio.sleep(0.01)
+            connected = subscriber.connected
+            subscriber.stop()
+            return connected
+
+        try:
+            connected = asyncio.run(run())
+        finally:
+            publisher.stop()
+
+        self.assertTrue(connected)
+        self.assertEqual(["snapshot", "positions", "categories", "removed"], received)
+        flights = mirror.get_cached_flights()
+        self.assertEqual({"flight2"}, set(flights))
+        self.assertEqual("AIRCRAFT_CATEGORY_HEAVY", flights["flight2"].category)
+        self.assertEqual({"flight2"}, set(mirror.get_cached_flights_in(BoundingBox.of(50, -1, 52, 1))))
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def test_stalled_subscriber_does_not_block_publishing(self):
+        publisher = BusPublisher(self.socket_path, lambda: {}, send_timeout=5.0, queue_size=2)
+        publisher.start()
+        # Connects but never reads
+        stalled = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stalled.connect(self.socket_path)
+        try:
+            while not publisher.has_subscribers():
+                time.sleep(0.01)
+            start = time.time()
+            for _ in range(50):
+                publisher.publish("positions", {"flight1": {"icao": "4b1a5f", "pad": "x" * 100000}})
+            duration = time.time() - start
+            dropped = not publisher.has_subscribers()
+        finally:
+            stalled.close()
+            publisher.stop()
+
+        self.assertLess(duration, 1.0)
+        self.assertTrue(dropped)
+
+    def test_deltas_keep_callsign_and_category(self):
+        mirror = LiveMirror()
+
+        async def run():
+            await mirror.apply("snapshot", snapshot_data({
+                "flight1": PositionReport("4b1a5f", 47.0, 8.0, 1000, callsign="SWR1", category="AIRCRAFT_CATEGORY_LIGHT")
+            }))
+            before = mirror.get_cached_flights()
+            await mirror.apply("positions", {"flight1": {"icao": "4b1a5f", "lat": 47.2, "lon": 8.1, "alt": 1200}})
+            await mirror.apply("callsigns", {"flight1": "SWR2", "unknown": "DLH1"})
+            return before
+
+        before = asyncio.run(run())
+
+        pos = mirror.get_cached_flights()["flight1"]
+        self.assertEqual((47.2, 8.1, 1200, "SWR2", "AIRCRAFT_CATEGORY_LIGHT"),
+                         (pos.lat, pos.lon, pos.alt, pos.callsign, pos.category))
+        self.assertEqual(47.0, before["flight1"].lat)
+        self.assertNotIn("unknown", mirror.get_cached_flights())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+from app.core.models.position_report import PositionReport
+from app.core.services.live_state import LiveStateTable
+
+
+class LiveStateTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sut = LiveStateTable(capacity=2)
+
+    def test_position_roundtrip(self):
+        slot = self.sut.assign_flight('4b1a5f', 'flight1', 100.0)
+        self.sut.category[slot] = PositionReport.CATEGORY_MAP['AIRCRAFT_CATEGORY_HEAVY']
+        self.sut.callsign[slot] = 'SWR123'
+        self.sut.set_position(slot, PositionReport('4b1a5f', 47.1, 8.2, 35000, gs=420.0, track=None))
+
+        pos = self.sut.position_of(slot)
+
+        self.assertEqual(('4b1a5f', 47.1, 8.2, 35000, 420.0), (pos.icao24, pos.lat, pos.lon, pos.alt, pos.gs))
+        self.assertIsNone(pos.track)
+        self.assertEqual('SWR123', pos.callsign)
+        self.assertEqual('AIRCRAFT_CATEGORY_HEAVY', pos.category)
+
+    def test_new_flight_resets_flight_columns(self):
+        slot = self.sut.assign_flight('4b1a5f', 'flight1', 100.0)
+        self.sut.callsign[slot] = 'SWR123'
+        self.sut.set_position(slot, PositionReport('4b1a5f', 47.1, 8.2, 35000))
+
+        self.assertEqual(slot, self.sut.assign_flight('4b1a5f', 'flight2', 200.0))
+        self.assertIsNone(self.sut.position_of(slot))
+        self.assertIsNone(self.sut.callsign[slot])
+        self.assertEqual('flight2', self.sut.flight_id_of('4b1a5f'))
+
+    def test_table_grows_beyond_capacity(self):
+        for i in range(4):
+            self.sut.assign_flight(f'4b1a0{i}', f'flight{i}', 100.0)
+
+        self.assertGreaterEqual(self.sut.capacity, 4)
+        self.assertEqual('flight3', self.sut.flight_id_of('4b1a03'))
+
+    def test_evicted_slots_are_reused(self):
+        old_slot = self.sut.assign_flight('4b1a00', 'flight0', 100.0)
+        self.sut.assign_flight('4b1a01', 'flight1', 300.0)
+
+        self.assertEqual(['flight0'], self.sut.evict_stale(150.0))
+        self.assertNotIn('4b1a00', self.sut)
+        self.assertEqual(old_slot, self.sut.assign_flight('4b1a02', 'flight2', 300.0))
+
+    def test_position_changed_mask_compares_quantized_positions(self):
+        slot = self.sut.assign_flight('4b1a5f', 'flight1', 100.0)
+        new_slot = self.sut.assign_flight('3b76b3', 'flight2', 100.0)
+        self.sut.set_position(slot, PositionReport('4b1a5f', 47.123451, 8.2, 35000))
+
+        mask = self.sut.position_changed_mask(
+            [slot, slot, slot, new_slot],
+            [PositionReport('4b1a5f', 47.1234512, 8.2, 35000),  # below ~1m
+             PositionReport('4b1a5f', 47.12346, 8.2, 35000),
+             PositionReport('4b1a5f', 47.123451, 8.2, 35100),
+             PositionReport('3b76b3', 46.0, 7.0, None)])
+
+        self.assertEqual([False, True, True, True], mask)
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from app.core.models.position_report import PositionReport
+from app.core.services.live_state import LiveStateTable
+from app.core.services.live_state_checkpoint import LiveStateCheckpoint
+
+
+class LiveStateCheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'live-state.bin')
+        self.sut = LiveStateCheckpoint(self.path)
+
+    def test_roundtrip_skips_stale_aircraft(self):
+        live_state = LiveStateTable()
+        slot = live_state.assign_flight('4b1a5f', 'flight1', 1000.0)
+        live_state.flight_callsign[slot] = 'SWR123'
+        live_state.callsign[slot] = 'SWR123'
+        live_state.category[slot] = PositionReport.CATEGORY_MAP['AIRCRAFT_CATEGORY_HEAVY']
+        live_state.set_position(slot, PositionReport('4b1a5f', 47.1, 8.2, None, gs=420.0, track=271.5))
+        live_state.assign_flight('3b76b3', 'flight2', 1000.0)  # no position yet
+        live_state.assign_flight('a1b2c3', 'flight3', 100.0)
+
+        self.assertEqual(3, self.sut.save(live_state, saved_at=1010.0))
+
+        restored = LiveStateTable()
+        self.assertEqual(1010.0, self.sut.load(restored, min_last_contact=500.0))
+        self.assertEqual(2, len(restored))
+        self.assertNotIn('a1b2c3', restored)
+        slot = restored.slot_of('4b1a5f')
+        pos = restored.position_of(slot)
+        self.assertEqual(('flight1', 'SWR123', 1000.0), (restored.flight_id[slot], restored.flight_callsign[slot],
+                                                         restored.last_contact[slot]))
+        self.assertEqual((47.1, 8.2, None, 420.0, 271.5, 'SWR123', 'AIRCRAFT_CATEGORY_HEAVY'),
+                         (pos.lat, pos.lon, pos.alt, pos.gs, pos.track, pos.callsign, pos.category))
+        self.assertIsNone(restored.position_of(restored.slot_of('3b76b3')))
+        self.assertIsNone(restored.callsign[restored.slot_of('3b76b3')])
+
+    def test_missing_old_or_corrupt_checkpoint_is_ignored(self):
+        live_state = LiveStateTable()
+        self.assertIsNone(self.sut.load(live_state, min_last_contact=0.0))
+
+        live_state.assign_flight('4b1a5f', 'flight1', 1000.0)
+        self.sut.save(live_state, saved_at=1000.0)
+        self.assertIsNone(self.sut.load(LiveStateTable(), min_last_contact=2000.0))
+
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 3)
+        restored = LiveStateTable()
+        self.assertIsNone(self.sut.load(restored, min_last_contact=0.0))
+        self.assertEqual(0, len(restored))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -24,3 +24,25 @@ class ModeSUtilTests(unittest.TestCase):
 
     def test_mil_swiss(self):
         self.assertTrue(self.sut.is_swiss_mil(0x4B7F45))
+
+    def test_range_boundaries(self):
+        for start, end in self.sut.ranges:
+            self.assertTrue(self.sut.is_military(f'{start:06x}'))
+            self.assertTrue(self.sut.is_military(f'{end:06x}'))
+        self.assertFalse(self.sut.is_military('000000'))
+        self.assertFalse(self.sut.is_military('ffffff'))
+
+    def test_military_subset_matches_linear_scan(self):
+        # Known military and civil addresses, plus both sides of every range boundary
+        icao24s = ['3B76B3', '4B7F45', '4D010C', '4B1A5F', '3003AD', '3B76B3']
+        for start, end in self.sut.ranges:
+            icao24s += [f'{max(start - 1, 0):06x}', f'{start:06x}', f'{end:06x}', f'{min(end + 1, 0xFFFFFF):06x}']
+
+        # Independent of the merged ranges used for bisect
+        expected = {icao24 for icao24 in icao24s
+                    if any(start <= int(icao24, 16) <= end for start, end in self.sut.ranges)}
+
+        self.assertEqual(expected, self.sut.military_subset(icao24s))
+        self.assertEqual(expected, self.sut.military_subset(icao24s))  # memoized
+        self.assertTrue({'3B76B3', '4B7F45'} <= expected)
+        self.assertFalse({'4D010C', '4B1A5F', '3003AD'} & expected)
@@ -0,0 +1,67 @@
+import unittest
+from unittest.mock import MagicMock
+
+from app.core.models.position_report import PositionReport
+from app.core.services.position_dedup import PositionDedupCache
+from app.core.services.position_manager import PositionManager
+
+
+class PositionDedupCacheTest(unittest.TestCase):
+
+    def _key(self, lat, lon, alt=1000):
+        return PositionDedupCache.key(PositionReport('4b1a5f', lat, lon, alt))
+
+    def test_duplicates_are_tracked_per_flight(self):
+        sut = PositionDedupCache(history_size=4)
+
+        self.assertTrue(sut.add('flight1', self._key(47.0, 8.0)))
+        self.assertTrue(sut.add('flight2', self._key(47.0, 8.0)))  # same gate, other aircraft
+        self.assertFalse(sut.add('flight1', self._key(47.0, 8.0)))
+
+        self.assertEqual((1, 2), (sut.hits, sut.misses))
+
+    def test_ring_keeps_last_positions_only(self):
+        sut = PositionDedupCache(history_size=2)
+        sut.add('flight1', self._key(47.0, 8.0))
+        sut.add('flight1', self._key(47.1, 8.0))
+
+        self.assertFalse(sut.add('flight1', self._key(47.0, 8.0)))
+        sut.add('flight1', self._key(47.2, 8.0))
+        self.assertTrue(sut.add('flight1', self._key(47.0, 8.0)))
+
+    def test_discarded_flights_are_forgotten(self):
+        sut = PositionDedupCache(history_size=2)
+        sut.add('flight1', self._key(47.0, 8.0))
+        sut.add('flight2', self._key(47.0, 8.0))
+
+        sut.discard(['flight1', 'unknown'])
+
+        self.assertEqual(1, len(sut))
+        self.assertTrue(sut.add('flight1', self._key(47.0, 8.0)))
+
+    def test_least_recently_updated_flights_are_evicted(self):
+        sut = PositionDedupCache(history_size=2, max_entries=4)
+        sut.add('flight1', self._key(47.0, 8.0))
+        sut.add('flight2', self._key(47.0, 8.0))
+        sut.add('flight1', self._key(47.1, 8.0))
+        sut.add('flight3', self._key(47.0, 8.0))
+
+        self.assertEqual(2, len(sut))
+        self.assertEqual(1, sut.evictions)
+        self.assertFalse(sut.add('flight1', self._key(47.1, 8.0)))
+        self.assertTrue(sut.add('flight2', self._key(47.0, 8.0)))
+
+    def test_duplicate_position_still_refreshes_contact(self):
+        sut = PositionManager(object())
+        sut._writer = MagicMock()
+        flight_id = '64b7f0c2a1e4d5f6a7b8c9d0'
+        slot = sut.live_state.assign_flight('4b1a5f', flight_id, 0.0)
+
+        for lat in (47.0, 47.1, 47.0):
+            sut.add_positions([PositionReport('4b1a5f', lat, 8.0, 1000)], None)
+
+        positions, last_contacts = sut._writer.submit.call_args[0]
+        self.assertEqual([], positions)
+        self.assertEqual(flight_id, last_contacts[0][0])
+        self.assertGreater(sut.live_state.last_contact[slot], 0.0)
+        self.assertEqual(47.1, sut.live_state.position_of(slot).lat)
@@ -0,0 +1,90 @@
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from pymongo.errors import BulkWriteError
+
+from app.core.services.position_writer import PositionWriter
+
+
+class PositionWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.repository = MagicMock()
+        self.now = datetime.now(timezone.utc)
+
+    def test_coalesces_cycles_and_last_contacts(self):
+        sut = PositionWriter(self.repository, flush_interval=60)
+        sut.submit([{"n": 1}], [("flight1", self.now)])
+        sut.submit([{"n": 2}, {"n": 3}], [("flight1", self.now + timedelta(seconds=2)), ("flight2", self.now)])
+
+        sut.start()
+        sut.stop()
+
+        self.repository.insert_positions.assert_called_once_with([{"n": 1}, {"n": 2}, {"n": 3}])
+        self.repository.bulk_update_flight_last_contacts.assert_called_once_with(
+            [("flight1", self.now + timedelta(seconds=2)), ("flight2", self.now)])
+        self.assertEqual(3, sut.positions_written)
+
+    def test_full_buffer_drops_oldest_after_backpressure(self):
+        sut = PositionWriter(self.repository, max_pending=2, backpressure_timeout=0.01)
+        sut.submit([{"n": 1}, {"n": 2}], [])
+        sut.submit([{"n": 3}], [])
+
+        self.assertEqual(2, sut.pending_count())
+        self.assertEqual(1, sut.positions_dropped)
+
+    def test_submit_does_not_wait_for_database(self):
+        release = threading.Event()
+        self.repository.insert_positions.side_effect = lambda positions: release.wait(2.0)
+        sut = PositionWriter(self.repository, max_batch=1, flush_interval=0.01)
+        sut.start()
+
+        sut.submit([{"n": 1}], [])
+        sut.submit([{"n": 2}], [])
+
+        release.set()
+        self.assertTrue(sut.flush(2.0))
+        sut.stop()
+        self.assertEqual(2, sut.positions_written)
+
+    def test_only_positions_reported_as_failed_are_retried(self):
+        error = BulkWriteError({"writeErrors": [{"index": 1, "code": 121}], "nInserted": 2})
+        self.repository.insert_positions.side_effect = [error, None]
+        sut = PositionWriter(self.repository, flush_interval=0.01)
+        sut.RETRY_DELAY_SEC = 0.01
+        sut.submit([{"n": 1}, {"n": 2}, {"n": 3}], [("flight1", self.now)])
+        sut.start()
+
+        self.assertTrue(sut.flush(2.0))
+        sut.stop()
+
+        self.assertEqual([{"n": 2}], self.repository.insert_positions.call_args_list[1][0][0])
+        self.repository.bulk_update_flight_last_contacts.assert_called_once_with([("flight1", self.now)])
+        self.assertEqual((1, 3, 0), (sut.write_errors, sut.positions_written, sut.positions_dropped))
+
+    def test_positions_with_unknown_outcome_are_not_retried(self):
+        self.repository.insert_positions.side_effect = RuntimeError("timed out")
+        self.repository.bulk_update_flight_last_contacts.side_effect = [RuntimeError("timed out"), None]
+        sut = PositionWriter(self.repository, flush_interval=0.01)
+        sut.RETRY_DELAY_SEC = 0.01
+        sut.submit([{"n": 1}], [("flight1", self.now)])
+        sut.start()
+
+        self.assertTrue(sut.flush(2.0))
+        sut.stop()
+
+        self.assertEqual(1, self.repository.insert_positions.call_count)
+        self.assertEqual(2, self.repository.bulk_update_flight_last_contacts.call_count)
+        self.assertEqual((1, 0, 1), (sut.write_errors, sut.positions_written, sut.positions_dropped))
+
+    def test_failed_write_is_dropped_beyond_buffer_limit(self):
+        sut = PositionWriter(self.repository, max_pending=3)
+        sut.submit([{"n": 3}, {"n": 4}], [])
+
+        sut._requeue([{"n": 1}, {"n": 2}], {})
+
+        self.assertEqual(3, sut.pending_count())
+        self.assertEqual(1, sut.positions_dropped)
+        self.assertEqual([{"n": 2}, {"n": 3}, {"n": 4}], sut._positions)
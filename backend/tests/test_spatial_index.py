@@ -0,0 +1,35 @@
+import unittest
+
+from app.core.utils.spatial_index import BoundingBox, GridIndex
+
+
+class GridIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sut = GridIndex(cell_deg=1.0)
+        self.sut.update('zurich', 47.45, 8.56)
+        self.sut.update('geneva', 46.24, 6.11)
+        self.sut.update('fiji', -17.75, 179.5)
+        self.sut.update('samoa', -13.8, -171.9)
+
+    def test_query_returns_keys_inside_bbox(self):
+        self.assertEqual({'zurich'}, self.sut.query(BoundingBox.of(47.0, 8.0, 48.0, 9.0)))
+        self.assertEqual({'zurich', 'geneva'}, self.sut.query(BoundingBox.of(45.0, 5.0, 48.0, 11.0)))
+
+    def test_query_across_antimeridian(self):
+        self.assertEqual({'fiji', 'samoa'}, self.sut.query(BoundingBox.of(-20.0, 175.0, -10.0, -170.0)))
+
+    def test_moved_and_removed_keys(self):
+        self.sut.update('zurich', 46.2, 6.1)
+        self.sut.remove('geneva')
+
+        self.assertEqual({'zurich'}, self.sut.query(BoundingBox.of(45.0, 5.0, 47.0, 7.0)))
+        self.assertEqual(set(), self.sut.query(BoundingBox.of(47.0, 8.0, 48.0, 9.0)))
+
+    def test_parse_rejects_invalid_boxes(self):
+        self.assertIsNone(BoundingBox.parse(None))
+        self.assertEqual(BoundingBox(45.0, 5.0, 48.0, 11.0), BoundingBox.parse('45,5,48,11'))
+        with self.assertRaises(ValueError):
+            BoundingBox.parse('48,5,45,11')
+        with self.assertRaises(ValueError):
+            BoundingBox.parse('45,5,48')
@@ -0,0 +1,146 @@
+import asyncio
+import base64
+import json
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from app.sse.compact import CompactSession, FlightIndex, RECORD, NO_ALTITUDE, NO_VALUE, flight_index, pack_positions
+from app.sse.manager import SSEConnectionManager, SSEClient
+
+
+def decode(frame: bytes):
+    lines = frame.decode().strip().split("\n")
+    event, data = lines[1:3] if lines[0].startswith("id: ") else lines[:2]
+    message = json.loads(data[len("data: "):])
+    records = list(RECORD.iter_unpack(base64.b64decode(message["data"])))
+    return event, message, records
+
+
+class CompactEncodingTest(unittest.TestCase):
+
+    def test_pack_quantizes_positions(self):
+        payload, flights = pack_positions({
+            "compact1": {"lat": 47.123456, "lon": -8.5, "alt": 35000, "track": 271.25, "gs": 450.5, "icao": "4b1a5f"},
+            "compact2": {"lat": 1.0, "lon": 2.0, "alt": -1},
+        })
+
+        records = list(RECORD.iter_unpack(base64.b64decode(payload)))
+        index1, index2 = flight_index.index_of("compact1"), flight_index.index_of("compact2")
+        self.assertEqual([(index1, 4712346, -850000, 35000, 27125, 4505),
+                          (index2, 100000, 200000, NO_ALTITUDE, NO_VALUE, NO_VALUE)], records)
+        self.assertEqual([(index1, "compact1", "4b1a5f"), (index2, "compact2", None)], flights)
+
+    def test_session_announces_each_flight_once(self):
+        session = CompactSession()
+        _, flights = pack_positions({"announce1": {"lat": 1.0, "lon": 2.0, "icao": "abc123"}})
+        index = str(flight_index.index_of("announce1"))
+
+        self.assertEqual({index: ["announce1", "abc123"]}, session.announcements(flights))
+        self.assertEqual({}, session.announcements(flights))
+
+        session.reset()
+        self.assertEqual({index: ["announce1", "abc123"]}, session.announcements(flights))
+
+        session.reset(["announce1"])
+        self.assertEqual({}, session.announcements(flights))
+
+    def test_released_indexes_are_reused_and_announced_again(self):
+        index = FlightIndex()
+        first, second = index.index_of("gone1"), index.index_of("stays1")
+
+        index.release(["gone1"], now=1000.0)
+        # Not reused within the delay, merged and resumed deltas may still carry it
+        self.assertEqual(2, index.index_of("new1"))
+        self.assertEqual(first, index.lookup("gone1"))
+        index.release([], now=1000.0 + FlightIndex.REUSE_DELAY_SEC)
+        self.assertEqual(first, index.index_of("new2"))
+        self.assertEqual(second, index.index_of("stays1"))
+
+        session = CompactSession()
+        _, flights = pack_positions({"reused1": {"lat": 1.0, "lon": 2.0}})
+        reused = flights[0][0]
+        self.assertEqual({str(reused): ["reused1", None]}, session.announcements(flights))
+        flight_index.release(["reused1"])
+        flight_index.release([], now=time.monotonic() + FlightIndex.REUSE_DELAY_SEC)
+        _, flights = pack_positions({"reused2": {"lat": 1.0, "lon": 2.0}})
+        self.assertEqual(reused, flights[0][0])
+        self.assertEqual({str(reused): ["reused2", None]}, session.announcements(flights))
+
+    def test_lookups_of_released_flights_do_not_leak(self):
+        index = FlightIndex()
+        index.index_of("gone1")
+        index.release(["gone1"], now=1000.0)
+        index.release([], now=1000.0 + FlightIndex.REUSE_DELAY_SEC)
+
+        # Freed for good, a late delta gets an index that is retired at the next release
+        late = index.lookup("gone1")
+        index.release([], now=2000.0)
+        self.assertEqual(late, index.lookup("gone1"))
+        self.assertNotEqual(late, index.index_of("new1"))
+        index.release([], now=2000.0 + FlightIndex.REUSE_DELAY_SEC)
+        self.assertEqual(late, index.index_of("new2"))
+
+    def test_retired_flight_active_again_keeps_its_index(self):
+        index = FlightIndex()
+        first = index.index_of("back1")
+        index.release(["back1"], now=1000.0)
+
+        self.assertEqual(first, index.index_of("back1"))
+        index.release([], now=1000.0 + FlightIndex.REUSE_DELAY_SEC)
+        self.assertNotEqual(first, index.index_of("new1"))
+
+    def test_compact_clients_share_frames_once_announced(self):
+        sut = SSEConnectionManager()
+
+        def add_client(client_id):
+            session = CompactSession()
+            client = SSEClient(id=client_id, request=MagicMock(), queue=sut.create_queue(compact=session),
+                               type="positions", compact=session)
+            sut.add_client(client)
+            return client
+
+        async def run():
+            clients = [add_client(f"compact{i}") for i in range(2)]
+            position = {"lat": 47.0, "lon": 8.0, "alt": 1000, "icao": "4b1a5f"}
+            await sut.broadcast_positions({"shared1": position})
+            first = [await c.queue.get() for c in clients]
+            await sut.broadcast_positions({"shared1": dict(position, lat=47.1)})
+            second = [await c.queue.get() for c in clients]
+            return first, second
+
+        first, second = asyncio.run(run())
+
+        index = flight_index.index_of("shared1")
+        event, message, records = decode(first[0])
+        self.assertEqual("event: positions", event)
+        self.assertEqual({str(index): ["shared1", "4b1a5f"]}, message["flights"])
+        self.assertEqual([(index, 4700000, 800000, 1000, NO_VALUE, NO_VALUE)], records)
+
+        self.assertIs(second[0], second[1])
+        _, message, records = decode(second[0])
+        self.assertNotIn("flights", message)
+        self.assertEqual(4710000, records[0][1])
+
+    def test_merged_deltas_are_encoded_compact(self):
+        sut = SSEConnectionManager()
+        session = CompactSession()
+        client = SSEClient(id="behind", request=MagicMock(), queue=sut.create_queue(compact=session),
+                           type="positions", compact=session)
+        sut.add_client(client)
+
+        async def run():
+            for lat in (1.0, 2.0, 3.0):
+                await sut.broadcast_positions({"merged1": {"lat": lat, "lon": 0.0}})
+            return await client.queue.get(), await client.queue.get()
+
+        first, merged = asyncio.run(run())
+
+        self.assertIn("flights", decode(first)[1])
+        _, message, records = decode(merged)
+        self.assertNotIn("flights", message)
+        self.assertEqual([(flight_index.index_of("merged1"), 300000, 0, NO_ALTITUDE, NO_VALUE, NO_VALUE)], records)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,213 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import MagicMock
+
+from app.core.utils.spatial_index import BoundingBox
+from app.sse.encoding import encode_event
+from app.sse.manager import SSEConnectionManager, SSEClient, ClientQueue, RESYNC, CLOSED
+
+
+class SSEConnectionManagerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sut = SSEConnectionManager()
+
+    def _add_client(self, client_id, client_type="positions", **kwargs):
+        client = SSEClient(id=client_id, request=MagicMock(), queue=self.sut.create_queue(), type=client_type, **kwargs)
+        self.sut.add_client(client)
+        return client
+
+    def test_broadcast_encodes_frame_once(self):
+        async def run():
+            clients = [self._add_client(f"client{i}") for i in range(3)]
+            await self.sut.broadcast_positions({"flight1": {"lat": 47.0, "lon": 8.0}})
+            return [await c.queue.get() for c in clients]
+
+        frames = asyncio.run(run())
+
+        self.assertTrue(all(frame is frames[0] for frame in frames))
+        event_id, event, data = frames[0].decode().strip().split("\n")
+        self.assertEqual(f"id: {self.sut.boot_id}-1", event_id)
+        self.assertEqual("event: positions", event)
+        self.assertEqual({"type": "update", "count": 1, "positions": {"flight1": {"lat": 47.0, "lon": 8.0}}},
+                         json.loads(data[len("data: "):]))
+
+    def test_encode_event(self):
+        self.assertEqual(b'event: heartbeat\ndata: {"timestamp":1}\n\n', encode_event("heartbeat", {"timestamp": 1}))
+
+    def test_full_queue_drops_oldest(self):
+        async def run():
+            queue = ClientQueue(maxsize=2, policy="drop_oldest")
+            for frame in (b"1", b"2", b"3"):
+                queue.put_nowait(frame)
+            return [await queue.get(), await queue.get()], queue.frames_dropped
+
+        self.assertEqual(([b"2", b"3"], 1), asyncio.run(run()))
+
+    def test_full_queue_coalesces_into_resync(self):
+        async def run():
+            queue = ClientQueue(maxsize=2, policy="coalesce")
+            for frame in (b"1", b"2", b"3"):
+                queue.put_nowait(frame)
+            queue.put_nowait(b"4")
+            return [await queue.get(), await queue.get()], queue.qsize()
+
+        self.assertEqual(([RESYNC, b"4"], 0), asyncio.run(run()))
+
+    def test_slow_client_is_disconnected(self):
+        self.sut.configure(1, "disconnect")
+
+        async def run():
+            client = self._add_client("slow", client_type="flight", flight_id="flight1")
+            await self.sut.send_flight_position("flight1", {"lat": 47.0})
+            await self.sut.send_flight_position("flight1", {"lat": 47.1})
+            return await client.queue.get()
+
+        self.assertIs(CLOSED, asyncio.run(run()))
+        self.assertIsNone(self.sut.get_client("slow"))
+        self.assertEqual(1, self.sut.slow_client_disconnects)
+
+    def test_pending_deltas_are_merged_per_flight(self):
+        async def run():
+            client = self._add_client("behind")
+            await self.sut.broadcast_positions({"flight1": {"lat": 47.0}})
+            await self.sut.broadcast_positions({"flight1": {"lat": 47.1}, "flight2": {"lat": 46.0}})
+            await self.sut.broadcast_categories({"flight1": 3})
+            await self.sut.broadcast_positions({"flight2": {"lat": 46.1}})
+            return [await client.queue.get() for _ in range(3)], client.queue.qsize()
+
+        frames, remaining = asyncio.run(run())
+
+        payloads = [json.loads(f.decode().split("data: ", 1)[1].split("\n", 1)[0]) for f in frames]
+        self.assertEqual({"flight1": {"lat": 47.0}}, payloads[0]["positions"])
+        self.assertEqual({"type": "update", "count": 2, "positions": {"flight1": {"lat": 47.1}, "flight2": {"lat": 46.1}}},
+                         payloads[1])
+        self.assertEqual({"categories": {"flight1": 3}}, payloads[2])
+        self.assertEqual(0, remaining)
+
+    def test_publish_reaches_map_and_flight_clients(self):
+        async def run():
+            map_client = self._add_client("map")
+            flight_client = self._add_client("flight", client_type="flight", flight_id="flight1",
+                                             last_position={"lat": 47.0, "lon": 8.0, "alt": 1000})
+            await self.sut.publish_positions({"flight1": {"lat": 47.0, "lon": 8.0, "alt": 1000}})
+            await self.sut.publish_positions({"flight1": {"lat": 47.1, "lon": 8.0, "alt": 1000}})
+            return map_client.queue.qsize(), [await flight_client.queue.get()], flight_client.queue.qsize()
+
+        map_pending, flight_frames, flight_pending = asyncio.run(run())
+
+        self.assertEqual(2, map_pending)  # shared frame + merged deltas
+        self.assertIn(b'"lat":47.1', flight_frames[0])
+        self.assertEqual(0, flight_pending)
+
+    def test_flight_updates_only_reach_followers(self):
+        async def run():
+            follower = self._add_client("follower", client_type="flight", flight_id="flight1")
+            other = self._add_client("other", client_type="flight", flight_id="flight2")
+            await self.sut.publish_positions({"flight1": {"lat": 47.0, "lon": 8.0, "alt": 1000}})
+            frame = await follower.queue.get()
+            self.sut.remove_client("follower")
+            await self.sut.send_flight_position("flight1", {"lat": 47.1, "lon": 8.0, "alt": 1000})
+            return frame, await follower.queue.get(), other.queue.qsize()
+
+        frame, marker, other_pending = asyncio.run(run())
+
+        self.assertIn(b'"flight_id":"flight1"', frame)
+        self.assertIs(CLOSED, marker)
+        self.assertEqual(0, other_pending)
+        self.assertEqual({"flight2"}, set(self.sut._flight_clients))
+
+    def test_military_filter_and_shared_queue(self):
+        async def run():
+            self.sut.is_military = lambda icao24: icao24.startswith("ae")
+            queue = self.sut.create_queue()
+            military = SSEClient(id="socket", request=MagicMock(), queue=queue, type="positions", military_only=True)
+            follower = SSEClient(id="socket/flight1", request=MagicMock(), queue=queue, type="flight", flight_id="flight1")
+            self.sut.add_client(military)
+            self.sut.add_client(follower)
+            await self.sut.publish_positions({"flight1": {"icao": "4b1a5f", "lat": 47.0, "lon": 8.0, "alt": 1000},
+                                              "flight2": {"icao": "ae1234", "lat": 51.0, "lon": 0.0, "alt": 2000}})
+            frames = [await queue.get(), await queue.get()]
+            self.sut.remove_client("socket/flight1", close_queue=False)
+            await self.sut.publish_positions({"flight1": {"icao": "4b1a5f", "lat": 47.1, "lon": 8.0, "alt": 1000}})
+            return frames, queue.qsize()
+
+        (positions_frame, flight_frame), pending = asyncio.run(run())
+
+        self.assertIn(b"flight2", positions_frame)
+        self.assertNotIn(b"flight1", positions_frame)
+        self.assertIn(b"event: flight_position", flight_frame)
+        self.assertEqual(0, pending)
+
+    def test_viewport_clients_only_get_flights_in_view(self):
+        async def run():
+            everything = self._add_client("everything")
+            alps = self._add_client("alps", bbox=BoundingBox.of(45.0, 5.0, 48.0, 11.0))
+            await self.sut.broadcast_positions({"flight1": {"lat": 47.0, "lon": 8.0}, "flight2": {"lat": 51.0, "lon": 0.0}})
+            await self.sut.broadcast_positions({"flight2": {"lat": 51.1, "lon": 0.0}})
+            return await everything.queue.get(), await alps.queue.get(), alps.queue.qsize()
+
+        everything_frame, alps_frame, alps_pending = asyncio.run(run())
+
+        self.assertIn(b"flight2", everything_frame)
+        self.assertIn(b"flight1", alps_frame)
+        self.assertNotIn(b"flight2", alps_frame)
+        self.assertEqual(0, alps_pending)
+
+    def test_set_viewport_requests_resync(self):
+        async def run():
+            client = self._add_client("client")
+            await self.sut.broadcast_positions({"flight1": {"lat": 47.0, "lon": 8.0}})
+            updated = self.sut.set_viewport("client", BoundingBox.of(45.0, 5.0, 48.0, 11.0))
+            return updated, await client.queue.get(), client.bbox
+
+        updated, marker, bbox = asyncio.run(run())
+
+        self.assertTrue(updated)
+        self.assertIs(RESYNC, marker)
+        self.assertEqual(45.0, bbox.south)
+        self.assertFalse(self.sut.set_viewport("unknown", None))
+
+    def test_resume_sends_only_missed_deltas(self):
+        async def run():
+            self._add_client("other")
+            await self.sut.broadcast_positions({"flight1": {"lat": 47.0, "lon": 8.0}})
+            last_event_id = self.sut.last_event_id
+            await self.sut.broadcast_positions({"flight1": {"lat": 47.1, "lon": 8.0}, "flight2": {"lat": 51.0, "lon": 0.0}})
+            await self.sut.broadcast_callsigns({"flight2": "SWR1"})
+            client = SSEClient(id="reconnected", request=MagicMock(), queue=self.sut.create_queue(), type="positions",
+                               bbox=BoundingBox.of(45.0, 5.0, 48.0, 11.0))
+            return self.sut.resume_frames(client, last_event_id)
+
+        frames = asyncio.run(run())
+
+        payloads = [json.loads(f.decode().split("data: ", 1)[1]) for f in frames[:-1]]
+        self.assertEqual({"type": "update", "count": 1, "positions": {"flight1": {"lat": 47.1, "lon": 8.0}}}, payloads[0])
+        self.assertEqual({"callsigns": {"flight2": "SWR1"}}, payloads[1])
+        self.assertEqual(f"id: {self.sut.last_event_id}\n\n".encode(), frames[-1])
+
+    def test_resume_falls_back_to_snapshot(self):
+        async def run():
+            client = self._add_client("client")
+            await self.sut.broadcast_positions({"flight1": {"lat": 47.0, "lon": 8.0}})
+            current = self.sut.last_event_id
+            self.sut.remove_client("client")  # Nothing is broadcast until the next client connects
+            return client, current
+
+        client, last_event_id = asyncio.run(run())
+
+        self.assertIsNone(self.sut.resume_frames(client, last_event_id))
+        self.assertIsNone(self.sut.resume_frames(client, "otherboot-1"))
+        self.assertIsNone(self.sut.resume_frames(client, "garbage"))
+        self.assertIsNone(self.sut.resume_frames(client, None))
+
+        sut = SSEConnectionManager(resume_history=1)
+        client = SSEClient(id="client", request=MagicMock(), queue=sut.create_queue(), type="positions")
+        sut.add_client(client)
+        asyncio.run(sut.broadcast_positions({"flight1": {"lat": 47.0, "lon": 8.0}}))
+        last_event_id = sut.last_event_id
+        for lat in (47.1, 47.2):
+            asyncio.run(sut.broadcast_positions({"flight1": {"lat": lat, "lon": 8.0}}))
+        self.assertIsNone(sut.resume_frames(client, last_event_id))
+        self.assertEqual([f"id: {sut.last_event_id}\n\n".encode()], sut.resume_frames(client, sut.last_event_id))
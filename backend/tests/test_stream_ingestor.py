@@ -0,0 +1,82 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from app.core.models.position_report import PositionReport
+from app.core.services.stream_ingestor import StreamIngestor
+
+
+class StreamIngestorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.radar_service = MagicMock()
+        self.sut = StreamIngestor(self.radar_service, update_interval_ms=100)
+
+    def _update(self, icao24, lat, lon):
+        return {'update_type': 'UPDATE_TYPE_UPDATE', 'plane': PositionReport(icao24, lat, lon, 1000)}
+
+    def test_drain_keeps_latest_update_per_aircraft(self):
+        self.sut._apply(self._update('4b1a5f', 47.0, 8.0))
+        self.sut._apply(self._update('4b1a5f', 47.1, 8.1))
+        self.sut._apply(self._update('3b76b3', 46.0, 7.0))
+
+        drained = {p.icao24: p for p in self.sut.drain()}
+
+        self.assertEqual(2, len(drained))
+        self.assertEqual(47.1, drained['4b1a5f'].lat)
+        self.assertEqual([], self.sut.drain())
+
+    def test_remove_discards_pending_update(self):
+        self.sut._apply(self._update('4b1a5f', 47.0, 8.0))
+        self.sut._apply({'update_type': 'UPDATE_TYPE_REMOVE', 'icao_address': '4b1a5f'})
+
+        self.assertEqual([], self.sut.drain())
+        self.assertEqual({'4b1a5f'}, self.sut.drain_removed())
+        self.assertEqual(1, self.sut.removals_received)
+
+    def test_update_after_remove_cancels_removal(self):
+        self.sut._apply({'update_type': 'UPDATE_TYPE_REMOVE', 'icao_address': '4b1a5f'})
+        self.sut._apply(self._update('4b1a5f', 47.0, 8.0))
+
+        self.assertEqual(set(), self.sut.drain_removed())
+        self.assertEqual(1, len(self.sut.drain()))
+
+    def test_reconnects_after_failing_update(self):
+        reconnected = threading.Event()
+        calls = []
+
+        def stream_updates(**kwargs):
+            calls.append(kwargs)
+            if len(calls) > 1:
+                reconnected.set()
+            return iter([{'update_type': 'UPDATE_TYPE_UPDATE'}])
+
+        self.radar_service.stream_updates.side_effect = stream_updates
+        self.sut.BASE_BACKOFF_SECONDS = 0.01
+
+        self.sut.start()
+        self.assertTrue(reconnected.wait(2.0))
+        self.sut.stop()
+
+        self.assertTrue(self.radar_service.cancel_stream.called)
+
+    def test_reconnects_after_stream_ends(self):
+        reconnected = threading.Event()
+        calls = []
+
+        def stream_updates(**kwargs):
+            calls.append(kwargs)
+            if len(calls) > 1:
+                reconnected.set()
+            return iter([self._update('4b1a5f', 47.0, 8.0)])
+
+        self.radar_service.stream_updates.side_effect = stream_updates
+        self.sut.BASE_BACKOFF_SECONDS = 0.01
+
+        self.sut.start()
+        self.assertTrue(reconnected.wait(2.0))
+        self.sut.stop()
+
+        self.assertTrue(all(c['include_initial_snapshot'] for c in calls))
+        self.assertEqual(1, len(self.sut.drain()))
+        self.radar_service.cancel_stream.assert_called_once()